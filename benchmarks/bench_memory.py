@@ -0,0 +1,99 @@
+"""Benchmark of the memory held by the route and OpenAPI models.
+
+Run with ``python -m benchmarks.bench_memory --help``. The app is generated
+with benchmarks.generator and its routes are extracted, then the memory still
+allocated once the routes, and the OpenAPI model built from them, are
+created is measured with tracemalloc and reported per route.
+"""
+
+import gc
+import tempfile
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.generator import (
+    ROUTES_FILE_NAME,
+    VIEWS_DIR_NAME,
+    AppSpec,
+    generate_app,
+)
+from papyrus.parsing import Parser
+from papyrus.pyramid import PyramidInfo, Route
+from papyrus.writing import OpenAPI
+
+app = typer.Typer()
+
+
+def retained[T](build: Callable[[], T]) -> tuple[T, int]:
+    """Call build and return its result with the bytes it left allocated."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def measure_models(base_dir: Path, jobs: int) -> tuple[int, dict[str, int]]:
+    """Measure the memory of the routes and of the model of the app in base_dir.
+
+    Returns:
+        The number of routes and the bytes retained by each model.
+
+    """
+    pyramid_info = PyramidInfo(
+        views_dir_name=VIEWS_DIR_NAME, routes_file_name=ROUTES_FILE_NAME
+    )
+
+    def extract() -> list[Route]:
+        return list(
+            Parser.filter_routes_with_a_method(
+                Parser.iter_routes(base_dir, pyramid_info, jobs=jobs)
+            )
+        )
+
+    routes, routes_size = retained(extract)
+    _, model_size = retained(lambda: OpenAPI.from_routes(routes))
+    return len(routes), {"routes": routes_size, "model": model_size}
+
+
+def print_sizes(n_routes: int, sizes: dict[str, int]) -> None:
+    """Print the memory of each model, in total and per route."""
+    table = Table(
+        "model", "total (MiB)", "per route (bytes)", title=f"{n_routes} routes"
+    )
+    for model, size in sizes.items():
+        table.add_row(model, f"{size / 2**20:.2f}", f"{size / max(n_routes, 1):.0f}")
+    Console().print(table)
+
+
+@app.command()
+def main(
+    routes: Annotated[int, typer.Option(help="Routes in the app")] = 50_000,
+    view_files: Annotated[int, typer.Option(help="Views files in the app")] = 500,
+    jobs: Annotated[int, typer.Option(help="Processes parsing the views")] = 1,
+    app_dir: Annotated[
+        Path | None,
+        typer.Option(help="Generate the app here and keep it (default: temporary)"),
+    ] = None,
+) -> None:
+    """Measure the memory of the models of a synthetic Pyramid application."""
+    spec = AppSpec(routes=routes, view_files=view_files, noise_files=0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = app_dir or Path(tmp_dir)
+        generate_app(base_dir, spec)
+        n_routes, sizes = measure_models(base_dir, jobs)
+    print_sizes(n_routes, sizes)
+
+
+if __name__ == "__main__":
+    app()
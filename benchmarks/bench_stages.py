@@ -0,0 +1,281 @@
+"""Benchmark of each stage of papyrus on a synthetic Pyramid application.
+
+Run with ``python -m benchmarks.bench_stages --help``. The app is generated
+with benchmarks.generator, then discovery, extraction, model build,
+serialization and validation are timed separately. The stages that read the
+file system are also timed cold, after evicting the app from the page cache.
+
+Results can be saved as JSON and compared against a baseline saved earlier,
+exiting with status 1 when a stage got slower than the threshold allows.
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from collections.abc import Callable
+from dataclasses import asdict
+from pathlib import Path
+from typing import Annotated, Any
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.generator import (
+    ROUTES_FILE_NAME,
+    VIEWS_DIR_NAME,
+    AppSpec,
+    generate_app,
+)
+from papyrus.finder import Finder
+from papyrus.parsing import Parser
+from papyrus.pyramid import PyramidInfo, Route
+from papyrus.validation import validate_document
+from papyrus.writing import OpenAPI
+
+STAGES = ("discovery", "extraction", "model", "serialization", "validation")
+FILESYSTEM_STAGES = frozenset({"discovery", "extraction"})
+DROP_CACHES = Path("/proc/sys/vm/drop_caches")
+
+Results = dict[str, dict[str, float]]
+
+app = typer.Typer()
+
+
+def evict(base_dir: Path) -> None:
+    """Evict the files of base_dir from the page cache, as well as we can.
+
+    As root every cache is dropped, otherwise the pages of each file are
+    dropped with posix_fadvise, leaving the directory entries cached.
+    """
+    os.sync()
+    try:
+        DROP_CACHES.write_text("3\n")
+    except OSError:
+        pass
+    else:
+        return
+    for entry in Finder.walk(base_dir):
+        if not entry.is_file():
+            continue
+        fd = os.open(entry.path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def measure(
+    func: Callable[[], object], repeat: int, before: Callable[[], None] | None = None
+) -> float:
+    """Return the fastest of repeat runs of func, calling before ahead of each."""
+    if before is None:
+        return min(timeit.repeat(func, number=1, repeat=repeat))
+    timings = []
+    for _ in range(repeat):
+        before()
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def run_stages(base_dir: Path, repeat: int, jobs: int, *, cold: bool) -> Results:
+    """Time every stage on the app in base_dir.
+
+    Args:
+        base_dir: The base directory of the app.
+        repeat: How many times each stage is run, the fastest run is kept.
+        jobs: The number of processes used to parse the views files.
+        cold: Whether to also time the file system stages with a cold cache.
+
+    Returns:
+        The seconds each stage took, by stage and by "cold" or "warm".
+
+    """
+    pyramid_info = PyramidInfo(
+        views_dir_name=VIEWS_DIR_NAME, routes_file_name=ROUTES_FILE_NAME
+    )
+    routes: list[Route] = []
+    openapi = OpenAPI.from_routes([])
+    document: dict[str, Any] = {}
+
+    def discovery() -> None:
+        Finder.discover(base_dir, file_name=ROUTES_FILE_NAME, dir_name=VIEWS_DIR_NAME)
+
+    def extraction() -> None:
+        nonlocal routes
+        routes = list(
+            Parser.filter_routes_with_a_method(
+                Parser.iter_routes(base_dir, pyramid_info, jobs=jobs)
+            )
+        )
+
+    def model() -> None:
+        nonlocal openapi
+        openapi = OpenAPI.from_routes(routes)
+
+    def serialization() -> None:
+        openapi.to_yaml()
+
+    def validation() -> None:
+        validate_document(document)
+
+    stages: dict[str, Callable[[], object]] = {
+        "discovery": discovery,
+        "extraction": extraction,
+        "model": model,
+        "serialization": serialization,
+        "validation": validation,
+    }
+    results: Results = {}
+    for stage in STAGES:
+        if stage == "validation":
+            document = openapi.to_dict()
+        if cold and stage in FILESYSTEM_STAGES:
+            results.setdefault(stage, {})["cold"] = measure(
+                stages[stage], repeat, lambda: evict(base_dir)
+            )
+        results.setdefault(stage, {})["warm"] = measure(stages[stage], repeat)
+    return results
+
+
+def compare(
+    baseline: Results, results: Results, threshold: float, min_delta: float
+) -> list[tuple[str, str, float, float, bool]]:
+    """Compare results against a baseline.
+
+    Args:
+        baseline: The results to compare against.
+        results: The new results.
+        threshold: The relative slowdown above which a stage regressed.
+        min_delta: The slowdown in seconds below which a stage never regressed,
+            so noise on very fast stages is ignored.
+
+    Returns:
+        The stage, cache state, baseline and new seconds, and whether it
+        regressed, for every timing present in both results.
+
+    """
+    comparison = []
+    for stage, timings in results.items():
+        for state, seconds in timings.items():
+            old_seconds = baseline.get(stage, {}).get(state)
+            if old_seconds is None:
+                continue
+            regressed = (
+                seconds > old_seconds * (1 + threshold)
+                and seconds - old_seconds > min_delta
+            )
+            comparison.append((stage, state, old_seconds, seconds, regressed))
+    return comparison
+
+
+def print_results(results: Results, spec: AppSpec) -> None:
+    """Print the timings of every stage."""
+    table = Table(
+        "stage",
+        "cold (ms)",
+        "warm (ms)",
+        title=f"{spec.routes} routes, {spec.view_files} view files",
+    )
+    for stage, timings in results.items():
+        cold = timings.get("cold")
+        table.add_row(
+            stage,
+            "-" if cold is None else f"{cold * 1000:.2f}",
+            f"{timings['warm'] * 1000:.2f}",
+        )
+    Console().print(table)
+
+
+def print_comparison(comparison: list[tuple[str, str, float, float, bool]]) -> None:
+    """Print the comparison against the baseline."""
+    table = Table("stage", "cache", "baseline (ms)", "now (ms)", "change", "")
+    for stage, state, old_seconds, seconds, regressed in comparison:
+        change = seconds / old_seconds - 1 if old_seconds else 0.0
+        table.add_row(
+            stage,
+            state,
+            f"{old_seconds * 1000:.2f}",
+            f"{seconds * 1000:.2f}",
+            f"{change:+.1%}",
+            "[red]REGRESSED[/red]" if regressed else "[green]ok[/green]",
+        )
+    Console().print(table)
+
+
+@app.command()
+def main(  # noqa: PLR0913, PLR0917
+    routes: Annotated[int, typer.Option(help="Routes in the app")] = 1000,
+    view_files: Annotated[int, typer.Option(help="Views files in the app")] = 200,
+    decorators_per_view: Annotated[
+        int, typer.Option(help="view_config decorators on each view")
+    ] = 2,
+    depth: Annotated[int, typer.Option(help="Packages the views are nested in")] = 3,
+    noise_files: Annotated[
+        int, typer.Option(help="Files configuring nothing in the app")
+    ] = 200,
+    repeat: Annotated[int, typer.Option(help="Runs of each stage", min=1)] = 5,
+    jobs: Annotated[int, typer.Option(help="Processes parsing the views")] = 1,
+    cold: Annotated[
+        bool, typer.Option(help="Also time the file system stages cold")
+    ] = True,
+    app_dir: Annotated[
+        Path | None,
+        typer.Option(help="Generate the app here and keep it (default: temporary)"),
+    ] = None,
+    output: Annotated[
+        Path | None, typer.Option(help="Save the results to this JSON file")
+    ] = None,
+    baseline: Annotated[
+        Path | None, typer.Option(help="Compare against results saved earlier")
+    ] = None,
+    threshold: Annotated[
+        float, typer.Option(help="Relative slowdown that counts as a regression")
+    ] = 0.2,
+    min_delta: Annotated[
+        float, typer.Option(help="Slowdown in seconds always ignored as noise")
+    ] = 0.005,
+) -> None:
+    """Time each stage of papyrus on a synthetic Pyramid application."""
+    spec = AppSpec(
+        routes=routes,
+        view_files=view_files,
+        decorators_per_view=decorators_per_view,
+        depth=depth,
+        noise_files=noise_files,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = app_dir or Path(tmp_dir)
+        generate_app(base_dir, spec)
+        results = run_stages(base_dir, repeat, jobs, cold=cold)
+    print_results(results, spec)
+
+    report: dict[str, Any] = {
+        "spec": asdict(spec),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "stages": results,
+    }
+    if output:
+        output.write_text(json.dumps(report, indent=2) + "\n")
+    if baseline is None:
+        return
+    baseline_report = json.loads(baseline.read_text())
+    if baseline_report["spec"] != report["spec"]:
+        Console(stderr=True).print(
+            "[yellow]The baseline was measured on an app of another shape[/yellow]"
+        )
+    comparison = compare(baseline_report["stages"], results, threshold, min_delta)
+    print_comparison(comparison)
+    if any(regressed for *_, regressed in comparison):
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,83 @@
+"""Micro-benchmark of the per-file AST traversal cost versus the number of queries.
+
+Run with ``python -m benchmarks.bench_visitor``. For each number of queries it
+times one AstCrawler.visit with every extractor registered against running each
+query in its own traversal, as iter_calls/iter_decorators_named used to. It also
+prints how many nodes each traversal scope visits.
+"""
+
+import ast
+import timeit
+
+from rich.console import Console
+from rich.table import Table
+
+from papyrus.parsing import (
+    AstCrawler,
+    AstExtractor,
+    AstFilterMethodCall,
+    CallExtractor,
+    DecoratorExtractor,
+    Scope,
+)
+
+QUERY_NAMES = [
+    "add_route",
+    "add_view",
+    "scan",
+    "include",
+    "add_static_view",
+    "add_tween",
+    "add_subscriber",
+    "add_renderer",
+]
+
+
+def make_source(n_views: int = 200) -> str:
+    """Return a views module with n_views decorated functions."""
+    return "\n".join(
+        f'@view_config(route_name="route_{i}", request_method="GET")\n'
+        f"def view_{i}(request):\n"
+        f"    data = {{'id': request.matchdict['id'], 'items': list(range(5))}}\n"
+        f"    return process(data, request.params.get('q'), key=lambda v: v * 2)\n"
+        for i in range(n_views)
+    )
+
+
+def make_extractors(n_queries: int) -> list[AstExtractor]:
+    """Return the view_config extractor plus n_queries - 1 method call extractors."""
+    extractors: list[AstExtractor] = [DecoratorExtractor("view_config")]
+    extractors.extend(
+        CallExtractor([AstFilterMethodCall(name)])
+        for name in QUERY_NAMES[: n_queries - 1]
+    )
+    return extractors
+
+
+def main(repeat: int = 20) -> None:
+    """Print the traversal time per file for 1 to len(QUERY_NAMES) queries."""
+    crawler = AstCrawler(ast.parse(make_source()))
+    table = Table("queries", "single pass (ms)", "pass per query (ms)")
+    for n_queries in range(1, len(QUERY_NAMES) + 1):
+
+        def single_pass(n: int = n_queries) -> None:
+            crawler.visit(*make_extractors(n))
+
+        def pass_per_query(n: int = n_queries) -> None:
+            for extractor in make_extractors(n):
+                crawler.visit(extractor)
+
+        single = min(timeit.repeat(single_pass, number=1, repeat=repeat))
+        separate = min(timeit.repeat(pass_per_query, number=1, repeat=repeat))
+        table.add_row(str(n_queries), f"{single * 1000:.2f}", f"{separate * 1000:.2f}")
+    Console().print(table)
+
+    scopes = Table("scope", "nodes visited")
+    for scope in Scope:
+        nodes = sum(1 for _ in AstCrawler.iter_nodes(crawler.tree, scope))
+        scopes.add_row(scope.name, str(nodes))
+    Console().print(scopes)
+
+
+if __name__ == "__main__":
+    main()
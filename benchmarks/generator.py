@@ -0,0 +1,219 @@
+"""Generator of synthetic Pyramid applications of any size.
+
+The generated apps follow the layout papyrus expects: a routes.py at the root
+and a views directory whose files, nested a few packages deep, hold the
+view_config decorated views. Noise files that configure nothing are spread
+both inside and outside the views directory.
+"""
+
+import random
+import textwrap
+from dataclasses import dataclass
+from pathlib import Path
+
+from papyrus.pyramid import Route
+
+METHODS = ("GET", "POST", "PUT", "DELETE")
+ROUTES_FILE_NAME = "routes.py"
+VIEWS_DIR_NAME = "views"
+NOISE_DIR_NAME = "lib"
+# One route in UNVIEWED_EVERY has no view, so it is left out of the document.
+UNVIEWED_EVERY = 10
+# One view file in CLASS_VIEWS_EVERY uses a class instead of functions.
+CLASS_VIEWS_EVERY = 4
+# One noise file in IMPORTING_NOISE_EVERY imports view_config without using it.
+IMPORTING_NOISE_EVERY = 5
+
+
+@dataclass(frozen=True)
+class AppSpec:
+    """The shape of a synthetic Pyramid application."""
+
+    routes: int = 100
+    view_files: int = 20
+    decorators_per_view: int = 1
+    depth: int = 2
+    noise_files: int = 20
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class GeneratedApp:
+    """A synthetic Pyramid application written to disk."""
+
+    base_dir: Path
+    routes: list[Route]
+
+    @property
+    def documented_routes(self) -> list[Route]:
+        """Return the routes that have at least one view."""
+        return [route for route in self.routes if route.methods]
+
+
+def route_pattern(index: int, rng: random.Random) -> str:
+    """Return a unique pattern for the route at index, with 0 to 2 parameters."""
+    pattern = f"/api/v{index % 3}/resource_{index}"
+    if rng.random() < 0.6:  # noqa: PLR2004
+        pattern += "/{id}"
+        if rng.random() < 0.3:  # noqa: PLR2004
+            pattern += "/items/{item_id}"
+    return pattern
+
+
+def route_methods(index: int, decorators_per_view: int) -> list[str]:
+    """Return the request method of each decorator of the view of a route."""
+    if index % UNVIEWED_EVERY == UNVIEWED_EVERY - 1:
+        return []
+    return [METHODS[(index + i) % len(METHODS)] for i in range(decorators_per_view)]
+
+
+def routes_source(routes: list[Route]) -> str:
+    """Return a routes module adding every route."""
+    lines = [
+        "from pyramid.config import Configurator",
+        "",
+        "",
+        "def includeme(config: Configurator) -> None:",
+        '    """Add the routes of the application."""',
+    ]
+    for index, route in enumerate(routes):
+        if index % 7 == 0:
+            lines.append(f"    # Routes of the resource {index}")
+        if index % 3 == 0:
+            lines.append(
+                f'    config.add_route("{route.name}", "{route.pattern}", '
+                'factory=".resources.Root")'
+            )
+        else:
+            lines.append(f'    config.add_route("{route.name}", "{route.pattern}")')
+    return "\n".join(lines) + "\n"
+
+
+def decorator_source(route_name: str, method: str, indent: str = "") -> str:
+    """Return a view_config decorator for route_name and method."""
+    return (
+        f"{indent}@view_config(\n"
+        f'{indent}    route_name="{route_name}",\n'
+        f'{indent}    request_method="{method}",\n'
+        f'{indent}    renderer="json",\n'
+        f"{indent})\n"
+    )
+
+
+def view_body(index: int, indent: str) -> str:
+    """Return the body of a view, with enough statements to be realistic."""
+    body = f"""\
+        \"\"\"Handle the requests of the resource {index}.\"\"\"
+        params = {{key: value for key, value in request.params.items()}}
+        items = [process(item) for item in load_items(request, limit=50)]
+        if not items:
+            return {{"resource": {index}, "items": [], "params": params}}
+        return {{"resource": {index}, "items": items, "params": params}}
+    """
+    return textwrap.indent(textwrap.dedent(body), indent)
+
+
+def views_source(routes: list[Route], methods: list[list[str]], index: int) -> str:
+    """Return a views module with one view per route that has methods."""
+    parts = [
+        "from pyramid.view import view_config\n\n",
+        "from .helpers import load_items, process\n",
+    ]
+    as_class = index % CLASS_VIEWS_EVERY == 0
+    if as_class:
+        parts.append(f"\nclass Views{index}:\n    def __init__(self, request):\n")
+        parts.append("        self.request = request\n")
+    indent = "    " if as_class else ""
+    for route, route_methods_ in zip(routes, methods, strict=True):
+        if not route_methods_:
+            continue
+        parts.append("\n")
+        parts.extend(
+            decorator_source(route.name, method, indent) for method in route_methods_
+        )
+        arguments = "self, request" if as_class else "request"
+        parts.append(f"{indent}def {route.name}({arguments}):\n")
+        parts.append(view_body(index, indent + "    "))
+    return "".join(parts)
+
+
+def noise_source(index: int) -> str:
+    """Return a module with code that configures no route and no view."""
+    header = (
+        "from pyramid.view import view_config  # noqa: F401\n"
+        if index % IMPORTING_NOISE_EVERY == 0
+        else ""
+    )
+    body = f"""\
+        import json
+
+
+        class Helper{index}:
+            \"\"\"Helper number {index}.\"\"\"
+
+            def __init__(self, settings):
+                self.settings = dict(settings)
+
+            def dump(self, data):
+                return json.dumps({{"helper": {index}, "data": data}})
+
+
+        def process(item):
+            return {{"id": item, "square": item * item}}
+
+
+        def load_items(request, limit=10):
+            return list(range(min(limit, len(request.params) + {index})))
+    """
+    return header + textwrap.dedent(body)
+
+
+def view_file_path(views_dir: Path, index: int, depth: int) -> Path:
+    """Return where the view file at index goes, depth packages deep."""
+    directory = views_dir
+    for level in range(depth):
+        directory /= f"level{level}_{index % (level + 2)}"
+    return directory / f"views_{index}.py"
+
+
+def generate_app(base_dir: Path, spec: AppSpec) -> GeneratedApp:
+    """Write a synthetic Pyramid application of the given shape to base_dir.
+
+    Args:
+        base_dir: The directory to write the application to.
+        spec: The shape of the application.
+
+    Returns:
+        The application, with the routes papyrus should find in it.
+
+    """
+    rng = random.Random(spec.seed)  # noqa: S311
+    methods = [route_methods(i, spec.decorators_per_view) for i in range(spec.routes)]
+    routes = [
+        Route(f"route_{i}", route_pattern(i, rng), set(methods[i]))
+        for i in range(spec.routes)
+    ]
+    base_dir.mkdir(parents=True, exist_ok=True)
+    (base_dir / ROUTES_FILE_NAME).write_text(routes_source(routes))
+
+    views_dir = base_dir / VIEWS_DIR_NAME
+    view_files = max(spec.view_files, 1)
+    for index in range(view_files):
+        path = view_file_path(views_dir, index, spec.depth)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        (path.parent / "__init__.py").touch()
+        (path.parent / "helpers.py").write_text(noise_source(index))
+        path.write_text(
+            views_source(routes[index::view_files], methods[index::view_files], index)
+        )
+
+    for index in range(spec.noise_files):
+        directory = (
+            view_file_path(views_dir, index, spec.depth).parent
+            if index % 2
+            else base_dir / NOISE_DIR_NAME / f"package_{index % 5}"
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"noise_{index}.py").write_text(noise_source(index))
+
+    return GeneratedApp(base_dir, routes)
@@ -0,0 +1,391 @@
+"""Module responsible for caching extraction results between runs."""
+
+import hashlib
+import json
+import logging
+import shutil
+from collections.abc import Callable
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TypedDict
+
+from papyrus.git import WorkingTree
+from papyrus.log import log_time
+from papyrus.pyramid import FileFacts, ModuleSymbols, Symbol, Value
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = ".papyrus_cache"
+CACHE_FILE_NAME = "extraction.json"
+CACHE_FORMAT = 3
+# Digest stored for files that were skipped without reading them in full.
+SKIPPED_DIGEST = ""
+
+
+# A string, or the name of a constant as {"symbol": name}.
+type CachedValue = str | dict[str, str]
+
+
+class CachedSymbols(TypedDict):
+    """Cached symbols of a single file, see ModuleSymbols."""
+
+    constants: list[tuple[str, CachedValue]]
+    imports: list[tuple[str, str, str]]
+
+
+class CacheEntry(TypedDict):
+    """Cached facts of a single file, with the data used to validate them."""
+
+    size: int
+    mtime_ns: int
+    digest: str
+    routes: list[list[CachedValue]]
+    views: list[list[CachedValue]]
+    includes: list[tuple[str, str, int]]
+    symbols: CachedSymbols | None
+
+
+class GitBaseline(TypedDict):
+    """The commit of the working tree the cache entries were checked against."""
+
+    root: str
+    commit: str
+    # Files, relative to root, that differed from the commit at the time.
+    dirty: list[str]
+
+
+def cache_version() -> str:
+    """Return the version a cache must have to be reused by this papyrus."""
+    try:
+        papyrus_version = version("papyrus")
+    except PackageNotFoundError:
+        papyrus_version = "unknown"
+    return f"{papyrus_version}/{CACHE_FORMAT}"
+
+
+def content_hash(source: bytes) -> str:
+    """Return the digest used to compare file contents."""
+    return hashlib.blake2b(source, digest_size=16).hexdigest()
+
+
+def stat_key(path: Path) -> tuple[int, int]:
+    """Return the size and modification time (in ns) of a file."""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ExtractionCache:
+    """On-disk cache of the facts extracted from python files.
+
+    Entries are keyed by absolute file path and validated with the file size and
+    mtime first, and with a content hash when those changed, so files that were
+    only touched are not parsed again either. When following git, entries of
+    files git reports unchanged since the cache was saved are used without
+    reading the files at all, as in a fresh checkout where every mtime changed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        entries: dict[str, CacheEntry] | None = None,
+        baseline: GitBaseline | None = None,
+    ) -> None:
+        """Initialize a cache stored in cache_dir."""
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, CacheEntry] = entries or {}
+        self._dirty = False
+        self._baseline = baseline
+        # The directory to ask git about, and its working tree once asked.
+        self._git_dir: Path | None = None
+        self._tree: WorkingTree | None = None
+        self._unchanged: set[Path] = set()
+        self._seen: set[str] = set()
+
+    @property
+    def cache_file(self) -> Path:
+        """Return the path of the file holding the cache entries."""
+        return self.cache_dir / CACHE_FILE_NAME
+
+    @classmethod
+    @log_time(logger)
+    def load(cls: type["ExtractionCache"], cache_dir: Path) -> "ExtractionCache":
+        """Load the cache from cache_dir, starting empty if it is missing or stale."""
+        try:
+            data = json.loads((cache_dir / CACHE_FILE_NAME).read_bytes())
+        except (OSError, ValueError):
+            return cls(cache_dir)
+        if not isinstance(data, dict) or data.get("version") != cache_version():
+            logger.debug("Ignoring extraction cache from another papyrus version")
+            return cls(cache_dir)
+        return cls(cache_dir, data.get("files"), data.get("git"))
+
+    @staticmethod
+    def clear(cache_dir: Path) -> None:
+        """Remove the cache directory and everything in it."""
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def follow_git(self, base_dir: Path) -> None:
+        """Use git to tell which files changed since the cache was saved.
+
+        The commit checked out when the cache is saved is recorded. On the next
+        run, the entries of the files git tracks and reports unchanged since
+        that commit are used even if their mtime changed. Without git, or when
+        the recorded commit is not in the history, entries are validated as
+        usual.
+
+        git is only run once an entry is missing or its file's size or mtime
+        changed, so runs whose files all match their entries never start it.
+
+        Args:
+            base_dir: A directory in the working tree of the project.
+
+        """
+        self._git_dir = base_dir
+
+    def _ask_git(self) -> bool:
+        """Ask git which files are unchanged, on the first call only.
+
+        Returns:
+            Whether git was asked, and the entries may have been relocated.
+
+        """
+        if self._git_dir is None or self._tree is not None:
+            return False
+        tree = WorkingTree.read(self._git_dir)
+        # Asked once, whatever the answer.
+        self._git_dir = None
+        if tree is None:
+            return False
+        self._tree = tree
+        baseline = self._baseline
+        if baseline is None or baseline["commit"] != tree.commit:
+            # Record the new commit on save, even if no entry changes.
+            self._dirty = True
+        if baseline is None:
+            return True
+        changed = tree.changed_files(baseline["commit"])
+        if changed is None:
+            logger.info(
+                "Commit %s is not in the git history, checking every file",
+                baseline["commit"],
+            )
+            return True
+        old_root = Path(baseline["root"])
+        if old_root != tree.root:
+            self._relocate(old_root, tree.root)
+        unchanged = tree.tracked - changed - set(baseline["dirty"])
+        self._unchanged = {tree.root / name for name in unchanged}
+        logger.debug(
+            "%d files changed since commit %s", len(changed), baseline["commit"]
+        )
+        return True
+
+    def _relocate(self, old_root: Path, new_root: Path) -> None:
+        """Move the entries of files under old_root to the same files in new_root."""
+        entries: dict[str, CacheEntry] = {}
+        for key, entry in self._entries.items():
+            path = Path(key)
+            if path.is_relative_to(old_root):
+                path = new_root / path.relative_to(old_root)
+            entries[str(path)] = entry
+        self._entries = entries
+        self._dirty = True
+
+    def get(self, path: Path, key: tuple[int, int]) -> FileFacts | None:
+        """Return the facts of path if its size and mtime did not change.
+
+        When following git, the facts of files git reports unchanged are
+        returned whatever their size and mtime.
+        """
+        path = path.absolute()
+        entry = self._entries.get(str(path))
+        if (entry is None or (entry["size"], entry["mtime_ns"]) != key) and (
+            self._ask_git()
+        ):
+            entry = self._entries.get(str(path))
+        if entry is None:
+            return None
+        if (entry["size"], entry["mtime_ns"]) != key:
+            if path not in self._unchanged:
+                return None
+            entry["size"], entry["mtime_ns"] = key
+            self._dirty = True
+        self._seen.add(str(path))
+        self.hits += 1
+        return self._to_facts(entry)
+
+    def get_by_digest(
+        self, path: Path, key: tuple[int, int], digest: str
+    ) -> FileFacts | None:
+        """Return the facts of path if its content did not change."""
+        entry = self._entries.get(str(path.absolute()))
+        if entry is None or entry["digest"] != digest:
+            return None
+        entry["size"], entry["mtime_ns"] = key
+        self._dirty = True
+        self._seen.add(str(path.absolute()))
+        self.hits += 1
+        return self._to_facts(entry)
+
+    def put(
+        self, path: Path, key: tuple[int, int], digest: str, facts: FileFacts
+    ) -> None:
+        """Store the facts extracted from path."""
+        self.misses += 1
+        self._dirty = True
+        self._seen.add(str(path.absolute()))
+        self._entries[str(path.absolute())] = CacheEntry(
+            size=key[0],
+            mtime_ns=key[1],
+            digest=digest,
+            routes=[[to_cached(value) for value in route] for route in facts.routes],
+            views=[[to_cached(value) for value in view] for view in facts.views],
+            includes=list(facts.includes),
+            symbols=None
+            if facts.symbols is None
+            else CachedSymbols(
+                constants=[
+                    (name, to_cached(value)) for name, value in facts.symbols.constants
+                ],
+                imports=list(facts.symbols.imports),
+            ),
+        )
+
+    def get_or_extract(
+        self,
+        path: Path,
+        extract: Callable[[bytes], FileFacts],
+        read: Callable[[Path], bytes | None] = Path.read_bytes,
+    ) -> FileFacts:
+        """Return the cached facts of path, extracting and storing them on a miss.
+
+        Args:
+            path: The python file to get the facts of.
+            extract: Function extracting the facts from the file contents.
+            read: Function reading the file contents, returning None when the
+                file cannot contain any facts.
+
+        """
+        key = stat_key(path)
+        facts = self.get(path, key)
+        if facts is not None:
+            return facts
+        return self.extract(path, key, read(path), extract)
+
+    def extract(
+        self,
+        path: Path,
+        key: tuple[int, int],
+        source: bytes | None,
+        extract: Callable[[bytes], FileFacts],
+    ) -> FileFacts:
+        """Return the facts of source, already read from path, and store them.
+
+        Args:
+            path: The python file source was read from.
+            key: The stat key of path, see stat_key.
+            source: The contents of path, None when it cannot contain any facts.
+            extract: Function extracting the facts from the file contents.
+
+        """
+        if source is None:
+            facts = FileFacts()
+            self.put(path, key, SKIPPED_DIGEST, facts)
+            return facts
+        digest = content_hash(source)
+        cached = self.get_by_digest(path, key, digest)
+        if cached is not None:
+            return cached
+        facts = extract(source)
+        self.put(path, key, digest, facts)
+        return facts
+
+    @log_time(logger)
+    def save(self) -> None:
+        """Write the cache to disk if anything changed."""
+        logger.debug("Extraction cache: %d hits, %d misses", self.hits, self.misses)
+        if not self._dirty:
+            return
+        if self._git_dir is not None or self._tree is not None:
+            self._record_baseline()
+        else:
+            # Entries changed without git may no longer match the commit.
+            self._baseline = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / ".gitignore").write_text("*\n")
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            tmp_file.write_text(
+                json.dumps(
+                    {
+                        "version": cache_version(),
+                        "files": self._entries,
+                        "git": self._baseline,
+                    }
+                )
+            )
+            tmp_file.replace(self.cache_file)
+        except OSError as e:
+            logger.warning("Could not write the extraction cache: %s", e)
+            return
+        self._dirty = False
+
+    def _record_baseline(self) -> None:
+        """Record the commit the entries checked during this run match.
+
+        The entries that were not checked may not match it, so they are dropped.
+        """
+        tree = self._tree
+        if tree is None and self._git_dir is not None:
+            tree = WorkingTree.read(self._git_dir)
+        dirty = tree.changed_files(tree.commit) if tree is not None else None
+        if tree is None or dirty is None:
+            self._baseline = None
+            return
+        self._entries = {
+            key: entry for key, entry in self._entries.items() if key in self._seen
+        }
+        self._baseline = GitBaseline(
+            root=str(tree.root), commit=tree.commit, dirty=sorted(dirty)
+        )
+
+    @staticmethod
+    def _to_facts(entry: CacheEntry) -> FileFacts:
+        symbols = entry["symbols"]
+        return FileFacts(
+            routes=tuple(
+                (from_cached(name), from_cached(pattern))
+                for name, pattern in entry["routes"]
+            ),
+            views=tuple(
+                (from_cached(name), from_cached(method))
+                for name, method in entry["views"]
+            ),
+            includes=tuple(
+                (module, route_prefix, position)
+                for module, route_prefix, position in entry["includes"]
+            ),
+            symbols=None
+            if symbols is None
+            else ModuleSymbols(
+                constants=tuple(
+                    (name, from_cached(value)) for name, value in symbols["constants"]
+                ),
+                imports=tuple(
+                    (name, module, imported)
+                    for name, module, imported in symbols["imports"]
+                ),
+            ),
+        )
+
+
+def to_cached(value: Value) -> CachedValue:
+    """Return value as stored in a cache entry."""
+    return value if isinstance(value, str) else {"symbol": value.name}
+
+
+def from_cached(value: CachedValue) -> Value:
+    """Return the value stored in a cache entry."""
+    return value if isinstance(value, str) else Symbol(value["symbol"])
@@ -0,0 +1,156 @@
+"""Module moving the repeated objects of a document to its components."""
+
+import re
+from collections import Counter
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from papyrus.diff import canonical_key
+from papyrus.writing import HTTP_METHODS
+
+NON_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def parameter_name(parameter: dict[str, Any]) -> str:
+    """Return the component name of a parameter: its name, as a safe key.
+
+    Placeholders with a regex, like {id:[0-9]+}, give names that are neither
+    valid component keys nor safe in a JSON pointer.
+    """
+    name = NON_NAME_CHARACTERS.sub("_", str(parameter.get("name", ""))).strip("_")
+    return name or "parameter"
+
+
+def response_name(response: dict[str, Any]) -> str:
+    """Return the component name of a response: its description in CamelCase."""
+    words = NON_NAME_CHARACTERS.split(str(response.get("description", "")))
+    return "".join(word[:1].upper() + word[1:] for word in words) or "Response"
+
+
+class ComponentTable:
+    """Hash-consing table of the objects of one section of the components.
+
+    Each distinct object is keyed by its canonical JSON once, and objects seen
+    at least min_count times, whose $ref is shorter than themselves, are
+    replaced by a $ref to a single copy.
+    """
+
+    def __init__(
+        self,
+        section: str,
+        objects: Iterable[dict[str, Any]],
+        name: Callable[[dict[str, Any]], str],
+        min_count: int = 2,
+    ) -> None:
+        """Count the objects and name the ones worth sharing.
+
+        Args:
+            section: The section of the components, like "parameters".
+            objects: Every object of the section in the document, in order.
+            name: Returns the preferred component name of an object.
+            min_count: How many times an object must appear to be shared.
+
+        """
+        self.section = section
+        self.components: dict[str, Any] = {}
+        self._refs: dict[str, dict[str, str]] = {}
+        # Keys of the objects by identity, so ref does not compute them again.
+        self._keys: dict[int, str] = {}
+        counts: Counter[str] = Counter()
+        first: dict[str, dict[str, Any]] = {}
+        for obj in objects:
+            key = self._keys.get(id(obj))
+            if key is None:
+                key = self._keys[id(obj)] = canonical_key(obj)
+            counts[key] += 1
+            first.setdefault(key, obj)
+        for key, count in counts.items():
+            if count < min_count:
+                continue
+            component_name = self._unique_name(name(first[key]))
+            ref = {"$ref": f"#/components/{section}/{component_name}"}
+            if len(canonical_key(ref)) < len(key):
+                self.components[component_name] = first[key]
+                self._refs[key] = ref
+
+    def _unique_name(self, preferred: str) -> str:
+        name, suffix = preferred, 1
+        while name in self.components:
+            suffix += 1
+            name = f"{preferred}{suffix}"
+        return name
+
+    def ref(self, obj: dict[str, Any]) -> dict[str, Any]:
+        """Return the $ref standing for obj, or obj if it is not shared."""
+        if not self._refs:
+            return obj
+        key = self._keys.get(id(obj)) or canonical_key(obj)
+        return self._refs.get(key, obj)
+
+
+def iter_operations(document: dict[str, Any]) -> Iterable[dict[str, Any]]:
+    """Yield the operations of a document, sorted by path then method."""
+    paths = document.get("paths") or {}
+    for pattern in sorted(paths):
+        for method in HTTP_METHODS:
+            if operation := paths[pattern].get(method):
+                yield operation
+
+
+def share_components(document: dict[str, Any]) -> dict[str, Any]:
+    """Return document with its repeated parameters and responses in components.
+
+    Identical objects appearing in several operations are written once under
+    components and referred to with $ref wherever that is shorter. The document
+    is not modified, the operations that refer to components are copied.
+
+    Args:
+        document: The document, as returned by OpenAPI.to_dict.
+
+    Returns:
+        The document with components.
+
+    """
+    operations = list(iter_operations(document))
+    parameters = ComponentTable(
+        "parameters",
+        (parameter for op in operations for parameter in op.get("parameters", [])),
+        parameter_name,
+    )
+    responses = ComponentTable(
+        "responses",
+        (
+            response
+            for op in operations
+            for response in op.get("responses", {}).values()
+        ),
+        response_name,
+    )
+    paths: dict[str, Any] = {}
+    for pattern, path_item in (document.get("paths") or {}).items():
+        path_item = dict(path_item)  # noqa: PLW2901
+        for method in HTTP_METHODS:
+            if operation := path_item.get(method):
+                path_item[method] = operation = dict(operation)
+                if "parameters" in operation:
+                    operation["parameters"] = [
+                        parameters.ref(parameter)
+                        for parameter in operation["parameters"]
+                    ]
+                if "responses" in operation:
+                    operation["responses"] = {
+                        status: responses.ref(response)
+                        for status, response in operation["responses"].items()
+                    }
+        paths[pattern] = path_item
+    components = dict(document.get("components") or {})
+    for table in (parameters, responses):
+        if table.components:
+            components[table.section] = {
+                **components.get(table.section, {}),
+                **table.components,
+            }
+    shared = {**document, "paths": paths}
+    if components:
+        shared["components"] = components
+    return shared
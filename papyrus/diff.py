@@ -0,0 +1,276 @@
+"""Module comparing two OpenAPI documents path by path."""
+
+import json
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote
+
+from papyrus.cache import content_hash
+from papyrus.writing import HTTP_METHODS
+
+
+class DiffFormat(StrEnum):
+    """Formats the differences can be printed in."""
+
+    TEXT = "text"
+    JSON = "json"
+
+
+class ChangeKind(StrEnum):
+    """How a path or an operation differs between two documents."""
+
+    ADDED = "added"
+    REMOVED = "removed"
+    CHANGED = "changed"
+
+
+@dataclass(frozen=True)
+class Change:
+    """A path, or an operation of a path, that differs between two documents.
+
+    A change without method is about the path item itself: the whole path when
+    it was added or removed, or its own fields (summary, description...) when
+    it changed.
+    """
+
+    kind: ChangeKind
+    path: str
+    method: str | None = None
+    fields: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the change to plain python data."""
+        return {
+            "kind": str(self.kind),
+            "path": self.path,
+            "method": self.method.upper() if self.method else None,
+            "fields": list(self.fields),
+        }
+
+    def __str__(self) -> str:
+        """Return the change as a line of text."""
+        line = f"{self.kind:<8} {self.path}"
+        if self.method:
+            line = f"{line} {self.method.upper()}"
+        if self.fields:
+            line = f"{line} ({', '.join(self.fields)})"
+        return line
+
+
+def canonical_key(value: Any) -> str:  # noqa: ANN401
+    """Return a string equal for equal plain python data, whatever the key order."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def stable_hash(value: Any) -> str:  # noqa: ANN401
+    """Return a digest of plain python data that ignores the order of keys."""
+    return content_hash(canonical_key(value).encode())
+
+
+def path_hashes(paths: Mapping[str, Any]) -> dict[str, str]:
+    """Map each path of a document to the digest of its path item."""
+    return {pattern: stable_hash(path_item) for pattern, path_item in paths.items()}
+
+
+def changed_fields(old: Mapping[str, Any], new: Mapping[str, Any]) -> tuple[str, ...]:
+    """Return the sorted keys whose values differ between old and new."""
+    return tuple(
+        sorted(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+    )
+
+
+def diff_path_item(
+    pattern: str, old: Mapping[str, Any], new: Mapping[str, Any]
+) -> list[Change]:
+    """Compare two versions of the path item of pattern, operation by operation."""
+    changes: list[Change] = []
+    old_fields = {key: value for key, value in old.items() if key not in HTTP_METHODS}
+    new_fields = {key: value for key, value in new.items() if key not in HTTP_METHODS}
+    if fields := changed_fields(old_fields, new_fields):
+        changes.append(Change(ChangeKind.CHANGED, pattern, fields=fields))
+    for method in HTTP_METHODS:
+        old_operation, new_operation = old.get(method), new.get(method)
+        if old_operation == new_operation:
+            continue
+        if old_operation is None:
+            changes.append(Change(ChangeKind.ADDED, pattern, method))
+        elif new_operation is None:
+            changes.append(Change(ChangeKind.REMOVED, pattern, method))
+        else:
+            fields = changed_fields(old_operation, new_operation)
+            changes.append(Change(ChangeKind.CHANGED, pattern, method, fields))
+    return changes
+
+
+def diff_documents(
+    old: Mapping[str, Any],
+    new: Mapping[str, Any],
+    old_hashes: Mapping[str, str] | None = None,
+    new_hashes: Mapping[str, str] | None = None,
+) -> list[Change]:
+    """Compare the paths of two unstructured OpenAPI documents.
+
+    Path items are compared by digest first, so only the ones whose digests
+    differ are compared in depth.
+
+    Args:
+        old: The previous document.
+        new: The current document.
+        old_hashes: The digests of the old path items, if already computed.
+        new_hashes: The digests of the new path items, if already computed.
+
+    Returns:
+        The changes, sorted by path.
+
+    """
+    old_paths: Mapping[str, Any] = old.get("paths") or {}
+    new_paths: Mapping[str, Any] = new.get("paths") or {}
+    old_hashes = path_hashes(old_paths) if old_hashes is None else old_hashes
+    new_hashes = path_hashes(new_paths) if new_hashes is None else new_hashes
+    changes: list[Change] = []
+    for pattern in sorted(old_hashes.keys() | new_hashes.keys()):
+        old_hash, new_hash = old_hashes.get(pattern), new_hashes.get(pattern)
+        if old_hash == new_hash:
+            continue
+        if old_hash is None:
+            changes.append(Change(ChangeKind.ADDED, pattern))
+        elif new_hash is None:
+            changes.append(Change(ChangeKind.REMOVED, pattern))
+        else:
+            changes.extend(
+                diff_path_item(pattern, old_paths[pattern], new_paths[pattern])
+            )
+    return changes
+
+
+def resolve_pointer(document: Any, pointer: str) -> Any:  # noqa: ANN401
+    """Return what the JSON pointer of a $ref fragment points to in document.
+
+    Raises:
+        ValueError: If nothing is at pointer.
+
+    """
+    value = document
+    for key in unquote(pointer).split("/")[1:]:
+        key = key.replace("~1", "/").replace("~0", "~")  # noqa: PLW2901
+        try:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            msg = f"Cannot resolve the $ref fragment #{pointer}"
+            raise ValueError(msg) from e
+    return value
+
+
+class RefResolver:
+    """Resolver of the $refs of a document, into itself or the files next to it.
+
+    Documents written with --components refer to their shared objects, and
+    documents written with --shards to the files holding their paths. Both are
+    compared as if everything was written in place. Each file is read once,
+    circular $refs are kept, and $refs to URLs are left alone.
+    """
+
+    def __init__(self, spec_file: Path, document: Any) -> None:  # noqa: ANN401
+        """Initialize a resolver of the $refs of document, read from spec_file."""
+        self._documents: dict[Path, Any] = {normalize(spec_file): document}
+
+    def resolve(
+        self,
+        value: Any,  # noqa: ANN401
+        base_file: Path,
+        refs: tuple[str, ...] = (),
+    ) -> Any:  # noqa: ANN401
+        """Return value with its $refs replaced by their targets.
+
+        Args:
+            value: Part of the document read from base_file.
+            base_file: The file relative $refs are resolved from.
+            refs: The $refs being resolved, to detect circular ones.
+
+        Raises:
+            ValueError: If a $ref points to nothing.
+
+        """
+        if isinstance(value, dict):
+            ref = value.get("$ref")
+            if isinstance(ref, str) and "://" not in ref:
+                file_name, _, pointer = ref.partition("#")
+                target_file = normalize(
+                    base_file.parent / unquote(file_name) if file_name else base_file
+                )
+                key = f"{target_file}#{pointer}"
+                if key in refs:
+                    return value
+                target = resolve_pointer(self._document(target_file, ref), pointer)
+                return self.resolve(target, target_file, (*refs, key))
+            return {
+                key: self.resolve(item, base_file, refs) for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self.resolve(item, base_file, refs) for item in value]
+        return value
+
+    def _document(self, path: Path, ref: str) -> Any:  # noqa: ANN401
+        """Return the data of the file ref points into, reading it on first use."""
+        if path not in self._documents:
+            try:
+                self._documents[path] = read_document(path)
+            except OSError as e:
+                msg = f"Cannot resolve the $ref {ref}: {e}"
+                raise ValueError(msg) from e
+        return self._documents[path]
+
+
+def normalize(path: Path) -> Path:
+    """Return path without its "." and ".." components, as written in $refs."""
+    return Path(os.path.normpath(path))
+
+
+def read_document(path: Path) -> Any:  # noqa: ANN401
+    """Read the plain python data of a YAML or JSON file.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file cannot be parsed.
+
+    """
+    content = path.read_bytes()
+    if path.suffix == ".json":
+        return json.loads(content)
+    import yaml  # noqa: PLC0415
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        return yaml.load(content, Loader=loader)  # noqa: S506
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from e
+
+
+def load_document(path: Path) -> dict[str, Any]:
+    """Load an OpenAPI document from a YAML or JSON file.
+
+    The $refs of its paths are resolved, see RefResolver.
+
+    Raises:
+        ValueError: If the file cannot be parsed, does not hold a mapping or
+            holds a $ref that points to nothing.
+
+    """
+    document = read_document(path)
+    if not isinstance(document, dict):
+        msg = f"{path} does not hold an OpenAPI document"
+        raise ValueError(msg)
+    if "paths" in document:
+        document["paths"] = RefResolver(path, document).resolve(document["paths"], path)
+    return document
+
+
+def format_changes(changes: list[Change], diff_format: DiffFormat) -> str:
+    """Return the changes as text, one per line, or as a JSON list."""
+    if diff_format is DiffFormat.JSON:
+        return json.dumps([change.to_dict() for change in changes], indent=2) + "\n"
+    return "".join(f"{change}\n" for change in changes)
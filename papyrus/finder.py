@@ -1,24 +1,134 @@
 """Module responsible for finding information in a pyramid application."""
 
 import logging
+import os
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from papyrus.log import log_time
 
 logger = logging.getLogger(__name__)
 
+EXCLUDED_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".mypy_cache",
+        ".nox",
+        ".papyrus_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".svn",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "node_modules",
+        "venv",
+    }
+)
+
+
+@dataclass(frozen=True)
+class Discovery:
+    """Result of a single discovery pass over a pyramid application."""
+
+    routes_file: Path | None = None
+    views_dir: Path | None = None
+    views_files: list[Path] = field(default_factory=list)
+
 
 class Finder:
     """Class responsible for finding files in a pyramid application."""
 
+    @staticmethod
+    def walk(
+        current_dir: Path,
+        max_depth: int | None = None,
+        descend: Callable[[str], bool] | None = None,
+    ) -> Generator[os.DirEntry[str]]:
+        """Walk a directory tree breadth-first, yielding every entry.
+
+        Symlinked directories are followed, but each directory is visited at most
+        once (tracked by device and inode), so symlink cycles are harmless.
+        Directories in EXCLUDED_DIRS are never entered.
+
+        Args:
+            current_dir: The directory to start walking from.
+            max_depth: How many directory levels below current_dir to enter. None
+                means no limit, 0 means only the entries of current_dir.
+            descend: Called with a directory path right before it is scanned,
+                the directory is skipped when it returns False.
+
+        """
+        root_stat = current_dir.stat()
+        visited = {(root_stat.st_dev, root_stat.st_ino)}
+        queue = deque([(os.fspath(current_dir), 0)])
+        while queue:
+            directory, depth = queue.popleft()
+            if descend is not None and not descend(directory):
+                continue
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                logger.debug("Skipping unreadable directory: %s", directory)
+                continue
+            for entry in entries:
+                yield entry
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                if entry.name in EXCLUDED_DIRS or not entry.is_dir():
+                    continue
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    continue
+                key = (entry_stat.st_dev, entry_stat.st_ino)
+                if key not in visited:
+                    visited.add(key)
+                    queue.append((entry.path, depth + 1))
+
+    @staticmethod
+    @log_time(logger)
+    def discover(
+        current_dir: Path,
+        file_name: str | None = None,
+        dir_name: str | None = None,
+        file_type: str = ".py",
+        max_depth: int | None = None,
+    ) -> Discovery:
+        """Find a file, a directory and the files inside it in a single pass.
+
+        Args:
+            current_dir: The directory to search in.
+            file_name: The name of the file to find (e.g. the routes file).
+            dir_name: The name of the directory to find (e.g. the views dir).
+            file_type: The suffix of the files to collect inside dir_name.
+            max_depth: The maximum depth to walk, see Finder.walk.
+
+        Returns:
+            A Discovery with the first file and directory matches and the files
+            of file_type found inside the directory.
+
+        """
+        stream = DiscoveryStream(current_dir, file_name, dir_name, file_type, max_depth)
+        views_files = list(stream)
+        return stream.discovery(views_files)
+
     @staticmethod
     @log_time(logger)
     def find_path(current_dir: Path, name: str, is_dir: bool = False) -> Path | None:
         """Find a file or directory recursively, returns first match."""
-        try:
-            return next(p for p in current_dir.rglob(name) if p.is_dir() == is_dir)
-        except StopIteration:
-            return None
+        return next(
+            (
+                Path(entry.path)
+                for entry in Finder.walk(current_dir)
+                if entry.name == name and entry.is_dir() == is_dir
+            ),
+            None,
+        )
 
     @staticmethod
     @log_time(logger)
@@ -36,4 +146,93 @@ class Finder:
     @log_time(logger)
     def find_all_files(current_dir: Path, file_type: str) -> list[Path]:
         """Find all files of a certain type in a directory."""
-        return list(current_dir.rglob(f"*{file_type}"))
+        return list(Finder.iter_all_files(current_dir, file_type))
+
+    @staticmethod
+    def iter_all_files(current_dir: Path, file_type: str) -> Generator[Path]:
+        """Yield the files of a certain type in a directory as they are found."""
+        for entry in Finder.walk(current_dir):
+            if entry.name.endswith(file_type) and entry.is_file():
+                yield Path(entry.path)
+
+
+class DiscoveryStream:
+    """A discovery pass yielding the files inside the directory as it finds them.
+
+    The walk is breadth-first, so the shallowest matches win. Once both the file
+    and the directory are found, only the found directory is walked further.
+    max_depth only bounds the search for the file and the directory, the found
+    directory is always walked whole.
+    Iterating the stream runs the walk, so consumers of the files work while
+    the walk goes on. routes_file and views_dir are set as soon as they are
+    found, and are final once the stream is exhausted.
+    """
+
+    def __init__(
+        self,
+        current_dir: Path,
+        file_name: str | None = None,
+        dir_name: str | None = None,
+        file_type: str = ".py",
+        max_depth: int | None = None,
+    ) -> None:
+        """Prepare a discovery pass, see Finder.discover for the arguments."""
+        self.current_dir = current_dir
+        self.file_name = file_name
+        self.dir_name = dir_name
+        self.file_type = file_type
+        self.max_depth = max_depth
+        self.routes_file: Path | None = None
+        self.views_dir: Path | None = None
+        # The directories scanned so far, whose entries the results depend on.
+        self.directories: list[Path] = []
+
+    def __iter__(self) -> Generator[Path]:
+        """Walk current_dir, yielding the files of file_type inside dir_name."""
+        dir_prefix = ""
+
+        def descend(directory: str) -> bool:
+            if dir_prefix and f"{directory}{os.sep}".startswith(dir_prefix):
+                scan = True
+            else:
+                scan = (
+                    (self.file_name is not None and self.routes_file is None)
+                    or (self.dir_name is not None and self.views_dir is None)
+                ) and self._within_max_depth(directory)
+            if scan:
+                self.directories.append(Path(directory))
+            return scan
+
+        for entry in Finder.walk(self.current_dir, descend=descend):
+            if (
+                self.routes_file is None
+                and entry.name == self.file_name
+                and entry.is_file()
+            ):
+                self.routes_file = Path(entry.path)
+                if self.dir_name is None:
+                    return
+            if dir_prefix and entry.path.startswith(dir_prefix):
+                if entry.name.endswith(self.file_type) and entry.is_file():
+                    yield Path(entry.path)
+            elif (
+                self.views_dir is None
+                and entry.name == self.dir_name
+                and entry.is_dir()
+            ):
+                self.views_dir = Path(entry.path)
+                dir_prefix = f"{entry.path}{os.sep}"
+
+    def _within_max_depth(self, directory: str) -> bool:
+        if self.max_depth is None:
+            return True
+        depth = len(Path(directory).relative_to(self.current_dir).parts)
+        return depth <= self.max_depth
+
+    def discovery(self, views_files: Iterable[Path] = ()) -> Discovery:
+        """Return what the exhausted stream found as a Discovery."""
+        return Discovery(
+            routes_file=self.routes_file,
+            views_dir=self.views_dir,
+            views_files=list(views_files),
+        )
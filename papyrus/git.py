@@ -0,0 +1,82 @@
+"""Module asking git which files changed since a commit."""
+
+import logging
+import os
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def run_git(cwd: Path, *args: str) -> str | None:
+    """Run a git command in cwd and return its output, or None if it failed."""
+    try:
+        result = subprocess.run(  # noqa: S603
+            ["git", *args],  # noqa: S607
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.debug("git %s failed: %s", " ".join(args), e)
+        return None
+    return result.stdout
+
+
+@dataclass(frozen=True)
+class WorkingTree:
+    """A git working tree, with the files git tracks and the untracked ones."""
+
+    root: Path
+    # The commit checked out.
+    commit: str
+    # The paths, relative to root, of the files git tracks.
+    tracked: frozenset[str]
+    # The paths, relative to root, of the untracked files that are not ignored.
+    untracked: frozenset[str]
+
+    @classmethod
+    def read(cls: type["WorkingTree"], path: Path) -> "WorkingTree | None":
+        """Return the working tree holding path, None outside one or without commit.
+
+        The root is derived from path rather than asked from git, so that it is
+        spelled like the paths found under path even through symbolic links.
+        git is run twice.
+        """
+        head = run_git(path, "rev-parse", "--show-cdup", "HEAD")
+        if head is None:
+            return None
+        up, _, commit = head.partition("\n")
+        root = Path(os.path.normpath(path.absolute() / up))
+        files = run_git(
+            root, "ls-files", "-z", "-t", "--cached", "--others", "--exclude-standard"
+        )
+        if files is None:
+            return None
+        tracked: set[str] = set()
+        untracked: set[str] = set()
+        for entry in files.split("\0"):
+            if entry:
+                (untracked if entry[0] == "?" else tracked).add(entry[2:])
+        return cls(root, commit.strip(), frozenset(tracked), frozenset(untracked))
+
+    def changed_files(self, commit: str) -> set[str] | None:
+        """Return the files that differ in the working tree from commit.
+
+        Args:
+            commit: The commit to compare with.
+
+        Returns:
+            The paths, relative to root, of the files modified, added, deleted or
+            untracked since commit, or None if commit is not in the history (in a
+            shallow clone, say) or git failed.
+
+        """
+        diff = run_git(
+            self.root, "diff", "--name-only", "--no-renames", "-z", commit, "--"
+        )
+        if diff is None:
+            return None
+        return {name for name in diff.split("\0") if name} | self.untracked
@@ -0,0 +1,169 @@
+"""Module resolving the routes reachable through config.include calls."""
+
+import logging
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from papyrus.modules import find_module
+from papyrus.pyramid import FileFacts
+from papyrus.symbols import SymbolIndex
+
+logger = logging.getLogger(__name__)
+
+
+def join_route_prefix(route_prefix: str, nested_prefix: str) -> str:
+    """Return the route prefix of an include made under route_prefix.
+
+    Like pyramid, prefixes are joined with a single slash and kept without
+    leading or trailing slashes.
+    """
+    return f"{route_prefix.rstrip('/')}/{nested_prefix.lstrip('/')}".strip("/")
+
+
+def apply_route_prefix(route_prefix: str, pattern: str) -> str:
+    """Return pattern as added under route_prefix, starting with a slash."""
+    if route_prefix:
+        pattern = f"{route_prefix}/{pattern.lstrip('/')}"
+    return pattern if pattern.startswith("/") else f"/{pattern}"
+
+
+class IncludeGraph:
+    """The modules reachable from the routes file through config.include.
+
+    Modules are only read when they are reached, and their facts and the
+    modules their includes resolve to are memoized, so resolving the graph
+    again after invalidate only parses the changed modules.
+    """
+
+    def __init__(
+        self,
+        entry: Path,
+        base_dir: Path,
+        get_facts: Callable[[Path], FileFacts],
+        symbols: SymbolIndex | None = None,
+    ) -> None:
+        """Initialize the graph of the entry routes file.
+
+        Args:
+            entry: The routes file the application starts from.
+            base_dir: The base directory of the pyramid application, also
+                searched for absolute module names.
+            get_facts: Returns the facts of an existing python file.
+            symbols: Resolves the constants routes are added with.
+
+        """
+        self.entry = entry
+        self.base_dir = base_dir
+        self.get_facts = get_facts
+        self.symbols = symbols or SymbolIndex(base_dir)
+        self.modules: set[Path] = set()
+        self._facts: dict[Path, FileFacts] = {}
+        self._targets: dict[tuple[Path, str], Path | None] = {}
+
+    def routes(self) -> dict[str, str]:
+        """Resolve the graph and map each route name to its prefixed pattern.
+
+        Routes are added in the order pyramid adds them: the routes and includes
+        of a module in source order, each include adding the routes of its
+        module in place. As in pyramid, a later route replaces an earlier route
+        of the same name.
+        """
+        routes: dict[str, str] = {}
+        self.modules = set()
+        self._add_routes(self.entry, "", routes, ())
+        return routes
+
+    def _add_routes(
+        self,
+        module_file: Path,
+        route_prefix: str,
+        routes: dict[str, str],
+        stack: tuple[Path, ...],
+    ) -> None:
+        """Add the routes of module_file and of the modules it includes."""
+        if module_file in stack:
+            logger.warning("Skipping circular include of %s", module_file)
+            return
+        self.modules.add(module_file)
+        facts = self.facts(module_file)
+        start = 0
+        for module, nested_prefix, position in facts.includes:
+            self._put_routes(
+                self.symbols.resolve(module_file, facts, facts.routes[start:position]),
+                route_prefix,
+                routes,
+            )
+            start = position
+            target = self.resolve(module, module_file)
+            if target is None:
+                logger.info("Module %s included by %s not found", module, module_file)
+                continue
+            self._add_routes(
+                target,
+                join_route_prefix(route_prefix, nested_prefix),
+                routes,
+                (*stack, module_file),
+            )
+        self._put_routes(
+            self.symbols.resolve(module_file, facts, facts.routes[start:]),
+            route_prefix,
+            routes,
+        )
+
+    @staticmethod
+    def _put_routes(
+        new_routes: Iterable[tuple[str, str]],
+        route_prefix: str,
+        routes: dict[str, str],
+    ) -> None:
+        for route_name, pattern in new_routes:
+            routes.pop(route_name, None)
+            routes[route_name] = apply_route_prefix(route_prefix, pattern)
+
+    def facts(self, module_file: Path) -> FileFacts:
+        """Return the facts of module_file, parsing it on first use."""
+        facts = self._facts.get(module_file)
+        if facts is None:
+            facts = (
+                self.get_facts(module_file) if module_file.is_file() else FileFacts()
+            )
+            self._facts[module_file] = facts
+        return facts
+
+    def resolve(self, module: str, including_file: Path) -> Path | None:
+        """Return the file of the module included by including_file, if found.
+
+        Names are resolved like pyramid does, see find_module. A trailing
+        ":function" is ignored.
+        """
+        key = (including_file, module)
+        if key not in self._targets:
+            name = module.partition(":")[0]
+            self._targets[key] = find_module(name, including_file, self.base_dir)
+        return self._targets[key]
+
+    def invalidate(self, changed_paths: Iterable[Path]) -> bool:
+        """Forget what is memoized about changed files.
+
+        Args:
+            changed_paths: Files that were created, modified or deleted.
+
+        Returns:
+            Whether the routes may have changed, because a changed file is part
+            of the graph or may be a module that could not be found before.
+
+        """
+        changed = set(changed_paths)
+        if not changed:
+            return False
+        unresolved = any(target is None for target in self._targets.values())
+        for path in changed:
+            self._facts.pop(path, None)
+        self._targets = {
+            key: target
+            for key, target in self._targets.items()
+            if target is not None and target not in changed and key[0] not in changed
+        }
+        return bool(changed & self.modules) or (
+            unresolved and any(path.suffix == ".py" for path in changed)
+        )
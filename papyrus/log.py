@@ -6,7 +6,7 @@ import time
 from collections.abc import Callable
 from typing import ParamSpec, TypeVar
 
-from rich.logging import RichHandler
+from papyrus.metrics import registry
 
 T = TypeVar("T")
 P = ParamSpec("P")
@@ -15,6 +15,10 @@ P = ParamSpec("P")
 def log_time(logger: logging.Logger) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """Log the time it takes for a function to execute.
 
+    The time is also recorded in the metrics registry when it is enabled. When
+    neither DEBUG logging nor the registry is enabled, the function is called
+    without being timed.
+
     Args:
         logger: The logger instance to use for logging
 
@@ -24,43 +28,67 @@ def log_time(logger: logging.Logger) -> Callable[[Callable[P, T]], Callable[P, T
     """
 
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
-        def get_function_repr(func: Callable[P, T]) -> str:
-            return (
-                f"[muted]{func.__module__}[/muted]:[b green]{func.__name__}[/b green]"
-            )
+        name = f"{func.__module__}.{func.__qualname__}"
+        function_repr = (
+            f"[muted]{func.__module__}[/muted]:[b green]{func.__name__}[/b green]"
+        )
 
         def get_execution_time_repr(start_time: float, end_time: float) -> str:
             return f"(took [yellow]{end_time - start_time:.4f}s[/yellow])"
 
+        def finish(label: str, start_time: float, debug: bool) -> None:
+            end_time = time.perf_counter()
+            if registry.enabled:
+                registry.record(name, end_time - start_time)
+            if debug:
+                execution_time_repr = get_execution_time_repr(start_time, end_time)
+                msg = f"{label} {function_repr} {execution_time_repr}"
+                logger.debug(msg, extra={"markup": True})
+
         @functools.wraps(func)
         def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            function_repr = get_function_repr(func)
-            start_msg = f"[bold blue]START[/bold blue] {function_repr}"
-            logger.debug(start_msg, extra={"markup": True})
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if not debug and not registry.enabled:
+                return func(*args, **kwargs)
+            if debug:
+                start_msg = f"[bold blue]START[/bold blue] {function_repr}"
+                logger.debug(start_msg, extra={"markup": True})
             start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
-                end_time = time.perf_counter()
-                execution_time_repr = get_execution_time_repr(start_time, end_time)
-                end_msg = (
-                    f"[b green]END[/b green] {function_repr} {execution_time_repr}"
-                )
-                logger.debug(end_msg, extra={"markup": True})
-                return result
             except Exception:
-                end_time = time.perf_counter()
-                execution_time_repr = get_execution_time_repr(start_time, end_time)
-                error_msg = (
-                    f"[b red]ERROR[/b red] {function_repr} {execution_time_repr}"
-                )
-                logger.debug(error_msg, extra={"markup": True})
+                finish("[b red]ERROR[/b red]", start_time, debug)
                 raise
+            finish("[b green]END[/b green]", start_time, debug)
+            return result
 
         return wrapper
 
     return decorator
 
 
+class LazyRichHandler(logging.Handler):
+    """Handler passing records to a RichHandler created on the first record.
+
+    Importing rich takes longer than a whole run replayed from the cache, so
+    runs that log nothing never import it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the handler without creating the RichHandler."""
+        super().__init__()
+        self.handler: logging.Handler | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Emit record with the RichHandler, creating it if needed."""
+        if self.handler is None:
+            from rich.logging import RichHandler  # noqa: PLC0415
+
+            self.handler = RichHandler(rich_tracebacks=True)
+            self.handler.setFormatter(self.formatter)
+        self.handler.emit(record)
+
+
 def setup_logging(level: str) -> None:
     """Configure logging with Rich handler and formatting."""
     level = logging.getLevelName(level)
@@ -68,5 +96,5 @@ def setup_logging(level: str) -> None:
         level=level,
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(rich_tracebacks=True)],
+        handlers=[LazyRichHandler()],
     )
@@ -1,99 +1,610 @@
 """Application entry point."""
 
+import functools
 import logging
+import os
+import sys
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any
 
 import typer
-import yaml
-from openapi_spec_validator import validate
-from openapi_spec_validator.exceptions import (
-    OpenAPISpecValidatorError,
-)
-from openapi_spec_validator.validation.exceptions import UnresolvableParameterError
-from rich.console import Console
+from typer.core import TyperGroup
 
+from papyrus.cache import CACHE_DIR_NAME, ExtractionCache
+from papyrus.components import share_components
+from papyrus.diff import DiffFormat, diff_documents, format_changes, load_document
 from papyrus.exceptions import RoutesFileNotFoundError, ViewsDirNotFoundError
 from papyrus.log import setup_logging
-from papyrus.parsing import Parser
+from papyrus.memo import RunMemo
+from papyrus.metrics import StatsFormat, registry
 from papyrus.pyramid import PyramidInfo
-from papyrus.writing import OpenAPI
+from papyrus.scanning import Engine
+from papyrus.validation import (
+    ValidationMode,
+    validate_document,
+    validate_in_background,
+)
+from papyrus.writing import OpenAPI, OutputFormat, open_atomic
 
-app = typer.Typer()
-console = Console()
+if TYPE_CHECKING:
+    from papyrus.project import Project
+    from papyrus.sharding import ShardWriter
 
+# The modules only some commands need (the project and its parser, the server,
+# the watcher, rich's console) are imported where they are used, so that --help
+# and short runs do not pay for them. test_imports keeps it that way.
 
-@app.command()
-def main(
-    base_dir: Annotated[
+DEFAULT_COMMAND = "generate"
+# Options of generate the document does not depend on, left out of the
+# fingerprint of a run. Runs with --stats are never replayed.
+RUN_INDEPENDENT_OPTIONS = frozenset(
+    {
+        "jobs",
+        "readers",
+        "use_cache",
+        "clear_cache",
+        "use_git",
+        "watch",
+        "stats",
+        "verbose",
+        "log_level",
+    }
+)
+
+
+class DefaultCommandGroup(TyperGroup):
+    """Group running the generate command when no command is named.
+
+    This keeps ``papyrus [BASE_DIR] [OPTIONS]`` working next to ``papyrus serve``.
+    """
+
+    def parse_args(  # type: ignore[override]
+        self, ctx: typer.Context, args: list[str]
+    ) -> list[str]:
+        """Insert the default command unless the arguments name one."""
+        group_options = {opt for param in self.get_params(ctx) for opt in param.opts}
+        if not args or (args[0] not in self.commands and args[0] not in group_options):
+            args = [DEFAULT_COMMAND, *args]
+        return super().parse_args(ctx, args)
+
+
+app = typer.Typer(cls=DefaultCommandGroup)
+
+BaseDirArgument = Annotated[
+    Path | None,
+    typer.Argument(help="The base directory to parse (defaults to cwd)"),
+]
+RoutesFileOption = Annotated[
+    str,
+    typer.Option(
+        "--routes-file",
+        "-r",
+        help="The routes file to parse",
+        envvar="PAPYRUS_ROUTES_FILE_NAME",
+    ),
+]
+ViewsDirOption = Annotated[
+    str,
+    typer.Option(
+        "--views-dir",
+        "-v",
+        help="The views directory to parse",
+        envvar="PAPYRUS_VIEWS_DIR",
+    ),
+]
+MaxDepthOption = Annotated[
+    int | None,
+    typer.Option(
+        "--max-depth",
+        help="How many directory levels to search for the routes and views",
+        envvar="PAPYRUS_MAX_DEPTH",
+    ),
+]
+CacheOption = Annotated[
+    bool,
+    typer.Option(
+        "--cache/--no-cache",
+        help=f"Reuse facts extracted from unchanged files ({CACHE_DIR_NAME})",
+        envvar="PAPYRUS_CACHE",
+    ),
+]
+ClearCacheOption = Annotated[
+    bool,
+    typer.Option(
+        "--clear-cache",
+        help="Remove the extraction cache before running",
+    ),
+]
+GitOption = Annotated[
+    bool,
+    typer.Option(
+        "--git/--no-git",
+        help=(
+            "Trust the cache for the files git reports unchanged since the "
+            "commit it was saved at, even if their mtime changed"
+        ),
+        envvar="PAPYRUS_GIT",
+    ),
+]
+JobsOption = Annotated[
+    int,
+    typer.Option(
+        "--jobs",
+        "-j",
+        help="Processes used to parse views files (0 uses every CPU)",
+        envvar="PAPYRUS_JOBS",
+        min=0,
+    ),
+]
+ReadersOption = Annotated[
+    int,
+    typer.Option(
+        "--readers",
+        help=(
+            "Threads reading source files ahead of the parser, raise it on network "
+            "filesystems (0 reads them on the main thread)"
+        ),
+        envvar="PAPYRUS_READERS",
+        min=0,
+    ),
+]
+EngineOption = Annotated[
+    Engine,
+    typer.Option(
+        "--engine",
+        help=(
+            "How views files are parsed: ast parses every file, fast reads the "
+            "literal arguments from the tokens and parses only the files it cannot"
+        ),
+        envvar="PAPYRUS_ENGINE",
+    ),
+]
+VerboseOption = Annotated[
+    bool,
+    typer.Option(
+        "--verbose",
+        "-v",
+        help="Set log level to DEBUG",
+    ),
+]
+LogLevelOption = Annotated[
+    str,
+    typer.Option(
+        "--log-level",
+        "-l",
+        help="Set the log level",
+        envvar="PAPYRUS_LOG_LEVEL",
+    ),
+]
+
+
+@app.command(DEFAULT_COMMAND)
+def main(  # noqa: PLR0913, PLR0917
+    ctx: typer.Context,
+    base_dir: BaseDirArgument = None,
+    routes_file: RoutesFileOption = "routes.py",
+    views_dir: ViewsDirOption = "views",
+    max_depth: MaxDepthOption = None,
+    use_cache: CacheOption = True,
+    clear_cache: ClearCacheOption = False,
+    use_git: GitOption = True,
+    jobs: JobsOption = 1,
+    readers: ReadersOption = 4,
+    engine: EngineOption = Engine.AST,
+    output: Annotated[
         Path | None,
-        typer.Argument(help="The base directory to parse (defaults to cwd)"),
+        typer.Option(
+            "--output",
+            "-o",
+            help="Write the document to this file instead of stdout",
+            envvar="PAPYRUS_OUTPUT",
+        ),
     ] = None,
-    routes_file: Annotated[
-        str,
+    output_format: Annotated[
+        OutputFormat,
         typer.Option(
-            "--routes-file",
-            "-r",
-            help="The routes file to parse",
-            envvar="PAPYRUS_ROUTES_FILE_NAME",
+            "--format",
+            "-f",
+            help="The format of the document",
+            envvar="PAPYRUS_FORMAT",
         ),
-    ] = "routes.py",
-    views_dir: Annotated[
-        str,
+    ] = OutputFormat.YAML,
+    shards: Annotated[
+        Path | None,
         typer.Option(
-            "--views-dir",
-            "-v",
-            help="The views directory to parse",
-            envvar="PAPYRUS_VIEWS_DIR",
+            "--shards",
+            help=(
+                "Split the paths into one file per first path segment in this "
+                "directory, --output referring to them with $ref"
+            ),
+            file_okay=False,
+            envvar="PAPYRUS_SHARDS",
         ),
-    ] = "views",
-    verbose: Annotated[
+    ] = None,
+    shard_depth: Annotated[
+        int,
+        typer.Option(
+            "--shard-depth",
+            help=(
+                "The number of path segments naming a shard, after the ones "
+                "every path starts with"
+            ),
+            min=1,
+            envvar="PAPYRUS_SHARD_DEPTH",
+        ),
+    ] = 1,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch",
+            "-w",
+            help="Keep running and rewrite --output whenever the sources change",
+        ),
+    ] = False,
+    validation: Annotated[
+        ValidationMode,
+        typer.Option(
+            "--validate",
+            help=(
+                "Skip validation, validate while the document is written, "
+                "or validate before writing anything"
+            ),
+            envvar="PAPYRUS_VALIDATE",
+        ),
+    ] = ValidationMode.BACKGROUND,
+    components: Annotated[
         bool,
         typer.Option(
-            "--verbose",
-            "-v",
-            help="Set log level to DEBUG",
+            "--components/--inline",
+            help=(
+                "Move repeated parameters and responses to the components and "
+                "refer to them with $ref"
+            ),
+            envvar="PAPYRUS_COMPONENTS",
         ),
     ] = False,
-    log_level: Annotated[
+    stats: Annotated[
+        StatsFormat | None,
+        typer.Option(
+            "--stats",
+            help="Print the time spent in each step to stderr at exit",
+            envvar="PAPYRUS_STATS",
+        ),
+    ] = None,
+    verbose: VerboseOption = False,
+    log_level: LogLevelOption = "WARNING",
+) -> None:
+    """Parse Pyramid routes and views (the default command)."""
+    if watch and output is None:
+        msg = "--watch needs an --output file to rewrite"
+        raise typer.BadParameter(msg, param_hint="--watch")
+    shard_writer = make_shard_writer(output, shards, output_format, shard_depth)
+    setup_logging(level="DEBUG" if verbose else log_level)
+    if stats:
+        registry.reset(enabled=True)
+        ctx.call_on_close(functools.partial(print_stats, stats))
+    # A run whose inputs did not change since the last one replays it, unless
+    # its stats are asked for, which a replay would leave empty.
+    memo = (
+        run_memo(base_dir, ctx.params)
+        if use_cache and not (clear_cache or watch or stats)
+        else None
+    )
+    if memo is not None and memo.replay(None if output else sys.stdout):
+        return
+    project = load_project(
+        base_dir,
+        routes_file,
+        views_dir,
+        max_depth,
+        jobs,
+        use_cache=use_cache,
+        clear_cache=clear_cache,
+        use_git=use_git,
+        readers=readers,
+        engine=engine,
+    )
+    if project is None:
+        return
+
+    openapi = project.openapi()
+    document = build_document(openapi, validation, components=components)
+    pending = (
+        validate_in_background(document)
+        if document is not None and validation is ValidationMode.BACKGROUND
+        else None
+    )
+    written = write_output(openapi, document, output, output_format, shard_writer, memo)
+    if pending is not None and not pending.result():
+        raise typer.Exit(1)
+    if memo is not None:
+        memo.record([*project.input_paths(), *written])
+    if watch and output is not None:
+        run_watch(
+            project,
+            openapi,
+            output,
+            output_format,
+            components=components,
+            shard_writer=shard_writer,
+        )
+
+
+@app.command()
+def serve(  # noqa: PLR0913, PLR0917
+    base_dir: BaseDirArgument = None,
+    routes_file: RoutesFileOption = "routes.py",
+    views_dir: ViewsDirOption = "views",
+    max_depth: MaxDepthOption = None,
+    use_cache: CacheOption = True,
+    clear_cache: ClearCacheOption = False,
+    use_git: GitOption = True,
+    jobs: JobsOption = 1,
+    readers: ReadersOption = 4,
+    engine: EngineOption = Engine.AST,
+    host: Annotated[
         str,
+        typer.Option("--host", help="The address to listen on", envvar="PAPYRUS_HOST"),
+    ] = "127.0.0.1",
+    port: Annotated[
+        int,
         typer.Option(
-            "--log-level",
-            "-l",
-            help="Set the log level",
-            envvar="PAPYRUS_LOG_LEVEL",
+            "--port", "-p", help="The port to listen on", envvar="PAPYRUS_PORT"
         ),
-    ] = "WARNING",
+    ] = 8000,
+    verbose: VerboseOption = False,
+    log_level: LogLevelOption = "INFO",
 ) -> None:
-    """Parse Pyramid routes and views."""
+    """Serve /openapi.yaml and /openapi.json, updated as the sources change."""
     setup_logging(level="DEBUG" if verbose else log_level)
+    project = load_project(
+        base_dir,
+        routes_file,
+        views_dir,
+        max_depth,
+        jobs,
+        use_cache=use_cache,
+        clear_cache=clear_cache,
+        use_git=use_git,
+        readers=readers,
+        engine=engine,
+    )
+    if project is None:
+        raise typer.Exit(1)
+    from papyrus.serve import serve as serve_project  # noqa: PLC0415
+
+    try:
+        serve_project(project, host, port)
+    except KeyboardInterrupt:
+        logging.getLogger("papyrus").info("Stopped serving")
+    finally:
+        if project.cache:
+            project.cache.save()
+
+
+@app.command()
+def diff(  # noqa: PLR0913, PLR0917
+    old_spec: Annotated[
+        Path,
+        typer.Argument(
+            help="The previous document (YAML or JSON) to compare with",
+            exists=True,
+            dir_okay=False,
+        ),
+    ],
+    base_dir: BaseDirArgument = None,
+    routes_file: RoutesFileOption = "routes.py",
+    views_dir: ViewsDirOption = "views",
+    max_depth: MaxDepthOption = None,
+    use_cache: CacheOption = True,
+    clear_cache: ClearCacheOption = False,
+    use_git: GitOption = True,
+    jobs: JobsOption = 1,
+    readers: ReadersOption = 4,
+    engine: EngineOption = Engine.AST,
+    diff_format: Annotated[
+        DiffFormat,
+        typer.Option(
+            "--format",
+            "-f",
+            help="The format of the differences",
+            envvar="PAPYRUS_DIFF_FORMAT",
+        ),
+    ] = DiffFormat.TEXT,
+    verbose: VerboseOption = False,
+    log_level: LogLevelOption = "WARNING",
+) -> None:
+    """List the paths and operations that changed since OLD_SPEC.
+
+    Exits with 1 when anything changed, like diff.
+    """
+    setup_logging(level="DEBUG" if verbose else log_level)
+    try:
+        old_document = load_document(old_spec)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="OLD_SPEC") from e
+    project = load_project(
+        base_dir,
+        routes_file,
+        views_dir,
+        max_depth,
+        jobs,
+        use_cache=use_cache,
+        clear_cache=clear_cache,
+        use_git=use_git,
+        readers=readers,
+        engine=engine,
+    )
+    if project is None:
+        raise typer.Exit(2)
+    changes = diff_documents(old_document, project.openapi().to_dict())
+    sys.stdout.write(format_changes(changes, diff_format))
+    if changes:
+        raise typer.Exit(1)
+
+
+def load_project(  # noqa: PLR0913
+    base_dir: Path | None,
+    routes_file: str,
+    views_dir: str,
+    max_depth: int | None,
+    jobs: int,
+    *,
+    use_cache: bool,
+    clear_cache: bool,
+    use_git: bool,
+    readers: int,
+    engine: Engine,
+) -> "Project | None":
+    """Load the project in base_dir, or return None if it is not one."""
+    from papyrus.project import Project  # noqa: PLC0415
+
     logger = logging.getLogger("papyrus")
-    pyramid_info = PyramidInfo(routes_file_name=routes_file, views_dir_name=views_dir)
+    pyramid_info = PyramidInfo(
+        routes_file_name=routes_file, views_dir_name=views_dir, max_depth=max_depth
+    )
     base_dir = base_dir or Path.cwd()
+    cache_dir = base_dir / CACHE_DIR_NAME
+    if clear_cache:
+        ExtractionCache.clear(cache_dir)
+    cache = ExtractionCache.load(cache_dir) if use_cache else None
+    if cache and use_git:
+        cache.follow_git(base_dir)
 
-    if logger:
-        logger.info("Starting Papyrus...")
+    logger.info("Starting Papyrus...")
+    jobs = jobs or os.cpu_count() or 1
+    project = Project(
+        base_dir, pyramid_info, cache, jobs, readers=readers, engine=engine
+    )
     try:
-        routes = Parser.get_routes(base_dir, pyramid_info)
-    except RoutesFileNotFoundError as e:
+        project.load()
+    except (RoutesFileNotFoundError, ViewsDirNotFoundError) as e:
         logger.error(e)
-        return
-    except ViewsDirNotFoundError as e:
-        logger.error(e)
-        return
+        return None
+    if cache:
+        cache.save()
+    return project
 
-    filtered_routes = Parser.filter_routes_with_a_method(routes)
-    openapi = OpenAPI.from_routes(filtered_routes)
-    openapi_yaml = openapi.to_yaml()
 
-    try:
-        validate(yaml.safe_load(openapi_yaml))
-    except OpenAPISpecValidatorError as e:
-        logger.error(e)
-    except UnresolvableParameterError as e:
-        logger.info(e)
+def run_memo(base_dir: Path | None, params: dict[str, Any]) -> RunMemo:
+    """Return the memo of the runs of generate with the given parameters."""
+    options = {
+        name: str(value)
+        for name, value in sorted(params.items())
+        if name not in RUN_INDEPENDENT_OPTIONS
+    }
+    # Relative paths in the options and in the fingerprint depend on it.
+    options["cwd"] = str(Path.cwd())
+    return RunMemo((base_dir or Path.cwd()) / CACHE_DIR_NAME, options)
 
-    console.print(openapi_yaml)
+
+def build_document(
+    openapi: OpenAPI, validation: ValidationMode, *, components: bool
+) -> dict[str, Any] | None:
+    """Return the document to write and validate, None to write openapi itself.
+
+    Raises:
+        typer.Exit: When the document is validated strictly and is invalid.
+
+    """
+    # Without the whole document, the writer converts one path item at a time.
+    if not components and validation is ValidationMode.OFF:
+        return None
+    document = openapi.to_dict()
+    if components:
+        document = share_components(document)
+    if validation is ValidationMode.STRICT and not validate_document(document):
+        raise typer.Exit(1)
+    return document
+
+
+def make_shard_writer(
+    output: Path | None,
+    shards: Path | None,
+    output_format: OutputFormat,
+    depth: int,
+) -> "ShardWriter | None":
+    """Return the writer of output and of the shards of its paths, if sharded."""
+    if shards is None:
+        return None
+    if output is None:
+        msg = "--shards needs an --output file to refer to them"
+        raise typer.BadParameter(msg, param_hint="--shards")
+    from papyrus.sharding import ShardWriter  # noqa: PLC0415
+
+    return ShardWriter(output, shards, output_format, depth)
+
+
+def write_output(  # noqa: PLR0913, PLR0917
+    openapi: OpenAPI,
+    document: dict[str, Any] | None,
+    output: Path | None,
+    output_format: OutputFormat,
+    shard_writer: "ShardWriter | None" = None,
+    memo: RunMemo | None = None,
+) -> list[Path]:
+    """Write the document to output, or to stdout if output is None.
+
+    With a shard writer, the paths are written to their shards instead, and
+    with a memo, the document printed is kept for the next run to replay.
+
+    Returns:
+        The files written.
+
+    """
+    if output is None:
+        if memo is None:
+            openapi.write(sys.stdout, output_format, document)
+            return []
+        with memo.open_output() as f:
+            openapi.write(f, output_format, document)
+        memo.print_output(sys.stdout)
+        return [memo.output_file]
+    if shard_writer is not None:
+        shard_writer.write(openapi, document)
+        return shard_writer.files
+    with open_atomic(output) as f:
+        openapi.write(f, output_format, document)
+    return [output]
+
+
+def print_stats(stats_format: StatsFormat) -> None:
+    """Print the metrics recorded during the run to stderr."""
+    if stats_format is StatsFormat.JSON:
+        sys.stderr.write(registry.to_json())
+    else:
+        from rich.console import Console  # noqa: PLC0415
+
+        Console(stderr=True).print(registry.to_table())
+
+
+def run_watch(  # noqa: PLR0913
+    project: "Project",
+    openapi: OpenAPI,
+    output: Path,
+    output_format: OutputFormat,
+    *,
+    components: bool,
+    shard_writer: "ShardWriter | None",
+) -> None:
+    """Watch the project until interrupted, saving the cache on the way out."""
+    from papyrus.watch import watch as watch_project  # noqa: PLC0415
+
+    logger = logging.getLogger("papyrus")
+    try:
+        watch_project(
+            project,
+            openapi,
+            output,
+            output_format,
+            components=components,
+            shard_writer=shard_writer,
+        )
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+    finally:
+        if project.cache:
+            project.cache.save()
 
 
 if __name__ == "__main__":
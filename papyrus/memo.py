@@ -0,0 +1,127 @@
+"""Module replaying the output of a run whose inputs did not change."""
+
+import contextlib
+import json
+import logging
+import shutil
+from collections.abc import Generator, Iterable, Mapping
+from pathlib import Path
+from typing import IO
+
+from papyrus.cache import cache_version
+from papyrus.writing import open_atomic, write_atomic
+
+logger = logging.getLogger(__name__)
+
+RUN_FILE_NAME = "run.json"
+# The document the last run printed to stdout.
+OUTPUT_FILE_NAME = "output"
+
+
+def stat_paths(paths: Iterable[str | Path]) -> dict[str, list[int]]:
+    """Map each path to its size and modification time (in ns), [] if missing."""
+    stats: dict[str, list[int]] = {}
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            stats[str(path)] = []
+            continue
+        stats[str(path)] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+class RunMemo:
+    """Fingerprint of the last successful run, with the document it printed.
+
+    The fingerprint holds the options of the run, the papyrus version, and the
+    size and modification time of every file and directory the run read or
+    wrote. A run with the same fingerprint would write the same document, so
+    it is replayed instead: the document printed to stdout is copied from the
+    cache and the files written are left alone. Checking the fingerprint costs
+    a stat per path, without walking, parsing or importing the modules that do.
+    """
+
+    def __init__(self, cache_dir: Path, options: Mapping[str, str]) -> None:
+        """Initialize the memo of the runs with the given options.
+
+        Args:
+            cache_dir: The directory the fingerprint and the document are kept in.
+            options: The options the document depends on, by name.
+
+        """
+        self.cache_dir = cache_dir
+        self.options = {**options, "version": cache_version()}
+
+    @property
+    def run_file(self) -> Path:
+        """Return the file holding the fingerprint of the last run."""
+        return self.cache_dir / RUN_FILE_NAME
+
+    @property
+    def output_file(self) -> Path:
+        """Return the file holding the document the last run printed."""
+        return self.cache_dir / OUTPUT_FILE_NAME
+
+    def replay(self, stdout: IO[str] | None = None) -> bool:
+        """Replay the last run if nothing it depends on changed.
+
+        Otherwise its fingerprint is forgotten, so an interrupted or failed run
+        is never replayed.
+
+        Args:
+            stdout: The stream to print the document to, None when the run
+                writes it to files.
+
+        Returns:
+            Whether the last run was replayed.
+
+        """
+        try:
+            run = json.loads(self.run_file.read_bytes())
+        except (OSError, ValueError):
+            return False
+        paths = run.get("paths") if isinstance(run, dict) else None
+        if (
+            not isinstance(paths, dict)
+            or run.get("options") != self.options
+            or stat_paths(paths) != paths
+        ):
+            self.forget()
+            return False
+        if stdout is not None:
+            self.print_output(stdout)
+        logger.info("Nothing changed since the last run, reusing its output")
+        return True
+
+    def print_output(self, stdout: IO[str]) -> None:
+        """Copy the document kept for stdout to stdout."""
+        with self.output_file.open() as f:
+            shutil.copyfileobj(f, stdout)
+
+    @contextlib.contextmanager
+    def open_output(self) -> Generator[IO[str]]:
+        """Open the file keeping the document printed, see open_atomic."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open_atomic(self.output_file) as f:
+            yield f
+
+    def record(self, paths: Iterable[Path]) -> None:
+        """Record the fingerprint of a successful run.
+
+        Args:
+            paths: The files and directories the run read, and the files it
+                wrote, the document kept for stdout included.
+
+        """
+        run = {"options": self.options, "paths": stat_paths(paths)}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.run_file, json.dumps(run))
+        except OSError as e:
+            logger.warning("Could not record the run: %s", e)
+
+    def forget(self) -> None:
+        """Forget the fingerprint of the last run."""
+        with contextlib.suppress(OSError):
+            self.run_file.unlink(missing_ok=True)
@@ -0,0 +1,113 @@
+"""In-process registry of the execution times recorded by log_time."""
+
+import json
+import math
+from collections import defaultdict
+from enum import StrEnum
+from typing import TYPE_CHECKING, TypedDict
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+
+class StatsFormat(StrEnum):
+    """Formats the metrics summary can be printed in."""
+
+    TABLE = "table"
+    JSON = "json"
+
+
+class MetricSummary(TypedDict):
+    """Summary of the execution times of one function, in seconds."""
+
+    name: str
+    count: int
+    total: float
+    p50: float
+    p95: float
+    max: float
+
+
+def percentile(sorted_samples: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of already sorted samples."""
+    rank = max(math.ceil(fraction * len(sorted_samples)), 1)
+    return sorted_samples[rank - 1]
+
+
+class MetricsRegistry:
+    """Execution times of the functions decorated with log_time, by name.
+
+    Nothing is recorded until the registry is enabled.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a disabled, empty registry."""
+        self.enabled = False
+        self._samples: defaultdict[str, list[float]] = defaultdict(list)
+
+    def reset(self, enabled: bool = False) -> None:
+        """Drop every sample and enable or disable recording.
+
+        Also used as the initializer of worker processes, which may inherit the
+        samples of their parent.
+        """
+        self.enabled = enabled
+        self._samples.clear()
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record one execution of name."""
+        self._samples[name].append(seconds)
+
+    def drain(self) -> dict[str, list[float]]:
+        """Remove and return every sample, e.g. to send them to another process."""
+        samples = dict(self._samples)
+        self._samples.clear()
+        return samples
+
+    def merge(self, samples: dict[str, list[float]]) -> None:
+        """Add samples drained from another registry."""
+        for name, seconds in samples.items():
+            self._samples[name].extend(seconds)
+
+    def summary(self) -> list[MetricSummary]:
+        """Summarize the samples of every function, slowest in total first."""
+        summaries = []
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            summaries.append(
+                MetricSummary(
+                    name=name,
+                    count=len(ordered),
+                    total=math.fsum(ordered),
+                    p50=percentile(ordered, 0.5),
+                    p95=percentile(ordered, 0.95),
+                    max=ordered[-1],
+                )
+            )
+        return sorted(summaries, key=lambda summary: summary["total"], reverse=True)
+
+    def to_json(self) -> str:
+        """Return the summary as a JSON string."""
+        return json.dumps(self.summary(), indent=2) + "\n"
+
+    def to_table(self) -> "Table":
+        """Return the summary as a rich table, with times in milliseconds."""
+        from rich.table import Table  # noqa: PLC0415
+
+        table = Table(title="Papyrus stats")
+        table.add_column("Function", overflow="fold")
+        for column in ("Calls", "Total (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)"):
+            table.add_column(column, justify="right")
+        for summary in self.summary():
+            table.add_row(
+                summary["name"],
+                f"{summary['count']}",
+                f"{summary['total'] * 1000:.3f}",
+                f"{summary['p50'] * 1000:.3f}",
+                f"{summary['p95'] * 1000:.3f}",
+                f"{summary['max'] * 1000:.3f}",
+            )
+        return table
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,37 @@
+"""Module locating the files of the python modules of a project."""
+
+from pathlib import Path
+
+
+def package_root(module_file: Path) -> Path:
+    """Return the directory holding the top-level package of module_file."""
+    directory = module_file.parent
+    while (directory / "__init__.py").is_file():
+        directory = directory.parent
+    return directory
+
+
+def find_module(module: str, importing_file: Path, base_dir: Path) -> Path | None:
+    """Return the file of module, as imported or included from importing_file.
+
+    Relative names are resolved from the package of importing_file. Absolute
+    names are searched from the directory holding its top-level package, then
+    from base_dir.
+    """
+    relative_name = module.lstrip(".")
+    if level := len(module) - len(relative_name):
+        if level > len(importing_file.parents):
+            return None
+        roots = [importing_file.parents[level - 1]]
+    else:
+        roots = [package_root(importing_file), base_dir]
+    parts = relative_name.split(".") if relative_name else []
+    for root in roots:
+        candidate = root.joinpath(*parts)
+        module_files = [candidate / "__init__.py"]
+        if parts:
+            module_files.insert(0, candidate.parent / f"{candidate.name}.py")
+        for module_file in module_files:
+            if module_file.is_file():
+                return module_file
+    return None
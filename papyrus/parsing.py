@@ -1,134 +1,681 @@
 """Module responsible for parsing information in a pyramid application."""
 
 import ast
+import functools
+import heapq
 import logging
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from collections.abc import Generator
+from collections import defaultdict, deque
+from collections.abc import Callable, Generator, Iterable
+from contextlib import ExitStack
+from dataclasses import dataclass
+from enum import IntEnum
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from papyrus.finder import Finder
+from papyrus.cache import ExtractionCache, content_hash, stat_key
+from papyrus.finder import Discovery, DiscoveryStream
+from papyrus.includes import IncludeGraph
 from papyrus.log import log_time
-from papyrus.pyramid import PyramidFiles, PyramidInfo, Route
+from papyrus.metrics import registry
+from papyrus.prefilter import Prefilter
+from papyrus.pyramid import (
+    FileFacts,
+    ModuleSymbols,
+    PyramidFiles,
+    PyramidInfo,
+    Route,
+    Symbol,
+    Value,
+)
+from papyrus.scanning import Engine, scan_facts
+from papyrus.symbols import SymbolIndex, module_symbols, node_value
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Below these sizes starting a process pool costs more than parsing serially.
+MIN_PARALLEL_FILES = 32
+MIN_PARALLEL_BYTES = 1_000_000
+CHUNKS_PER_JOB = 4
+# Once the pool runs, files are sent to it in chunks of about this many bytes.
+CHUNK_BYTES = 250_000
+# Threads reading sources ahead of the parser, and reads queued per thread.
+DEFAULT_READERS = 4
+READS_PER_READER = 2
+
+# The contents of a file, None when the prefilter ruled it out, and its size.
+type Scan = tuple[bytes | None, int]
+# A file to parse in a worker process: its path, stat key and contents.
+type SourceFile = tuple[Path, tuple[int, int], bytes]
+# The facts of a chunk of files, with the prefilter and metrics of its worker.
+type ChunkFacts = tuple[
+    list[tuple[Path, tuple[int, int], str, FileFacts]],
+    Prefilter,
+    dict[str, list[float]],
+]
+
+# Fields holding the nested statements of statements, in ast._fields order.
+STATEMENT_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+
+
+class Scope(IntEnum):
+    """How much of an AST a traversal visits, from narrowest to widest."""
+
+    DEFINITIONS = 1
+    """Statements of module and class bodies, without entering function bodies."""
+    STATEMENTS = 2
+    """Every statement, plus the value of expression statements."""
+    EXPRESSIONS = 3
+    """Every node."""
+
 
 class Parser:
     """Class responsible for parsing information in a pyramid application."""
 
     @staticmethod
     @log_time(logger)
-    def get_routes(base_dir: Path, pyramid_info: PyramidInfo) -> list[Route]:
+    def get_routes(
+        base_dir: Path,
+        pyramid_info: PyramidInfo,
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+        engine: Engine = Engine.AST,
+    ) -> list[Route]:
         """Get all routes from a pyramid application.
 
         Args:
             base_dir: The base directory of the pyramid application.
             pyramid_info: Information about the pyramid application.
+            cache: Cache of previously extracted file facts.
+            jobs: The number of processes used to parse the views files.
+            engine: How the facts of the files are extracted.
 
         Returns:
             A list of Route objects.
 
         """
-        routes = Parser.get_routes_pattern(base_dir, pyramid_info.routes_file_name)
-        views = Parser.get_routes_methods(base_dir, pyramid_info.views_dir_name)
+        return list(Parser.iter_routes(base_dir, pyramid_info, cache, jobs, engine))
 
-        return [
-            Route(route_name, route_pattern, views[route_name])
-            for route_name, route_pattern in routes.items()
-        ]
+    @staticmethod
+    def iter_routes(
+        base_dir: Path,
+        pyramid_info: PyramidInfo,
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+        engine: Engine = Engine.AST,
+    ) -> Generator[Route]:
+        """Yield the routes of a pyramid application, see Parser.get_routes.
+
+        The views files are extracted while the discovery walk finds them, and
+        only the methods of each route are kept from their facts.
+        """
+        stream = PyramidFiles.stream(base_dir, pyramid_info)
+        symbols = Parser.symbol_index(base_dir, cache)
+        views = Parser.collect_methods(
+            Parser.iter_files_facts(stream, cache, jobs, engine=engine), symbols
+        )
+        discovery = stream.discovery()
+        routes = Parser.get_routes_pattern(
+            base_dir, pyramid_info.routes_file_name, discovery, cache, engine, symbols
+        )
+        PyramidFiles.get_views_path(base_dir, pyramid_info.views_dir_name, discovery)
+        for route_name, route_pattern in routes.items():
+            yield Route(route_name, route_pattern, views[route_name])
 
     @staticmethod
-    @log_time(logger)
-    def filter_routes_with_a_method(routes: list[Route]) -> list[Route]:
+    def filter_routes_with_a_method(routes: Iterable[Route]) -> Generator[Route]:
         """Filter routes that have at least one method."""
-        return [route for route in routes if route.methods]
+        return (route for route in routes if route.methods)
 
     @staticmethod
     @log_time(logger)
-    def get_routes_pattern(base_dir: Path, file_name: str) -> dict[str, str]:
+    def get_routes_pattern(  # noqa: PLR0913, PLR0917
+        base_dir: Path,
+        file_name: str,
+        discovery: Discovery | None = None,
+        cache: ExtractionCache | None = None,
+        engine: Engine = Engine.AST,
+        symbols: SymbolIndex | None = None,
+    ) -> dict[str, str]:
         """Get all routes from a pyramid application.
 
+        Starting from the routes file, the modules it includes with
+        config.include are followed, applying their route prefixes.
+
         Args:
             base_dir: The base directory of the pyramid application.
             file_name: The name of the routes file.
+            discovery: A previous discovery of base_dir, searched for if omitted.
+            cache: Cache of previously extracted file facts.
+            engine: How the facts of the files are extracted.
+            symbols: The index resolving constants, created if omitted.
 
         Returns:
             A dictionary with the route name as the key and pattern as the value.
 
         """
-        routes_file = PyramidFiles.get_routes_path(base_dir, file_name)
-
-        routes = {}
-        crawler = AstCrawler(routes_file)
-        for route_call in crawler.iter_calls([AstFilterMethodCall("add_route")]):
-            route_name, route_pattern = Parser.route_call_to_route_name_and_pattern(
-                route_call
-            )
-            if route_name and route_pattern:
-                routes[route_name] = (
-                    route_pattern
-                    if route_pattern.startswith("/")
-                    else f"/{route_pattern}"
-                )
-
-        return routes
+        routes_file = PyramidFiles.get_routes_path(base_dir, file_name, discovery)
+        get_facts = functools.partial(Parser.get_file_facts, cache=cache, engine=engine)
+        symbols = symbols or Parser.symbol_index(base_dir, cache)
+        return IncludeGraph(routes_file, base_dir, get_facts, symbols).routes()
 
     @staticmethod
     @log_time(logger)
-    def get_routes_methods(base_dir: Path, views_dir: str) -> dict[str, set[str]]:
+    def get_routes_methods(
+        base_dir: Path,
+        views_dir: str,
+        discovery: Discovery | None = None,
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+    ) -> dict[str, set[str]]:
         """Get all routes request methods from a pyramid application.
 
         Args:
             base_dir: The base directory of the pyramid application.
             views_dir: The name of the views directory.
+            discovery: A previous discovery of base_dir, searched for if omitted.
+            cache: Cache of previously extracted file facts.
+            jobs: The number of processes used to parse the views files.
 
         Returns:
             A dictionary with the route name as the key and a set of route methods.
 
         """
-        routes = defaultdict(set)
-        views_path = PyramidFiles.get_views_path(base_dir, views_dir)
-        views_files = Finder.find_all_files(views_path, ".py")
-        for views_file in views_files:
-            crawler = AstCrawler(views_file)
-            for view_call in crawler.iter_decorators_named("view_config"):
-                route_name, route_method = Parser.view_call_to_route_name_and_method(
-                    view_call
-                )
-                if route_name and route_method:
-                    routes[route_name].add(route_method)
+        symbols = Parser.symbol_index(base_dir, cache)
+        if discovery is not None:
+            PyramidFiles.get_views_path(base_dir, views_dir, discovery)
+            return Parser.collect_methods(
+                Parser.iter_files_facts(discovery.views_files, cache, jobs), symbols
+            )
+        stream = DiscoveryStream(base_dir, dir_name=views_dir)
+        routes = Parser.collect_methods(
+            Parser.iter_files_facts(stream, cache, jobs), symbols
+        )
+        PyramidFiles.get_views_path(base_dir, views_dir, stream.discovery())
         return routes
 
+    @staticmethod
+    def collect_methods(
+        files_facts: Iterable[tuple[Path, FileFacts]],
+        symbols: SymbolIndex | None = None,
+    ) -> dict[str, set[str]]:
+        """Fold the views of the files into the request methods of each route.
+
+        Views referring to constants are resolved with symbols, or skipped
+        without it.
+        """
+        routes: defaultdict[str, set[str]] = defaultdict(set)
+        for path, facts in files_facts:
+            views = (
+                symbols.resolve(path, facts, facts.views)
+                if symbols is not None
+                else Parser.literal_pairs(facts.views)
+            )
+            for route_name, route_method in views:
+                routes[route_name].add(route_method)
+        return routes
+
+    @staticmethod
+    def literal_pairs(
+        pairs: Iterable[tuple[Value, Value]],
+    ) -> Generator[tuple[str, str]]:
+        """Yield the pairs holding strings only."""
+        for first, second in pairs:
+            if isinstance(first, str) and isinstance(second, str):
+                yield first, second
+
+    @staticmethod
+    def symbol_index(
+        base_dir: Path, cache: ExtractionCache | None = None
+    ) -> SymbolIndex:
+        """Return an index of the constants of a project, read through cache."""
+        return SymbolIndex(
+            base_dir, functools.partial(Parser.get_module_symbols, cache=cache)
+        )
+
+    @staticmethod
+    def get_module_symbols(
+        python_file: Path, cache: ExtractionCache | None = None
+    ) -> ModuleSymbols:
+        """Get the string constants and imports of a python module.
+
+        Facts only hold symbols when the file needs them, so the symbols of the
+        other modules are extracted on demand and cached with their facts.
+        """
+        try:
+            key = stat_key(python_file)
+            facts = cache.get(python_file, key) if cache is not None else None
+            if facts is not None and facts.symbols is not None:
+                return facts.symbols
+            source = python_file.read_bytes()
+            facts = Parser.extract_facts(source, symbols=True)
+        except (OSError, SyntaxError, ValueError) as e:
+            logger.warning("Could not read the constants of %s: %s", python_file, e)
+            return ModuleSymbols()
+        if cache is not None:
+            cache.put(python_file, key, content_hash(source), facts)
+        return facts.symbols or ModuleSymbols()
+
+    @staticmethod
+    @log_time(logger)
+    def get_files_facts(
+        python_files: Iterable[Path],
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+        readers: int = DEFAULT_READERS,
+        engine: Engine = Engine.AST,
+    ) -> dict[Path, FileFacts]:
+        """Get the facts of many python files, see Parser.iter_files_facts.
+
+        Returns:
+            A dictionary with the facts of each file.
+
+        """
+        return dict(Parser.iter_files_facts(python_files, cache, jobs, readers, engine))
+
+    @staticmethod
+    def iter_files_facts(
+        python_files: Iterable[Path],
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+        readers: int = DEFAULT_READERS,
+        engine: Engine = Engine.AST,
+    ) -> Generator[tuple[Path, FileFacts]]:
+        """Yield the facts of many python files, in parallel when it pays off.
+
+        python_files is consumed lazily and the facts are yielded in its order
+        as soon as they are known, see FactsStream.
+
+        Args:
+            python_files: The python files to get the facts of.
+            cache: Cache of previously extracted file facts.
+            jobs: The maximum number of processes to parse with.
+            readers: The number of threads reading the files, 0 to read them on
+                the main thread.
+            engine: How the facts of the files are extracted.
+
+        Yields:
+            Each file with its facts.
+
+        """
+        return FactsStream(cache, jobs, readers, engine).extract(python_files)
+
+    @staticmethod
+    def should_parallelize(n_files: int, n_bytes: int, jobs: int) -> bool:
+        """Whether parsing the files in a process pool is worth its startup cost."""
+        return (
+            jobs > 1 and n_files >= MIN_PARALLEL_FILES and n_bytes >= MIN_PARALLEL_BYTES
+        )
+
+    @staticmethod
+    def get_file_facts(
+        python_file: Path,
+        cache: ExtractionCache | None = None,
+        prefilter: Prefilter | None = None,
+        engine: Engine = Engine.AST,
+    ) -> FileFacts:
+        """Get the facts of a python file, from the cache when it is unchanged.
+
+        Files the prefilter rules out are never decoded or parsed.
+        """
+        prefilter = prefilter or Prefilter()
+        extract = functools.partial(prefilter.timed, Parser.extractor(engine))
+        if cache is not None:
+            return cache.get_or_extract(python_file, extract, prefilter.read)
+        source = prefilter.read(python_file)
+        return FileFacts() if source is None else extract(source)
+
+    @staticmethod
+    def extractor(engine: Engine) -> Callable[[str | bytes], FileFacts]:
+        """Return the function extracting the facts of a source with engine."""
+        if engine is Engine.FAST:
+            return Parser.extract_facts_fast
+        return Parser.extract_facts
+
+    @staticmethod
+    def extract_facts_fast(source: str | bytes) -> FileFacts:
+        """Extract the facts of python source from its tokens, see TokenScanner.
+
+        Sources the tokens are not enough for are parsed by extract_facts.
+        """
+        facts = scan_facts(source)
+        return Parser.extract_facts(source) if facts is None else facts
+
+    @staticmethod
+    def extract_facts(source: str | bytes, *, symbols: bool = False) -> FileFacts:
+        """Extract the add_route and view_config arguments from python source.
+
+        Args:
+            source: The python source code to parse.
+            symbols: Whether to extract the symbols of the module even if no
+                route or view refers to a constant.
+
+        Returns:
+            The route name and pattern of every add_route call, the module and
+            route prefix of every config.include call, the route name and
+            request method of every view_config decorator, and the symbols of
+            the module when needed.
+
+        """
+        route_calls = CallExtractor(
+            [AstFilterMethodCall("add_route")], scope=Scope.STATEMENTS
+        )
+        include_calls = CallExtractor(
+            [AstFilterMethodCall("include")], scope=Scope.STATEMENTS
+        )
+        view_calls = DecoratorExtractor("view_config")
+        crawler = AstCrawler(source)
+        crawler.visit(route_calls, include_calls, view_calls)
+        routes = []
+        includes = []
+        # In source order, which is the order pyramid adds routes in.
+        calls = sorted(
+            [(call, True) for call in route_calls.calls]
+            + [(call, False) for call in include_calls.calls],
+            key=lambda item: (item[0].lineno, item[0].col_offset),
+        )
+        for call, is_route in calls:
+            if is_route:
+                route_name, route_pattern = Parser.route_call_to_route_name_and_pattern(
+                    call
+                )
+                if route_name and route_pattern:
+                    routes.append((route_name, route_pattern))
+                continue
+            module, route_prefix = Parser.include_call_to_module_and_prefix(call)
+            if module:
+                includes.append((module, route_prefix, len(routes)))
+        views = []
+        for view_call in view_calls.calls:
+            route_name, route_method = Parser.view_call_to_route_name_and_method(
+                view_call
+            )
+            if route_name and route_method:
+                views.append((route_name, route_method))
+        if not symbols:
+            symbols = any(
+                isinstance(value, Symbol) for pair in routes + views for value in pair
+            )
+        return FileFacts(
+            routes=tuple(routes),
+            views=tuple(views),
+            includes=tuple(includes),
+            symbols=module_symbols(crawler.tree) if symbols else None,
+        )
+
     @staticmethod
     @log_time(logger)
     def route_call_to_route_name_and_pattern(
         route_call: ast.Call,
-    ) -> tuple[str | None, str | None]:
-        """Get the route name and pattern from an add_route call."""
+    ) -> tuple[Value | None, Value | None]:
+        """Get the route name and pattern, or the names of their constants."""
         expected_length = 2
         if len(route_call.args) < expected_length:
             logger.warning("Skipping route call: %s", route_call)
             return None, None
         route_name, route_pattern = route_call.args[:expected_length]
-        return getattr(route_name, "value", None), getattr(route_pattern, "value", None)
+        return node_value(route_name), node_value(route_pattern)
+
+    @staticmethod
+    @log_time(logger)
+    def include_call_to_module_and_prefix(
+        include_call: ast.Call,
+    ) -> tuple[str | None, str]:
+        """Get the module and route prefix from a config.include call."""
+        if not include_call.args:
+            logger.warning("Skipping include call: %s", include_call)
+            return None, ""
+        keywords = {k.arg: k.value for k in include_call.keywords}
+        route_prefix = keywords.get("route_prefix")
+        if route_prefix is None and len(include_call.args) > 1:
+            route_prefix = include_call.args[1]
+        module = getattr(include_call.args[0], "value", None)
+        prefix = getattr(route_prefix, "value", None)
+        return (
+            module if isinstance(module, str) else None,
+            prefix if isinstance(prefix, str) else "",
+        )
 
     @staticmethod
     @log_time(logger)
     def view_call_to_route_name_and_method(
         view_call: ast.Call,
-    ) -> tuple[str | None, str | None]:
-        """Get the view name and method from a decorator call."""
+    ) -> tuple[Value | None, Value | None]:
+        """Get the view name and method, or the names of their constants."""
         expected_length = 2
         if len(view_call.keywords) < expected_length:
             logger.warning("Skipping view call: %s", view_call)
             return None, None
         keywords = {k.arg: k.value for k in view_call.keywords}
-        route_name = getattr(keywords.get("route_name"), "value", None)
-        request_method = getattr(keywords.get("request_method"), "value", None)
+        route_name = node_value(keywords.get("route_name"))
+        request_method = node_value(keywords.get("request_method"))
         return route_name, request_method
 
 
+@dataclass(slots=True)
+class StreamedFile:
+    """A file going through a FactsStream, with its facts once they are known."""
+
+    path: Path
+    facts: FileFacts | None = None
+
+
+class FactsStream:
+    """Extraction of the facts of python files while they are being found.
+
+    Files missing from the cache are read by a pool of reader threads, so on
+    slow filesystems the reads of several files overlap, with at most
+    readers * READS_PER_READER reads queued ahead of the parser. Each file is
+    parsed on the main thread as soon as its contents arrive, unless jobs > 1
+    and there are enough of them for a process pool to pay off: they are then
+    held back until the pool starts, and sent to it in chunks of about
+    CHUNK_BYTES, with at most jobs * CHUNKS_PER_JOB chunks in flight. Only the
+    files in flight, and the ones waiting for an earlier file to be done, are
+    held in memory.
+    """
+
+    def __init__(
+        self,
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+        readers: int = DEFAULT_READERS,
+        engine: Engine = Engine.AST,
+    ) -> None:
+        """Initialize the stream, see Parser.iter_files_facts for the arguments."""
+        self.cache = cache
+        self.jobs = jobs
+        self.readers = readers
+        self.engine = engine
+        self.prefilter = Prefilter()
+        # Files not yielded yet, in input order.
+        self._order: deque[StreamedFile] = deque()
+        # Reads in flight, in input order.
+        self._reads: deque[tuple[StreamedFile, tuple[int, int], Future[Scan]]] = deque()
+        self._reader: ThreadPoolExecutor | None = None
+        # Files waiting to be sent to the pool.
+        self._pending: list[tuple[StreamedFile, SourceFile]] = []
+        self._pending_bytes = 0
+        self._in_flight: deque[tuple[list[StreamedFile], Future[ChunkFacts]]] = deque()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def extract(
+        self, python_files: Iterable[Path]
+    ) -> Generator[tuple[Path, FileFacts]]:
+        """Yield each file of python_files with its facts, in the same order."""
+        with ExitStack() as stack:
+            for python_file in python_files:
+                streamed = StreamedFile(python_file)
+                self._order.append(streamed)
+                key = stat_key(python_file)
+                streamed.facts = (
+                    self.cache.get(python_file, key) if self.cache else None
+                )
+                if streamed.facts is None and self.readers > 0:
+                    if self._reader is None:
+                        self._reader = stack.enter_context(read_pool(self.readers))
+                    future = self._reader.submit(self.prefilter.scan, python_file)
+                    self._reads.append((streamed, key, future))
+                elif streamed.facts is None:
+                    self._add(stack, streamed, key, self.prefilter.scan(python_file))
+                self._take_reads(stack, self.readers * READS_PER_READER)
+                self._collect(self.jobs * CHUNKS_PER_JOB)
+                yield from self._drain()
+
+            self._take_reads(stack, 0)
+            if self._executor is None:
+                for streamed, (python_file, key, source) in self._pending:
+                    streamed.facts = self._extract(python_file, key, source)
+            elif self._pending:
+                self._submit(self._executor)
+            self._collect(0)
+            yield from self._drain()
+        self.prefilter.log_summary()
+
+    def _take_reads(self, stack: ExitStack, limit: int) -> None:
+        """Pass on the finished reads, waiting while more than limit are queued."""
+        while self._reads and (self._reads[0][2].done() or len(self._reads) > limit):
+            streamed, key, future = self._reads.popleft()
+            self._add(stack, streamed, key, future.result())
+
+    def _add(
+        self, stack: ExitStack, streamed: StreamedFile, key: tuple[int, int], scan: Scan
+    ) -> None:
+        """Parse a file that was read, or hold it back for the process pool."""
+        source = self.prefilter.count(*scan)
+        if source is None or self.jobs <= 1:
+            streamed.facts = self._extract(streamed.path, key, source)
+            return
+        self._pending.append((streamed, (streamed.path, key, source)))
+        self._pending_bytes += len(source)
+        if self._executor is None and Parser.should_parallelize(
+            len(self._pending), self._pending_bytes, self.jobs
+        ):
+            logger.debug("Parsing files in %d processes", self.jobs)
+            self._executor = stack.enter_context(process_pool(self.jobs))
+            self._submit(self._executor)
+        elif self._executor and self._pending_bytes >= CHUNK_BYTES:
+            self._submit(self._executor)
+
+    def _extract(
+        self, python_file: Path, key: tuple[int, int], source: bytes | None
+    ) -> FileFacts:
+        """Extract the facts of a file on the main thread."""
+        extract = functools.partial(self.prefilter.timed, Parser.extractor(self.engine))
+        if self.cache is not None:
+            return self.cache.extract(python_file, key, source, extract)
+        return FileFacts() if source is None else extract(source)
+
+    def _submit(self, executor: "ProcessPoolExecutor") -> None:
+        """Send the pending files to the pool, in chunks balanced by size."""
+        sizes = {i: len(item[1][2]) for i, item in enumerate(self._pending)}
+        for chunk in size_balanced_chunks(sizes, self.jobs):
+            streamed = [self._pending[i][0] for i in chunk]
+            files = [self._pending[i][1] for i in chunk]
+            future = executor.submit(extract_chunk, files, self.engine)
+            self._in_flight.append((streamed, future))
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _collect(self, limit: int) -> None:
+        """Record the finished chunks, waiting while more than limit are in flight."""
+        while self._in_flight and (
+            self._in_flight[0][1].done() or len(self._in_flight) > limit
+        ):
+            streamed_files, future = self._in_flight.popleft()
+            chunk_facts, chunk_prefilter, samples = future.result()
+            self.prefilter.merge(chunk_prefilter)
+            registry.merge(samples)
+            for streamed, (python_file, key, digest, facts) in zip(
+                streamed_files, chunk_facts, strict=True
+            ):
+                if (
+                    self.cache
+                    and self.cache.get_by_digest(python_file, key, digest) is None
+                ):
+                    self.cache.put(python_file, key, digest, facts)
+                streamed.facts = facts
+
+    def _drain(self) -> Generator[tuple[Path, FileFacts]]:
+        """Yield the files whose facts, and those of the files before, are known."""
+        while self._order and (facts := self._order[0].facts) is not None:
+            yield self._order.popleft().path, facts
+
+
+def size_balanced_chunks[K](file_sizes: dict[K, int], n_chunks: int) -> list[list[K]]:
+    """Split files into chunks of about the same total size, largest first.
+
+    Files are assigned largest first to the currently smallest chunk, and the
+    chunks are returned largest first so the slowest work is scheduled first.
+
+    Args:
+        file_sizes: The size in bytes of each file.
+        n_chunks: The maximum number of chunks to make.
+
+    Returns:
+        The non-empty chunks, ordered by decreasing total size.
+
+    """
+    heap: list[tuple[int, int]] = [(0, i) for i in range(max(n_chunks, 1))]
+    chunks: list[list[K]] = [[] for _ in heap]
+    totals = [0] * len(heap)
+    for python_file, size in sorted(
+        file_sizes.items(), key=lambda item: item[1], reverse=True
+    ):
+        total, index = heapq.heappop(heap)
+        chunks[index].append(python_file)
+        totals[index] = total + size
+        heapq.heappush(heap, (totals[index], index))
+    order = sorted(range(len(chunks)), key=lambda i: totals[i], reverse=True)
+    return [chunks[i] for i in order if chunks[i]]
+
+
+def process_pool(jobs: int) -> "ProcessPoolExecutor":
+    """Return a process pool parsing files with the metrics settings of the parent."""
+    # multiprocessing is only imported when files are parsed in parallel.
+    import multiprocessing  # noqa: PLC0415
+    from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
+
+    # Forking while the reader threads run could deadlock the workers.
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context(method),
+        initializer=reset_worker_metrics,
+        initargs=(registry.enabled,),
+    )
+
+
+def reset_worker_metrics(enabled: bool) -> None:
+    """Start recording metrics in a worker process if the parent does."""
+    registry.reset(enabled=enabled)
+
+
+def read_pool(readers: int) -> "ThreadPoolExecutor":
+    """Return a thread pool reading the sources ahead of the parser."""
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    return ThreadPoolExecutor(max_workers=readers, thread_name_prefix="papyrus-read")
+
+
+def extract_chunk(source_files: list[SourceFile], engine: Engine) -> ChunkFacts:
+    """Extract the facts of a chunk of files, run inside the worker processes.
+
+    Only the small extracted facts are sent back, together with the stat key and
+    content hash the parent process needs to update the cache, and the worker's
+    prefilter counters and metrics.
+    """
+    prefilter = Prefilter()
+    results = []
+    for python_file, key, source in source_files:
+        facts = prefilter.timed(Parser.extractor(engine), source)
+        results.append((python_file, key, content_hash(source), facts))
+    return results, prefilter, registry.drain()
+
+
 class AstFilter(ABC):
     """Abstract base class for AST filters."""
 
@@ -140,15 +687,15 @@ class AstFilter(ABC):
 class AstCrawler:
     """Class responsible for crawling the AST of a pyramid application."""
 
-    def __init__(self, python_code: str | Path | ast.AST) -> None:
+    def __init__(self, python_code: str | bytes | Path | ast.AST) -> None:
         """Initialize the AST crawler with a file path.
 
         Args:
-            python_code: The Python code to parse. Can be a string, a path to a file,
-                or an AST.
+            python_code: The Python code to parse. Can be a string, raw bytes, a
+                path to a file, or an AST.
 
         """
-        if isinstance(python_code, str):
+        if isinstance(python_code, str | bytes):
             self.tree = ast.parse(python_code)
         elif isinstance(python_code, Path):
             self.tree = ast.parse(python_code.read_text())
@@ -158,7 +705,59 @@ class AstCrawler:
             msg = "Invalid python_code"
             raise ValueError(msg)
 
+    @staticmethod
+    def iter_nodes(
+        tree: ast.AST, scope: Scope = Scope.EXPRESSIONS
+    ) -> Generator[ast.AST]:
+        """Yield the nodes of tree within scope, breadth-first like ast.walk.
+
+        Narrower scopes never enter expressions (and, for Scope.DEFINITIONS,
+        function bodies), which hold most of the nodes of a typical file.
+        """
+        if scope is Scope.EXPRESSIONS:
+            yield from ast.walk(tree)
+            return
+        todo = deque([tree])
+        while todo:
+            node = todo.popleft()
+            yield node
+            if isinstance(node, ast.expr) or (
+                scope is Scope.DEFINITIONS
+                and isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef)
+            ):
+                continue
+            if isinstance(node, ast.Expr):
+                if scope is Scope.STATEMENTS:
+                    todo.append(node.value)
+                continue
+            for field in STATEMENT_FIELDS:
+                todo.extend(getattr(node, field, ()))
+
     @log_time(logger)
+    def visit(self, *extractors: "AstExtractor", tree: ast.AST | None = None) -> None:
+        """Run every extractor over the AST in a single traversal.
+
+        Each node is dispatched by its type to the extractors registered for it,
+        so adding extractors does not add traversals. The traversal only covers
+        the widest scope any extractor asks for.
+
+        Args:
+            extractors: The extractors to feed the nodes to.
+            tree: The AST to traverse. If not provided, the AST of the file will
+                be used.
+
+        """
+        dispatch: dict[type[ast.AST], list[AstExtractor]] = defaultdict(list)
+        for extractor in extractors:
+            for node_type in extractor.node_types:
+                dispatch[node_type].append(extractor)
+        scope = max(
+            (extractor.scope for extractor in extractors), default=Scope.DEFINITIONS
+        )
+        for node in AstCrawler.iter_nodes(tree or self.tree, scope):
+            for extractor in dispatch.get(type(node), ()):
+                extractor(node)
+
     def iter_calls(
         self,
         filters: list[AstFilter] | None = None,
@@ -172,12 +771,10 @@ class AstCrawler:
                 the AST of the file will be used.
 
         """
-        filters = filters or []
-        for node in ast.walk(tree or self.tree):
-            if isinstance(node, ast.Call) and all(f(node) for f in filters):
-                yield node
+        extractor = CallExtractor(filters)
+        self.visit(extractor, tree=tree)
+        yield from extractor.calls
 
-    @log_time(logger)
     def iter_decorators_named(
         self,
         decorator_name: str,
@@ -196,14 +793,69 @@ class AstCrawler:
             ast.Call nodes representing decorators with the specified name
 
         """
-        filters = filters or []
-        filters.append(AstFilterDecorator(decorator_name))
-        for node in ast.walk(tree or self.tree):
-            is_function = isinstance(node, ast.FunctionDef)
-            is_class = isinstance(node, ast.ClassDef)
-            if (is_function or is_class) and hasattr(node, "decorator_list"):
-                for decorator in node.decorator_list:
-                    yield from self.iter_calls(filters, decorator)
+        extractor = DecoratorExtractor(decorator_name, filters)
+        self.visit(extractor, tree=tree)
+        yield from extractor.calls
+
+
+class AstExtractor(ABC):
+    """Abstract base class for extractors fed by AstCrawler.visit."""
+
+    node_types: tuple[type[ast.AST], ...] = ()
+    scope: Scope = Scope.EXPRESSIONS
+
+    @abstractmethod
+    def __call__(self, node: ast.AST) -> None:
+        """Inspect an AST node of one of node_types."""
+
+
+class CallExtractor(AstExtractor):
+    """Extractor collecting the calls matching every filter."""
+
+    node_types = (ast.Call,)
+
+    def __init__(
+        self, filters: list[AstFilter] | None = None, scope: Scope = Scope.EXPRESSIONS
+    ) -> None:
+        """Initialize the extractor with the filters a call must match.
+
+        Args:
+            filters: The filters a call must match.
+            scope: Scope.STATEMENTS to only find calls that are statements on
+                their own, e.g. config.add_route(...), or Scope.EXPRESSIONS to
+                find every call.
+
+        """
+        self.filters = list(filters or [])
+        self.scope = scope
+        self.calls: list[ast.Call] = []
+
+    def __call__(self, node: ast.AST) -> None:
+        """Collect the node if it is a call matching every filter."""
+        if isinstance(node, ast.Call) and all(f(node) for f in self.filters):
+            self.calls.append(node)
+
+
+class DecoratorExtractor(AstExtractor):
+    """Extractor collecting the decorator calls named decorator_name."""
+
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    scope = Scope.DEFINITIONS
+
+    def __init__(
+        self, decorator_name: str, filters: list[AstFilter] | None = None
+    ) -> None:
+        """Initialize the extractor with a decorator name and extra filters."""
+        self.filters = [*(filters or []), AstFilterDecorator(decorator_name)]
+        self.calls: list[ast.Call] = []
+
+    def __call__(self, node: ast.AST) -> None:
+        """Collect the matching decorator calls of a definition."""
+        for decorator in getattr(node, "decorator_list", ()):
+            if isinstance(decorator, ast.Call) and all(
+                f(decorator) for f in self.filters
+            ):
+                self.calls.append(decorator)
 
 
 class AstFilterMethodCall(AstFilter):
@@ -0,0 +1,101 @@
+"""Module responsible for skipping files that cannot configure pyramid routes."""
+
+import logging
+import mmap
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+NEEDLES = (b"add_route", b"view_config", b".include(")
+MMAP_THRESHOLD = 64 * 1024
+
+
+class Prefilter:
+    """Drop files that do not mention any needle before they are decoded or parsed.
+
+    The prefilter also keeps count of the files it skipped and of the time spent
+    parsing the others, to estimate how much parsing time it saved.
+    """
+
+    def __init__(self, needles: tuple[bytes, ...] = NEEDLES) -> None:
+        """Initialize the prefilter with the identifiers a file must contain."""
+        self.needles = needles
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.parsed_files = 0
+        self.parsed_bytes = 0
+        self.parse_seconds = 0.0
+
+    def read(self, path: Path) -> bytes | None:
+        """Return the raw contents of path, or None when it contains no needle."""
+        return self.count(*self.scan(path))
+
+    def scan(self, path: Path) -> tuple[bytes | None, int]:
+        """Return the raw contents of path, or None when it contains no needle.
+
+        Large files are searched through mmap, so a skipped file is never copied
+        into memory and a matching one is copied exactly once. The counters are
+        left alone, so files can be scanned from several threads at once.
+
+        Returns:
+            The contents, or None, and the size of the file.
+
+        """
+        with path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if any(mm.find(needle) != -1 for needle in self.needles):
+                        return mm[:], size
+            else:
+                source = f.read()
+                if any(needle in source for needle in self.needles):
+                    return source, size
+        return None, size
+
+    def count(self, source: bytes | None, size: int) -> bytes | None:
+        """Count a scanned file as skipped when it has no needle, return source."""
+        if source is None:
+            self.skipped_files += 1
+            self.skipped_bytes += size
+        return source
+
+    def timed(self, extract: Callable[[bytes], T], source: bytes) -> T:
+        """Run extract on source, recording how long parsing took."""
+        start_time = time.perf_counter()
+        result = extract(source)
+        self.parse_seconds += time.perf_counter() - start_time
+        self.parsed_files += 1
+        self.parsed_bytes += len(source)
+        return result
+
+    def merge(self, other: "Prefilter") -> None:
+        """Add the counters of another prefilter, e.g. one from a worker process."""
+        self.skipped_files += other.skipped_files
+        self.skipped_bytes += other.skipped_bytes
+        self.parsed_files += other.parsed_files
+        self.parsed_bytes += other.parsed_bytes
+        self.parse_seconds += other.parse_seconds
+
+    @property
+    def seconds_saved(self) -> float:
+        """Estimate the parsing time saved, from the measured parse throughput."""
+        if not self.parsed_bytes:
+            return 0.0
+        return self.skipped_bytes * self.parse_seconds / self.parsed_bytes
+
+    def log_summary(self) -> None:
+        """Log how many files were skipped and how much time that saved."""
+        logger.debug(
+            "Prefilter skipped %d of %d files (%d bytes), saving about %.4fs",
+            self.skipped_files,
+            self.skipped_files + self.parsed_files,
+            self.skipped_bytes,
+            self.seconds_saved,
+        )
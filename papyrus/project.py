@@ -0,0 +1,277 @@
+"""Module holding the extracted state of a pyramid application in memory."""
+
+import logging
+import os
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+
+from papyrus.cache import ExtractionCache
+from papyrus.finder import Finder
+from papyrus.includes import IncludeGraph
+from papyrus.log import log_time
+from papyrus.parsing import DEFAULT_READERS, Parser
+from papyrus.pyramid import FileFacts, PyramidFiles, PyramidInfo, Route
+from papyrus.route_table import RouteTable
+from papyrus.scanning import Engine
+from papyrus.writing import OpenAPI, PathItem
+
+logger = logging.getLogger(__name__)
+
+
+class Project:
+    """Routes and views of a pyramid application, kept up to date incrementally.
+
+    The facts of every file are kept in memory, so a change only re-extracts the
+    changed files and only the affected paths of the document are rebuilt.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        base_dir: Path,
+        pyramid_info: PyramidInfo,
+        cache: ExtractionCache | None = None,
+        jobs: int = 1,
+        *,
+        readers: int = DEFAULT_READERS,
+        engine: Engine = Engine.AST,
+    ) -> None:
+        """Initialize an empty project, call load to extract its routes.
+
+        Args:
+            base_dir: The base directory of the pyramid application.
+            pyramid_info: Information about the pyramid application.
+            cache: Cache of previously extracted file facts.
+            jobs: The number of processes used to parse the views files.
+            readers: The number of threads reading the views files.
+            engine: How the facts of the files are extracted.
+
+        """
+        self.base_dir = base_dir
+        self.pyramid_info = pyramid_info
+        self.cache = cache
+        self.jobs = jobs
+        self.readers = readers
+        self.engine = engine
+        self.routes_file = Path()
+        self.views_dir = Path()
+        self._symbols = Parser.symbol_index(base_dir, cache)
+        self._graph = IncludeGraph(self.routes_file, base_dir, self._get_facts)
+        self._patterns: dict[str, str] = {}
+        self._names_by_pattern: dict[str, list[str]] = {}
+        self._views_facts: dict[Path, FileFacts] = {}
+        # The last facts of the routes modules, kept while they do not parse.
+        self._modules_facts: dict[Path, FileFacts] = {}
+        self._views_files: list[Path] = []
+        self._directories: list[Path] = []
+        # The views of each views file, with their constants resolved.
+        self._views: dict[Path, tuple[tuple[str, str], ...]] = {}
+        self._methods: defaultdict[str, Counter[str]] = defaultdict(Counter)
+
+    @log_time(logger)
+    def load(self) -> None:
+        """Discover and extract the whole application."""
+        # The views files are extracted while the walk is still finding them.
+        stream = PyramidFiles.stream(self.base_dir, self.pyramid_info)
+        self._symbols = Parser.symbol_index(self.base_dir, self.cache)
+        self._views_facts.clear()
+        self._modules_facts.clear()
+        self._views.clear()
+        self._methods.clear()
+        files_facts = Parser.iter_files_facts(
+            stream, self.cache, self.jobs, self.readers, self.engine
+        )
+        self._views_files = []
+        for views_file, facts in files_facts:
+            self._views_files.append(views_file)
+            self._set_views_facts(views_file, facts)
+        self._directories = stream.directories
+        discovery = stream.discovery()
+        self.routes_file = PyramidFiles.get_routes_path(
+            self.base_dir, self.pyramid_info.routes_file_name, discovery
+        )
+        self.views_dir = PyramidFiles.get_views_path(
+            self.base_dir, self.pyramid_info.views_dir_name, discovery
+        )
+        self._graph = IncludeGraph(
+            self.routes_file, self.base_dir, self._get_facts, self._symbols
+        )
+        self._set_routes(self._graph.routes())
+
+    @property
+    def routes_modules(self) -> set[Path]:
+        """Return the routes file and the modules it includes."""
+        return self._graph.modules
+
+    @property
+    def symbol_modules(self) -> set[Path]:
+        """Return the modules read to resolve the constants of routes and views."""
+        return self._symbols.modules
+
+    def input_paths(self) -> set[Path]:
+        """Return the files and directories the project was loaded from.
+
+        These are the directories the discovery scanned, the views files, the
+        routes modules and the modules defining constants, with the directories
+        of the modules, where new modules they may import would appear.
+        """
+        modules = self.routes_modules | self.symbol_modules
+        return {
+            *self._directories,
+            *self._views_files,
+            *modules,
+            *(module.parent for module in modules),
+        }
+
+    def routes(self) -> list[Route]:
+        """Return the routes, as Parser.get_routes does."""
+        return [
+            Route(route_name, route_pattern, set(self._methods[route_name]))
+            for route_name, route_pattern in self._patterns.items()
+        ]
+
+    def route_for_pattern(self, pattern: str) -> Route | None:
+        """Return the route documented under pattern, if any route has a method.
+
+        Like OpenAPI.from_routes, the routes sharing the pattern are merged, so
+        the route has all their methods and the name of the last one with one.
+        """
+        routes = [
+            Route(route_name, pattern, set(self._methods[route_name]))
+            for route_name in self._names_by_pattern.get(pattern, [])
+            if self._methods[route_name]
+        ]
+        if not routes:
+            return None
+        return RouteTable(routes).merged()[0]
+
+    def openapi(self) -> OpenAPI:
+        """Build the OpenAPI document of the project."""
+        table = RouteTable(self.routes())
+        table.log_problems()
+        return OpenAPI.from_routes(Parser.filter_routes_with_a_method(table))
+
+    def patch(self, openapi: OpenAPI, patterns: Iterable[str]) -> None:
+        """Rebuild the path items of the given patterns in an existing document."""
+        for pattern in patterns:
+            route = self.route_for_pattern(pattern)
+            if route is None:
+                openapi.paths.pop(pattern, None)
+            else:
+                openapi.paths[pattern] = PathItem.from_route(route)
+
+    @log_time(logger)
+    def update(self, changed_paths: Iterable[Path]) -> set[str]:
+        """Re-extract the changed files and return the patterns they affect.
+
+        Args:
+            changed_paths: Files or directories that were created, modified or
+                deleted. Directories stand for every file inside them.
+
+        Returns:
+            The patterns whose path item may have changed.
+
+        A file that cannot be parsed, like one saved in the middle of an edit,
+        keeps its previous facts until a later change makes it parse again.
+
+        """
+        patterns: set[str] = set()
+        paths = self._expand(changed_paths)
+        # A changed constant may be used by any routes module or views file.
+        symbols_changed = self._symbols.invalidate(paths)
+        if self._graph.invalidate(paths) or symbols_changed:
+            patterns |= self._update_routes()
+        for path in paths:
+            if self._is_views_file(path):
+                patterns |= self._update_views_file(path)
+        if symbols_changed:
+            for views_file, facts in list(self._views_facts.items()):
+                if facts.symbols is not None:
+                    patterns |= self._patterns_of(
+                        self._set_views_facts(views_file, facts)
+                    )
+        return patterns
+
+    def _expand(self, changed_paths: Iterable[Path]) -> set[Path]:
+        """Replace directories by the python files they (used to) hold."""
+        paths: set[Path] = set()
+        for path in changed_paths:
+            if path.suffix == ".py":
+                paths.add(path)
+                continue
+            prefix = f"{path}{os.sep}"
+            paths.update(p for p in self.routes_modules if f"{p}".startswith(prefix))
+            paths.update(p for p in self._views_facts if f"{p}".startswith(prefix))
+            if path.is_dir() and (
+                path == self.views_dir or path.is_relative_to(self.views_dir)
+            ):
+                paths.update(Finder.iter_all_files(path, ".py"))
+            elif f"{self.views_dir}".startswith(prefix) and self.views_dir.is_dir():
+                paths.update(Finder.iter_all_files(self.views_dir, ".py"))
+        return paths
+
+    def _is_views_file(self, path: Path) -> bool:
+        return path.suffix == ".py" and path.is_relative_to(self.views_dir)
+
+    def _get_facts(self, path: Path) -> FileFacts:
+        facts = self._parse(path)
+        if facts is None:
+            return self._modules_facts.get(path, FileFacts())
+        self._modules_facts[path] = facts
+        return facts
+
+    def _parse(self, path: Path) -> FileFacts | None:
+        """Return the facts of path, None if it cannot be parsed."""
+        try:
+            return Parser.get_file_facts(path, self.cache, engine=self.engine)
+        except (OSError, SyntaxError, ValueError) as e:
+            logger.warning("Keeping the previous facts of %s: %s", path, e)
+            return None
+
+    def _update_routes(self) -> set[str]:
+        old_index = self._names_by_pattern
+        self._set_routes(self._graph.routes())
+        new_index = self._names_by_pattern
+        return {
+            pattern
+            for pattern in old_index.keys() | new_index.keys()
+            if old_index.get(pattern) != new_index.get(pattern)
+        }
+
+    def _update_views_file(self, views_file: Path) -> set[str]:
+        old_facts = self._views_facts.get(views_file, FileFacts())
+        new_facts = self._parse(views_file) if views_file.is_file() else FileFacts()
+        if new_facts is None:
+            return set()
+        if (new_facts.views, new_facts.symbols) == (old_facts.views, old_facts.symbols):
+            return set()
+        return self._patterns_of(self._set_views_facts(views_file, new_facts))
+
+    def _patterns_of(self, route_names: Iterable[str]) -> set[str]:
+        return {
+            self._patterns[route_name]
+            for route_name in route_names
+            if route_name in self._patterns
+        }
+
+    def _set_routes(self, patterns: dict[str, str]) -> None:
+        self._patterns = patterns
+        self._names_by_pattern = {}
+        for route_name, pattern in self._patterns.items():
+            self._names_by_pattern.setdefault(pattern, []).append(route_name)
+
+    def _set_views_facts(self, views_file: Path, facts: FileFacts) -> set[str]:
+        """Replace the facts of views_file and return the routes whose views changed."""
+        self._views_facts.pop(views_file, None)
+        old_views = self._views.pop(views_file, ())
+        views = tuple(self._symbols.resolve(views_file, facts, facts.views))
+        for route_name, method in old_views:
+            self._methods[route_name][method] -= 1
+            if self._methods[route_name][method] <= 0:
+                del self._methods[route_name][method]
+        for route_name, method in views:
+            self._methods[route_name][method] += 1
+        if facts.views:
+            self._views_facts[views_file] = facts
+            self._views[views_file] = views
+        return {name for name, _ in set(old_views) ^ set(views)}
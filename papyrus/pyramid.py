@@ -1,6 +1,9 @@
 """Module with pyramid related classes."""
 
 import logging
+import sys
+from collections.abc import Iterable
+from collections.abc import Set as AbstractSet
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -9,19 +12,76 @@ from papyrus.exceptions import (
     RoutesFileNotFoundError,
     ViewsDirNotFoundError,
 )
-from papyrus.finder import Finder
+from papyrus.finder import Discovery, DiscoveryStream, Finder
 from papyrus.log import log_time
 
 logger = logging.getLogger(__name__)
 
+# Routes only ever have a handful of distinct sets of methods, shared by all.
+_method_sets: dict[frozenset[str], frozenset[str]] = {}
 
-@dataclass(frozen=True)
+
+def intern_methods(methods: Iterable[str]) -> frozenset[str]:
+    """Return the shared immutable set of the given request methods."""
+    key = frozenset(methods)
+    interned = _method_sets.get(key)
+    if interned is None:
+        interned = _method_sets[key] = frozenset(sys.intern(m) for m in key)
+    return interned
+
+
+@dataclass(frozen=True, slots=True)
 class Route:
-    """Dataclass representing a route in a pyramid application."""
+    """Dataclass representing a route in a pyramid application.
+
+    The methods are stored as an interned frozenset, whatever set is given.
+    """
 
     name: str
     pattern: str
-    methods: set[str]
+    methods: AbstractSet[str]
+
+    def __post_init__(self) -> None:
+        """Replace the methods with their interned frozenset."""
+        object.__setattr__(self, "methods", intern_methods(self.methods))
+
+
+@dataclass(frozen=True, slots=True)
+class Symbol:
+    """A name, possibly dotted like names.USER, standing for a string constant."""
+
+    name: str
+
+
+# A string argument of add_route or view_config, or the constant it names.
+type Value = str | Symbol
+
+
+@dataclass(frozen=True)
+class ModuleSymbols:
+    """The module-level names of a python file that may stand for a string."""
+
+    # Each constant with its string, or the name it is assigned from.
+    constants: tuple[tuple[str, Value], ...] = ()
+    # The local name, module and imported name of each import, the imported
+    # name being empty when the module itself is imported.
+    imports: tuple[tuple[str, str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class FileFacts:
+    """Facts about the pyramid configuration found in a single python file.
+
+    The symbols of the file are only extracted when a route or a view refers
+    to a constant, so facts without symbols hold strings only.
+    """
+
+    routes: tuple[tuple[Value, Value], ...] = ()
+    views: tuple[tuple[Value, Value], ...] = ()
+    # The module and route prefix of each config.include call, with the number
+    # of routes added before it.
+    includes: tuple[tuple[str, str, int], ...] = ()
+    symbols: ModuleSymbols | None = None
 
 
 def extract_url_parameters(pattern: str) -> list[str]:
@@ -55,6 +115,7 @@ class PyramidInfo:
 
     views_dir_name: str
     routes_file_name: str
+    max_depth: int | None = None
 
 
 class PyramidFiles:
@@ -62,18 +123,47 @@ class PyramidFiles:
 
     @staticmethod
     @log_time(logger)
-    def get_routes_path(base_dir: Path, file_name: str) -> Path:
+    def discover(base_dir: Path, pyramid_info: PyramidInfo) -> Discovery:
+        """Find the routes file, views directory and views files in one pass."""
+        return Finder.discover(
+            base_dir,
+            file_name=pyramid_info.routes_file_name,
+            dir_name=pyramid_info.views_dir_name,
+            file_type=".py",
+            max_depth=pyramid_info.max_depth,
+        )
+
+    @staticmethod
+    def stream(base_dir: Path, pyramid_info: PyramidInfo) -> DiscoveryStream:
+        """Return a discovery pass yielding the views files as it finds them."""
+        return DiscoveryStream(
+            base_dir,
+            file_name=pyramid_info.routes_file_name,
+            dir_name=pyramid_info.views_dir_name,
+            file_type=".py",
+            max_depth=pyramid_info.max_depth,
+        )
+
+    @staticmethod
+    @log_time(logger)
+    def get_routes_path(
+        base_dir: Path, file_name: str, discovery: Discovery | None = None
+    ) -> Path:
         """Return the path to routes file, otherwise raise FileNotFounderror."""
-        file_path = Finder.find_file(base_dir, file_name)
-        if not file_path:
+        if discovery is None:
+            discovery = Finder.discover(base_dir, file_name=file_name)
+        if not discovery.routes_file:
             raise RoutesFileNotFoundError(file_name, base_dir)
-        return file_path
+        return discovery.routes_file
 
     @staticmethod
     @log_time(logger)
-    def get_views_path(base_dir: Path, views_dir: str) -> Path:
+    def get_views_path(
+        base_dir: Path, views_dir: str, discovery: Discovery | None = None
+    ) -> Path:
         """Return the path to views directory, otherwise raise FileNotFounderror."""
-        view_dir = Finder.find_dir(base_dir, views_dir)
-        if not view_dir:
+        if discovery is None:
+            discovery = Finder.discover(base_dir, dir_name=views_dir)
+        if not discovery.views_dir:
             raise ViewsDirNotFoundError(views_dir, base_dir)
-        return view_dir
+        return discovery.views_dir
@@ -0,0 +1,303 @@
+"""Module with a table of routes indexed by name and by a trie of their patterns."""
+
+import functools
+import logging
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from enum import Enum
+
+from papyrus.pyramid import Route
+
+logger = logging.getLogger(__name__)
+
+# The regex pyramid matches a placeholder with when none is given.
+DEFAULT_REGEX = "[^/]+"
+ANY_SEGMENT = f"(?:{DEFAULT_REGEX})"
+
+
+class SegmentKind(Enum):
+    """How a segment of a pattern matches a segment of a URL."""
+
+    LITERAL = "literal"
+    PARAM = "param"
+    STAR = "star"
+
+
+Segment = tuple[SegmentKind, str]
+
+
+def split_segment(segment: str) -> Segment:
+    """Classify a segment of a pattern.
+
+    Literal segments are kept as is. Segments with placeholders are turned into
+    the regex they match, so placeholders only differing by name compare equal.
+    A star segment matches the rest of the URL.
+    """
+    if segment.startswith("*"):
+        return SegmentKind.STAR, ""
+    if "{" not in segment:
+        return SegmentKind.LITERAL, segment
+    regex = []
+    start = 0
+    while (open_brace := segment.find("{", start)) != -1:
+        regex.append(re.escape(segment[start:open_brace]))
+        depth = 0
+        for close_brace in range(open_brace, len(segment)):
+            depth += {"{": 1, "}": -1}.get(segment[close_brace], 0)
+            if depth == 0:
+                break
+        else:
+            return SegmentKind.LITERAL, segment
+        _, _, param_regex = segment[open_brace + 1 : close_brace].partition(":")
+        regex.append(f"(?:{param_regex or DEFAULT_REGEX})")
+        start = close_brace + 1
+    regex.append(re.escape(segment[start:]))
+    return SegmentKind.PARAM, "".join(regex)
+
+
+def split_pattern(pattern: str) -> tuple[Segment, ...]:
+    """Split a pattern into its segments, ignoring the leading slash."""
+    path = pattern.removeprefix("/")
+    return tuple(split_segment(segment) for segment in path.split("/")) if path else ()
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_regex(regex: str) -> re.Pattern[str]:
+    """Compile the regex of a segment, once."""
+    return re.compile(regex)
+
+
+@dataclass(slots=True)
+class TrieNode:
+    """Node of the pattern trie, one level per segment."""
+
+    literals: dict[str, "TrieNode"] = field(default_factory=dict)
+    params: dict[str, "TrieNode"] = field(default_factory=dict)
+    names: list[str] = field(default_factory=list)
+    star_names: list[str] = field(default_factory=list)
+
+    def children(self, kind: SegmentKind) -> dict[str, "TrieNode"]:
+        """Return the children reached through segments of kind."""
+        return self.literals if kind is SegmentKind.LITERAL else self.params
+
+    def is_empty(self) -> bool:
+        """Return whether no route goes through the node."""
+        return not (self.literals or self.params or self.names or self.star_names)
+
+
+class RouteTable:
+    """Routes in the order pyramid matches them, indexed by name and by pattern.
+
+    Patterns are stored in a trie with one level per segment, so every query
+    walks the segments of one pattern instead of comparing routes pairwise.
+    """
+
+    def __init__(self, routes: Iterable[Route] = ()) -> None:
+        """Initialize the table with routes, in the order they were added."""
+        self._routes: dict[str, Route] = {}
+        self._segments: dict[str, tuple[Segment, ...]] = {}
+        self._order: dict[str, int] = {}
+        self._by_pattern: dict[str, list[str]] = {}
+        self._root = TrieNode()
+        self._added = 0
+        for route in routes:
+            self.add(route)
+
+    def __len__(self) -> int:
+        """Return the number of routes."""
+        return len(self._routes)
+
+    def __iter__(self) -> Iterator[Route]:
+        """Iterate over the routes in the order pyramid matches them."""
+        return iter(self._routes.values())
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether a route is named name."""
+        return name in self._routes
+
+    def get(self, name: str) -> Route | None:
+        """Return the route named name, if any."""
+        return self._routes.get(name)
+
+    def add(self, route: Route) -> None:
+        """Add a route, replacing and moving to the end any route of that name."""
+        self.remove(route.name)
+        segments = split_pattern(route.pattern)
+        self._routes[route.name] = route
+        self._segments[route.name] = segments
+        self._order[route.name] = self._added
+        self._added += 1
+        self._by_pattern.setdefault(route.pattern, []).append(route.name)
+        node = self._root
+        for kind, key in segments:
+            if kind is SegmentKind.STAR:
+                node.star_names.append(route.name)
+                return
+            node = node.children(kind).setdefault(key, TrieNode())
+        node.names.append(route.name)
+
+    def remove(self, name: str) -> Route | None:
+        """Remove and return the route named name, if any."""
+        route = self._routes.pop(name, None)
+        if route is None:
+            return None
+        segments = self._segments.pop(name)
+        del self._order[name]
+        names = self._by_pattern[route.pattern]
+        names.remove(name)
+        if not names:
+            del self._by_pattern[route.pattern]
+        path = [self._root]
+        for kind, key in segments:
+            if kind is SegmentKind.STAR:
+                path[-1].star_names.remove(name)
+                break
+            path.append(path[-1].children(kind)[key])
+        else:
+            path[-1].names.remove(name)
+        for (kind, key), parent, node in reversed(
+            list(zip(segments, path, path[1:], strict=False))
+        ):
+            if not node.is_empty():
+                break
+            del parent.children(kind)[key]
+        return route
+
+    def by_pattern(self, pattern: str) -> list[Route]:
+        """Return the routes with exactly pattern, in order."""
+        return [self._routes[name] for name in self._by_pattern.get(pattern, [])]
+
+    def duplicates(self) -> dict[str, list[Route]]:
+        """Return the patterns shared by several routes, with those routes."""
+        return {
+            pattern: self.by_pattern(pattern)
+            for pattern, names in self._by_pattern.items()
+            if len(names) > 1
+        }
+
+    def conflicts(self) -> list[list[Route]]:
+        """Return groups of distinct patterns that only differ by parameter names.
+
+        OpenAPI considers such templated paths identical, e.g. /user/{id} and
+        /user/{user_id}.
+        """
+        conflicts = []
+        todo = [self._root]
+        while todo:
+            node = todo.pop()
+            todo.extend(node.literals.values())
+            todo.extend(node.params.values())
+            for names in (node.names, node.star_names):
+                patterns = {self._routes[name].pattern for name in names}
+                if len(patterns) > 1:
+                    conflicts.append([self._routes[name] for name in names])
+        return conflicts
+
+    def with_prefix(self, prefix: str) -> list[Route]:
+        """Return the routes whose pattern starts with the segments of prefix."""
+        node = self._root
+        for kind, key in split_pattern(prefix):
+            if kind is SegmentKind.STAR:
+                return []
+            child = node.children(kind).get(key)
+            if child is None:
+                return []
+            node = child
+        names = []
+        todo = [node]
+        while todo:
+            node = todo.pop()
+            names.extend(node.names)
+            names.extend(node.star_names)
+            todo.extend(node.literals.values())
+            todo.extend(node.params.values())
+        return sorted(
+            (self._routes[name] for name in names),
+            key=lambda route: self._order[route.name],
+        )
+
+    def shadowing(self, name: str) -> list[Route]:
+        """Return the routes added before name that match every URL it matches.
+
+        Pyramid tries routes in order, so such a route is never matched. Routes
+        with the very same pattern are left to duplicates.
+        """
+        route = self._routes[name]
+        order = self._order[name]
+        names = self._generalizing(self._root, self._segments[name], 0)
+        return sorted(
+            (
+                self._routes[other]
+                for other in set(names)
+                if self._order[other] < order
+                and self._routes[other].pattern != route.pattern
+            ),
+            key=lambda other: self._order[other.name],
+        )
+
+    def shadowed(self) -> list[tuple[Route, Route]]:
+        """Return every shadowed route, with the first route shadowing it."""
+        shadowed = []
+        for name, route in self._routes.items():
+            if shadowing := self.shadowing(name):
+                shadowed.append((route, shadowing[0]))
+        return shadowed
+
+    def _generalizing(
+        self, node: TrieNode, segments: tuple[Segment, ...], index: int
+    ) -> Iterator[str]:
+        """Yield the routes below node matching every URL segments[index:] match."""
+        yield from node.star_names
+        if index == len(segments):
+            yield from node.names
+            return
+        kind, key = segments[index]
+        if kind is SegmentKind.LITERAL and (child := node.literals.get(key)):
+            yield from self._generalizing(child, segments, index + 1)
+        if kind is SegmentKind.STAR:
+            return
+        for regex, child in node.params.items():
+            if (
+                regex in {ANY_SEGMENT, key}
+                if kind is SegmentKind.PARAM
+                else compile_regex(regex).fullmatch(key)
+            ):
+                yield from self._generalizing(child, segments, index + 1)
+
+    def merged(self) -> list[Route]:
+        """Return one route per pattern, with the methods of all its routes.
+
+        The merged route is named after the last route with a method, or the
+        last route when none has one.
+        """
+        merged = []
+        for pattern, names in self._by_pattern.items():
+            routes = [self._routes[name] for name in names]
+            with_methods = [route for route in routes if route.methods]
+            name = (with_methods or routes)[-1].name
+            methods = set().union(*(route.methods for route in routes))
+            merged.append(Route(name, pattern, methods))
+        return merged
+
+    def log_problems(self) -> None:
+        """Log the routes that share, shadow or conflict with other routes."""
+        for pattern, routes in self.duplicates().items():
+            logger.info(
+                "Routes %s share the pattern %s, their methods are merged",
+                ", ".join(route.name for route in routes),
+                pattern,
+            )
+        for route, shadowing in self.shadowed():
+            logger.warning(
+                "Route %s (%s) is never matched, route %s (%s) comes first",
+                route.name,
+                route.pattern,
+                shadowing.name,
+                shadowing.pattern,
+            )
+        for routes in self.conflicts():
+            logger.warning(
+                "Patterns %s only differ by the names of their parameters",
+                ", ".join(sorted({route.pattern for route in routes})),
+            )
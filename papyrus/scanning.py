@@ -0,0 +1,435 @@
+"""Module extracting the facts of python files from their tokens, without an AST.
+
+Only the literal arguments of add_route, config.include and view_config are
+needed, and they can be read straight from the tokens of the few statements
+naming them. Those statements are found with a light lexical pass over the
+source that only tells code from strings and comments, and follows brackets and
+indentation. Whenever a call is not one the scanner resolves with confidence (a
+non-literal argument, a call in an unusual position or nesting), the scanner
+gives up on the whole file, which is then parsed with ast as usual.
+"""
+
+import ast
+import io
+import re
+import tokenize
+from enum import StrEnum
+
+from papyrus.pyramid import FileFacts
+
+ROUTE_METHOD = "add_route"
+INCLUDE_METHOD = "include"
+VIEW_DECORATOR = "view_config"
+CANDIDATE_NAMES = re.compile(
+    rf"\b(?:{ROUTE_METHOD}|{INCLUDE_METHOD}|{VIEW_DECORATOR})\b"
+)
+# The characters the lexical pass stops at, everything else is plain code.
+LEXICAL_EVENTS = re.compile(r"[\n()\[\]{}#'\"\\]")
+STRING = re.compile(
+    "|".join(
+        (
+            f"'''{tokenize.Single3}",
+            f'"""{tokenize.Double3}',
+            r"'[^\n'\\]*(?:\\.[^\n'\\]*)*'",
+            r'"[^\n"\\]*(?:\\.[^\n"\\]*)*"',
+        )
+    ),
+    re.DOTALL,
+)
+CONTINUATION = re.compile(r"\\\r?\n")
+INDENTATION = re.compile(r"[ ]*")
+BLOCK_HEADER = re.compile(r"(?:async\s+)?(class|def)\b")
+# Prefixes of the strings holding code between braces, as of python 3.12.
+TEMPLATE_PREFIXES = frozenset("fFtT")
+# Tokens that carry no code.
+IGNORED_TOKENS = frozenset({tokenize.NL, tokenize.COMMENT, tokenize.ENCODING})
+# Tokens before a method call showing it is not an expression statement.
+NOT_STATEMENTS = frozenset({"=", "return", "await", "yield"})
+QUOTES = ('"""', "'''", '"', "'")
+OPENING_BRACKETS = frozenset({"(", "[", "{"})
+CLOSING_BRACKETS = frozenset({")", "]", "}"})
+# Below these, extract_facts warns about the call and skips it.
+MIN_ROUTE_ARGUMENTS = 2
+MIN_VIEW_KEYWORDS = 2
+
+
+class Engine(StrEnum):
+    """How the facts of a python file are extracted from its source."""
+
+    AST = "ast"
+    """Parse the whole file into an AST."""
+    FAST = "fast"
+    """Read the literal arguments from the tokens, parse with ast when unsure."""
+
+
+class BlockKind(StrEnum):
+    """The kind of statement opening an indented block."""
+
+    CLASS = "class"
+    DEF = "def"
+    OTHER = "other"
+
+
+# The tokens of an argument of a call.
+type Argument = list[tokenize.TokenInfo]
+# The source of a logical line, dedented, and the blocks it is nested in.
+type Statement = tuple[str, tuple[BlockKind, ...]]
+
+
+class UnresolvedError(Exception):
+    """The scanner cannot tell with confidence what a call of the file does."""
+
+
+class StatementFinder:
+    """Finder of the logical lines of python source naming a fact's call.
+
+    The source is lexed only as far as needed to split it into logical lines
+    and track the blocks they are nested in, so that tokenize runs on a few
+    statements rather than on the whole file.
+    """
+
+    def __init__(self, text: str) -> None:
+        """Initialize the finder with the source text."""
+        self.text = text
+        self.names = [match.start() for match in CANDIDATE_NAMES.finditer(text)]
+        self.statements: list[Statement] = []
+        self._widths = [0]
+        self._blocks: list[BlockKind] = []
+        self._previous_kind = BlockKind.OTHER
+        self._next_name = 0
+
+    def find(self) -> list[Statement]:
+        """Return the logical lines naming add_route, include or view_config.
+
+        Lines mentioning them in strings or comments are returned too, the
+        tokens of those are not names.
+
+        Raises:
+            UnresolvedError: If the source cannot be lexed with confidence.
+
+        """
+        if not self.names:
+            return []
+        text = self.text
+        depth = line_start = position = 0
+        while match := LEXICAL_EVENTS.search(text, position):
+            char, start = match.group(), match.start()
+            position = start + 1
+            if char == "\n":
+                if depth == 0:
+                    self._end_line(line_start, start)
+                    line_start = position
+            elif char in OPENING_BRACKETS:
+                depth += 1
+            elif char in CLOSING_BRACKETS:
+                depth -= 1
+                if depth < 0:
+                    raise UnresolvedError(start)
+            else:
+                position = self._skip(char, start)
+        if depth:
+            raise UnresolvedError(len(text))
+        self._end_line(line_start, len(text))
+        return self.statements
+
+    def _skip(self, char: str, start: int) -> int:
+        """Return the end of the comment, string or continuation at start."""
+        if char == "#":
+            end = self.text.find("\n", start)
+            return len(self.text) if end < 0 else end
+        if char == "\\":
+            match = CONTINUATION.match(self.text, start)
+        else:
+            match = STRING.match(self.text, start)
+            if (
+                match
+                and not TEMPLATE_PREFIXES.isdisjoint(
+                    self.text[max(start - 2, 0) : start]
+                )
+                and match.group().count("{") != match.group().count("}")
+            ):
+                # A quote in a replacement field ended the string early.
+                raise UnresolvedError(start)
+        if match is None:
+            raise UnresolvedError(start)
+        return match.end()
+
+    def _end_line(self, line_start: int, end: int) -> None:
+        """Track the blocks at the logical line and keep it if it is a candidate."""
+        text = self.text
+        indent_end = INDENTATION.match(text, line_start).end()  # type: ignore[union-attr]
+        if indent_end == end or text[indent_end] in "#\r":
+            return
+        if text[indent_end] in "\t\f":
+            raise UnresolvedError(indent_end)
+        width = indent_end - line_start
+        if width > self._widths[-1]:
+            self._widths.append(width)
+            self._blocks.append(self._previous_kind)
+        while width < self._widths[-1]:
+            self._widths.pop()
+            self._blocks.pop()
+        if width != self._widths[-1]:
+            raise UnresolvedError(indent_end)
+        header = BLOCK_HEADER.match(text, indent_end)
+        self._previous_kind = BlockKind(header.group(1)) if header else BlockKind.OTHER
+        names = self.names
+        while self._next_name < len(names) and names[self._next_name] < line_start:
+            self._next_name += 1
+        if self._next_name < len(names) and names[self._next_name] < end:
+            self.statements.append((text[indent_end:end], tuple(self._blocks)))
+
+
+class TokenScanner:
+    """Scanner of the tokens of a python file for routes, includes and views.
+
+    The facts are those Parser.extract_facts finds: add_route and include
+    method calls that are statements on their own, in source order, and
+    view_config decorators of the definitions nested in classes and functions
+    only, in the breadth-first order of the AST.
+    """
+
+    def __init__(self, source: str | bytes) -> None:
+        """Find and tokenize the statements of source naming a fact's call.
+
+        Raises:
+            UnresolvedError: If source cannot be lexed or tokenized.
+
+        """
+        self.statements = StatementFinder(decode(source)).find()
+        lines = "".join(f"{statement}\n" for statement, _ in self.statements)
+        try:
+            self.tokens = [
+                token
+                for token in tokenize.generate_tokens(io.StringIO(lines).readline)
+                if token.type not in IGNORED_TOKENS
+            ]
+        except (SyntaxError, tokenize.TokenError) as e:
+            raise UnresolvedError(e) from e
+        self.routes: list[tuple[str, str]] = []
+        self.includes: list[tuple[str, str, int]] = []
+        # The views with the depth of their definition and their position.
+        self.views: list[tuple[int, int, tuple[str, str]]] = []
+
+    def scan(self) -> FileFacts:
+        """Return the facts of the file.
+
+        Raises:
+            UnresolvedError: If a call cannot be resolved with confidence.
+
+        """
+        statement = line_start = 0
+        for index, token in enumerate(self.tokens):
+            if token.type == tokenize.NEWLINE:
+                statement += 1
+                line_start = index + 1
+            elif token.type != tokenize.NAME:
+                continue
+            elif token.string in {ROUTE_METHOD, INCLUDE_METHOD}:
+                self._method_call(index)
+            elif token.string == VIEW_DECORATOR:
+                _, blocks = self.statements[statement]
+                self._decorator(index, line_start, blocks)
+        views = sorted(self.views, key=lambda view: view[:2])
+        return FileFacts(
+            routes=tuple(self.routes),
+            views=tuple(view for _, _, view in views),
+            includes=tuple(self.includes),
+        )
+
+    def _is_op(self, index: int, string: str) -> bool:
+        """Whether the token at index is the operator string."""
+        return (
+            0 <= index < len(self.tokens)
+            and self.tokens[index].type == tokenize.OP
+            and self.tokens[index].string == string
+        )
+
+    def _method_call(self, index: int) -> None:
+        """Record the add_route or include call whose method name is at index."""
+        if not self._is_op(index - 1, ".") or not self._is_op(index + 1, "("):
+            return
+        # The receiver must be a dotted name, like config or self.config.
+        start = index - 2
+        if start < 0 or self.tokens[start].type != tokenize.NAME:
+            raise UnresolvedError(self.tokens[index])
+        while (
+            self._is_op(start - 1, ".")
+            and start > 1
+            and self.tokens[start - 2].type == tokenize.NAME
+        ):
+            start -= 2
+        before = self.tokens[start - 1] if start > 0 else None
+        if before is not None and before.string in NOT_STATEMENTS:
+            return
+        if not (
+            before is None
+            or before.type == tokenize.NEWLINE
+            or self._is_op(start - 1, ";")
+        ):
+            raise UnresolvedError(self.tokens[index])
+        positional, keywords, end = self._arguments(index + 1)
+        after = self.tokens[end + 1]
+        if after.type != tokenize.NEWLINE and not self._is_op(end + 1, ";"):
+            # The call is part of a larger expression, not a statement.
+            return
+        if self.tokens[index].string == ROUTE_METHOD:
+            self._route(positional)
+        else:
+            self._include(positional, keywords)
+
+    def _route(self, positional: list[Argument]) -> None:
+        """Record the route of an add_route call."""
+        if len(positional) < MIN_ROUTE_ARGUMENTS:
+            raise UnresolvedError(positional)
+        route_name, route_pattern = literal(positional[0]), literal(positional[1])
+        if route_name and route_pattern:
+            self.routes.append((route_name, route_pattern))
+
+    def _include(
+        self,
+        positional: list[Argument],
+        keywords: dict[str, Argument],
+    ) -> None:
+        """Record the module and route prefix of a config.include call."""
+        if not positional:
+            raise UnresolvedError(keywords)
+        module = literal(positional[0])
+        route_prefix = keywords.get("route_prefix")
+        if route_prefix is None and len(positional) > 1:
+            route_prefix = positional[1]
+        prefix = "" if route_prefix is None else literal(route_prefix)
+        if module:
+            self.includes.append((module, prefix, len(self.routes)))
+
+    def _decorator(
+        self, index: int, line_start: int, blocks: tuple[BlockKind, ...]
+    ) -> None:
+        """Record the view of the view_config decorator whose name is at index."""
+        if not self._is_op(line_start, "@"):
+            # Imports, calls and assignments of view_config are not decorators.
+            return
+        if index != line_start + 1:
+            raise UnresolvedError(self.tokens[index])
+        if not self._is_op(index + 1, "("):
+            return
+        if BlockKind.OTHER in blocks:
+            # The breadth-first order under if, try or with is not the nesting.
+            raise UnresolvedError(self.tokens[index])
+        positional, keywords, end = self._arguments(index + 1)
+        if (
+            positional
+            or len(keywords) < MIN_VIEW_KEYWORDS
+            or self.tokens[end + 1].type != tokenize.NEWLINE
+        ):
+            raise UnresolvedError(self.tokens[index])
+        route_name = literal(keywords["route_name"]) if "route_name" in keywords else ""
+        request_method = (
+            literal(keywords["request_method"]) if "request_method" in keywords else ""
+        )
+        if route_name and request_method:
+            self.views.append((len(blocks), index, (route_name, request_method)))
+
+    def _arguments(
+        self, open_index: int
+    ) -> tuple[list[Argument], dict[str, Argument], int]:
+        """Split the arguments of the call whose parenthesis opens at open_index.
+
+        Returns:
+            The positional arguments, the keyword arguments by name, and the
+            index of the closing parenthesis.
+
+        Raises:
+            UnresolvedError: If the call is not closed or an argument is
+                unpacked with * or **.
+
+        """
+        arguments: list[Argument] = [[]]
+        depth = 0
+        for index in range(open_index + 1, len(self.tokens)):
+            token = self.tokens[index]
+            if token.type != tokenize.OP:
+                arguments[-1].append(token)
+            elif token.string in CLOSING_BRACKETS and depth == 0:
+                return (*sort_arguments(arguments), index)
+            elif token.string == "," and depth == 0:
+                arguments.append([])
+            else:
+                depth += token.string in OPENING_BRACKETS
+                depth -= token.string in CLOSING_BRACKETS
+                arguments[-1].append(token)
+        raise UnresolvedError(self.tokens[open_index])
+
+
+def sort_arguments(
+    arguments: list[Argument],
+) -> tuple[list[Argument], dict[str, Argument]]:
+    """Sort the arguments of a call into positional and keyword arguments.
+
+    Raises:
+        UnresolvedError: If an argument is unpacked with * or **.
+
+    """
+    positional = []
+    keywords = {}
+    for argument in arguments:
+        if not argument:
+            continue
+        if argument[0].string in {"*", "**"}:
+            raise UnresolvedError(argument[0])
+        if (
+            len(argument) > 1
+            and argument[0].type == tokenize.NAME
+            and argument[1].string == "="
+        ):
+            keywords[argument[0].string] = argument[2:]
+        else:
+            positional.append(argument)
+    return positional, keywords
+
+
+def decode(source: str | bytes) -> str:
+    """Return python source as text, decoded as python would.
+
+    Raises:
+        UnresolvedError: If source cannot be decoded.
+
+    """
+    if isinstance(source, str):
+        return source
+    try:
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+        return source.decode(encoding)
+    except (SyntaxError, UnicodeDecodeError) as e:
+        raise UnresolvedError(e) from e
+
+
+def literal(tokens: Argument) -> str:
+    """Return the value of an argument made of string literals.
+
+    Raises:
+        UnresolvedError: If the argument is anything else.
+
+    """
+    if not tokens or any(token.type != tokenize.STRING for token in tokens):
+        raise UnresolvedError(tokens)
+    if len(tokens) > 1:
+        # Implicitly concatenated, like "/user/" "{id}".
+        return "".join(literal([token]) for token in tokens)
+    text = tokens[0].string
+    if "\\" not in text:
+        for quote in QUOTES:
+            if text.startswith(quote):
+                return text[len(quote) : -len(quote)]
+    value = ast.literal_eval(text)
+    if not isinstance(value, str):
+        raise UnresolvedError(tokens)
+    return value
+
+
+def scan_facts(source: str | bytes) -> FileFacts | None:
+    """Return the facts of python source, or None if the tokens are not enough."""
+    try:
+        return TokenScanner(source).scan()
+    except UnresolvedError:
+        return None
@@ -0,0 +1,189 @@
+"""Module serving the OpenAPI document over HTTP, kept up to date in memory."""
+
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import cast
+from urllib.parse import urlsplit
+
+from papyrus.cache import content_hash
+from papyrus.project import Project
+from papyrus.watch import iter_changes, make_watcher, watched_directories
+from papyrus.writing import OutputFormat
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_PATHS = {
+    "/openapi.yaml": OutputFormat.YAML,
+    "/openapi.json": OutputFormat.JSON,
+}
+CONTENT_TYPES = {
+    OutputFormat.YAML: "application/yaml",
+    OutputFormat.JSON: "application/json",
+}
+
+
+@dataclass(frozen=True)
+class Body:
+    """A serialized document and its entity tag."""
+
+    content: bytes
+    etag: str
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Return whether an If-None-Match header matches etag."""
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class DocumentState:
+    """A loaded project and its document, with the serialized bodies cached.
+
+    A body is serialized on the first request for its format and reused until
+    a refresh changes the routes.
+    """
+
+    def __init__(self, project: Project) -> None:
+        """Build the document of a loaded project."""
+        self.project = project
+        self.openapi = project.openapi()
+        self._bodies: dict[OutputFormat, Body] = {}
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+
+    def body(self, output_format: OutputFormat) -> Body:
+        """Return the document serialized in output_format."""
+        with self._lock:
+            body = self._bodies.get(output_format)
+            if body is None:
+                content = self.openapi.render(output_format).encode()
+                body = Body(content, f'"{content_hash(content)}"')
+                self._bodies[output_format] = body
+            return body
+
+    def refresh(self, changed_paths: Iterable[Path]) -> set[str]:
+        """Update the document after changes, returning the patterns affected.
+
+        When patching fails, the bodies of the previous document are kept, and
+        the patterns are patched again by the next refresh.
+        """
+        with self._lock:
+            patterns = self.project.update(changed_paths) | self._pending
+            if patterns:
+                self._pending = patterns
+                self.project.patch(self.openapi, patterns)
+                self._pending = set()
+                self._bodies.clear()
+        return patterns
+
+
+class DocumentRequestHandler(BaseHTTPRequestHandler):
+    """Handler answering GET and HEAD requests for the document."""
+
+    server_version = "papyrus"
+
+    def do_GET(self) -> None:
+        """Send the document."""
+        self._respond(include_content=True)
+
+    def do_HEAD(self) -> None:
+        """Send the headers of the document."""
+        self._respond(include_content=False)
+
+    def _respond(self, *, include_content: bool) -> None:
+        output_format = DOCUMENT_PATHS.get(urlsplit(self.path).path)
+        if output_format is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = cast("DocumentServer", self.server).state.body(output_format)
+        if etag_matches(self.headers.get("If-None-Match"), body.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", body.etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", CONTENT_TYPES[output_format])
+        self.send_header("Content-Length", str(len(body.content)))
+        self.send_header("ETag", body.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if include_content:
+            self.wfile.write(body.content)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        """Log requests through logging instead of stderr."""
+        logger.debug(format, *args)
+
+
+class DocumentServer(ThreadingHTTPServer):
+    """HTTP server of the document held by a DocumentState."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], state: DocumentState) -> None:
+        """Bind the server to address."""
+        super().__init__(address, DocumentRequestHandler)
+        self.state = state
+
+
+def refresh_forever(
+    state: DocumentState, stop: threading.Event, debounce: float = 0.2
+) -> None:
+    """Refresh state whenever the sources of its project change, until stop.
+
+    A refresh that fails is logged, and the next changes are refreshed as usual,
+    so the document is never left stale for good.
+    """
+    watcher = make_watcher(state.project)
+    try:
+        for changes in iter_changes(watcher, debounce, stop):
+            start_time = time.perf_counter()
+            try:
+                patterns = state.refresh(changes)
+            except Exception:
+                logger.exception("Could not refresh the document")
+                continue
+            watcher.add_directories(watched_directories(state.project))
+            if patterns:
+                logger.info(
+                    "Updated %d paths (took %.4fs)",
+                    len(patterns),
+                    time.perf_counter() - start_time,
+                )
+    finally:
+        watcher.close()
+
+
+def serve(project: Project, host: str = "127.0.0.1", port: int = 8000) -> None:
+    """Serve the document of a loaded project until interrupted.
+
+    Args:
+        project: The loaded project to serve the document of.
+        host: The address to listen on.
+        port: The port to listen on, 0 for any free port.
+
+    """
+    state = DocumentState(project)
+    stop = threading.Event()
+    refresher = threading.Thread(
+        target=refresh_forever, args=(state, stop), name="refresh", daemon=True
+    )
+    refresher.start()
+    with DocumentServer((host, port), state) as server:
+        logger.info(
+            "Serving http://%s:%d/openapi.yaml and /openapi.json",
+            *server.server_address[:2],
+        )
+        try:
+            server.serve_forever()
+        finally:
+            stop.set()
+            refresher.join()
@@ -0,0 +1,242 @@
+"""Module splitting the paths of a document into files a root document refers to."""
+
+import json
+import logging
+import os
+import re
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import quote
+
+from papyrus.cache import content_hash
+from papyrus.writing import JSON_INDENT, OpenAPI, OutputFormat, dump_yaml, write_atomic
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Written to the shards directory, with the digest of every file written.
+MANIFEST_NAME = ".papyrus-shards.json"
+# Threads rendering and writing the shards.
+DEFAULT_WRITERS = 4
+NON_FILE_NAME_CHARACTERS = re.compile(r"[^a-z0-9_-]+")
+
+
+def shard_name(pattern: str, skip: int = 0, depth: int = 1) -> str:
+    """Return the name of the shard holding pattern: its first path segments.
+
+    Names are lowercase, so that patterns differing in case share a file on
+    case-insensitive file systems, and "index" for the patterns of the root.
+
+    Args:
+        pattern: The pattern of a path item.
+        skip: The number of leading segments left out, see common_segments.
+        depth: The number of segments naming the shard.
+
+    """
+    segments = pattern.lower().strip("/").split("/")[skip : skip + depth]
+    names = (
+        NON_FILE_NAME_CHARACTERS.sub("_", segment).strip("_") for segment in segments
+    )
+    return "_".join(name for name in names if name) or "index"
+
+
+def common_segments(patterns: Iterable[str]) -> int:
+    """Return how many leading segments all patterns share, like /api/v1.
+
+    The last segment of a pattern is never counted, so that each pattern is
+    left with a segment to name its shard.
+    """
+    common: list[str] | None = None
+    for pattern in patterns:
+        segments = pattern.strip("/").split("/")[:-1]
+        if common is None:
+            common = segments
+            continue
+        length = 0
+        for left, right in zip(common, segments, strict=False):
+            if left != right:
+                break
+            length += 1
+        common = common[:length]
+        if not common:
+            break
+    return len(common or ())
+
+
+def json_pointer(*keys: str) -> str:
+    """Return the JSON pointer to keys, as written in the fragment of a $ref."""
+    escaped = (key.replace("~", "~0").replace("/", "~1") for key in keys)
+    return quote("".join(f"/{key}" for key in escaped), safe="/~")
+
+
+def render(data: Any, output_format: OutputFormat) -> str:  # noqa: ANN401
+    """Convert plain python data to a string in the given format."""
+    if output_format is OutputFormat.JSON:
+        return json.dumps(data, indent=JSON_INDENT, sort_keys=True) + "\n"
+    return dump_yaml(data)
+
+
+def rebase_refs(value: Any, target: str) -> Any:  # noqa: ANN401
+    """Return value with its local $refs pointing into the target file instead."""
+    if isinstance(value, dict):
+        ref = value.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#"):
+            return {**value, "$ref": f"{target}{ref}"}
+        return {key: rebase_refs(item, target) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rebase_refs(item, target) for item in value]
+    return value
+
+
+def relative(path: Path, start: Path) -> str:
+    """Return path relative to the directory start, as written in a $ref."""
+    return Path(os.path.relpath(path, start)).as_posix()
+
+
+class ShardWriter:
+    """Writer of a document split into shards by the first segments of its paths.
+
+    The segments all the paths start with, like /api, are left out. Each shard
+    is a file mapping its patterns to their path items, and the root
+    document maps every pattern to a $ref into its shard. The shards are
+    rendered and written by a pool of threads, each file atomically, and the
+    root document last, so it never refers to a shard that is not written yet.
+
+    The digest of every file written is kept in a manifest next to the shards,
+    and files whose content did not change are left alone, so the tools
+    watching them are not woken up for nothing.
+    """
+
+    def __init__(
+        self,
+        output: Path,
+        shards_dir: Path,
+        output_format: OutputFormat = OutputFormat.YAML,
+        depth: int = 1,
+        writers: int = DEFAULT_WRITERS,
+    ) -> None:
+        """Initialize a writer of the root document output.
+
+        Args:
+            output: The file of the root document.
+            shards_dir: The directory of the shards, created if missing.
+            output_format: The format to write the documents in.
+            depth: The number of path segments naming a shard.
+            writers: The number of threads writing the shards.
+
+        """
+        self.output = output
+        self.shards_dir = shards_dir
+        self.output_format = output_format
+        self.depth = depth
+        self.writers = writers
+        # The files of the last document written, written or left alone.
+        self.files: list[Path] = []
+
+    @property
+    def manifest_file(self) -> Path:
+        """Return the file holding the digests of the files written."""
+        return self.shards_dir / MANIFEST_NAME
+
+    def write(self, openapi: OpenAPI, document: dict[str, Any] | None = None) -> int:
+        """Write the root document and its shards.
+
+        Args:
+            openapi: The document to write.
+            document: The document already converted by to_dict, if available,
+                so it is not converted again.
+
+        Returns:
+            The number of files written, unchanged files not included.
+
+        """
+        header = openapi.header(document)
+        path_items = list(openapi.iter_path_items(document))
+        skip = common_segments(pattern for pattern, _ in path_items)
+        shards: dict[str, dict[str, Any]] = {}
+        for pattern, path_item in path_items:
+            name = self._file_name(shard_name(pattern, skip, self.depth))
+            shards.setdefault(name, {})[pattern] = path_item
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+        root_name = relative(self.output, self.shards_dir)
+        old_digests = self._read_manifest()
+        digests: dict[str, str] = {}
+        written = 0
+        with write_pool(self.writers) as executor:
+            futures = {
+                name: executor.submit(
+                    self._write_shard,
+                    name,
+                    rebase_refs(items, root_name) if "components" in header else items,
+                    old_digests.get(name),
+                )
+                for name, items in shards.items()
+            }
+            for name, future in futures.items():
+                digests[name], changed = future.result()
+                written += changed
+        prefix = relative(self.shards_dir, self.output.parent)
+        prefix = "" if prefix == "." else f"{prefix}/"
+        paths = {
+            pattern: {"$ref": f"{prefix}{name}#{json_pointer(pattern)}"}
+            for name, items in shards.items()
+            for pattern in items
+        }
+        content = render({**header, "paths": paths}, self.output_format)
+        digests[root_name], changed = self._write_file(
+            self.output, content, old_digests.get(root_name)
+        )
+        written += changed
+        for name in old_digests.keys() - digests.keys():
+            # Only shards are removed, never a former root document.
+            if "/" not in name:
+                (self.shards_dir / name).unlink(missing_ok=True)
+        if digests != old_digests:
+            write_atomic(self.manifest_file, json.dumps(digests, sort_keys=True))
+        self.files = [
+            self.output,
+            self.manifest_file,
+            *(self.shards_dir / name for name in shards),
+        ]
+        logger.debug("Wrote %d of %d files", written, len(digests))
+        return written
+
+    def _file_name(self, shard: str) -> str:
+        name = f"{shard}.{self.output_format}"
+        if self.shards_dir / name == self.output:
+            name = f"{shard}_paths.{self.output_format}"
+        return name
+
+    def _write_shard(
+        self, name: str, items: dict[str, Any], old_digest: str | None
+    ) -> tuple[str, bool]:
+        content = render(items, self.output_format)
+        return self._write_file(self.shards_dir / name, content, old_digest)
+
+    @staticmethod
+    def _write_file(
+        path: Path, content: str, old_digest: str | None
+    ) -> tuple[str, bool]:
+        """Write content to path if it changed, return its digest and whether it did."""
+        digest = content_hash(content.encode())
+        if digest == old_digest and path.is_file():
+            return digest, False
+        write_atomic(path, content)
+        return digest, True
+
+    def _read_manifest(self) -> dict[str, str]:
+        try:
+            digests = json.loads(self.manifest_file.read_bytes())
+        except (OSError, ValueError):
+            return {}
+        return digests if isinstance(digests, dict) else {}
+
+
+def write_pool(writers: int) -> "ThreadPoolExecutor":
+    """Return a pool of threads rendering and writing shards."""
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    return ThreadPoolExecutor(max_workers=writers, thread_name_prefix="papyrus-write")
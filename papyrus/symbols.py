@@ -0,0 +1,250 @@
+"""Module resolving the constants routes and views refer to by name."""
+
+import ast
+import logging
+from collections.abc import Callable, Generator, Iterable
+from pathlib import Path
+from typing import cast
+
+from papyrus.modules import find_module
+from papyrus.pyramid import FileFacts, ModuleSymbols, Symbol, Value
+
+logger = logging.getLogger(__name__)
+
+# The constants of a module, and the module and name each of its imports binds.
+type SymbolTable = tuple[dict[str, Value], dict[str, tuple[str, str]]]
+
+
+def node_value(node: ast.expr | None) -> Value | None:
+    """Return the string of a literal, the symbol of a dotted name, or None."""
+    if isinstance(node, ast.Constant):
+        return node.value if isinstance(node.value, str) else None
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return Symbol(".".join(reversed(parts)))
+
+
+def module_symbols(tree: ast.Module) -> ModuleSymbols:
+    """Return the string constants and the imports of the body of a module.
+
+    Only the last binding of a name counts, and a name last bound to anything
+    but a string or another name is left out.
+    """
+    constants: dict[str, Value] = {}
+    imports: dict[str, tuple[str, str]] = {}
+    for statement in tree.body:
+        for name, bound in iter_bindings(statement):
+            constants.pop(name, None)
+            imports.pop(name, None)
+            if isinstance(bound, tuple):
+                imports[name] = bound
+            elif bound is not None:
+                constants[name] = bound
+    return ModuleSymbols(
+        constants=tuple(constants.items()),
+        imports=tuple(
+            (name, module, imported) for name, (module, imported) in imports.items()
+        ),
+    )
+
+
+def iter_bindings(
+    statement: ast.stmt,
+) -> Generator[tuple[str, Value | tuple[str, str] | None]]:
+    """Yield the names a module-level statement binds, with what they are bound to.
+
+    A name is bound to a value, to the module and name it is imported from (the
+    name being empty for a module), or to None when it cannot be a string.
+    """
+    if isinstance(statement, ast.Assign | ast.AnnAssign | ast.AugAssign):
+        targets = (
+            statement.targets
+            if isinstance(statement, ast.Assign)
+            else [statement.target]
+        )
+        value = (
+            None
+            if isinstance(statement, ast.AugAssign)
+            else node_value(statement.value)
+        )
+        for target in targets:
+            if isinstance(target, ast.Name):
+                yield target.id, value
+    elif isinstance(statement, ast.ImportFrom):
+        module = "." * statement.level + (statement.module or "")
+        for alias in statement.names:
+            if alias.name != "*":
+                yield alias.asname or alias.name, (module, alias.name)
+    elif isinstance(statement, ast.Import):
+        for alias in statement.names:
+            if alias.asname:
+                yield alias.asname, (alias.name, "")
+            else:
+                package = alias.name.partition(".")[0]
+                yield package, (package, "")
+
+
+def read_symbols(path: Path) -> ModuleSymbols:
+    """Return the symbols of a python file, or none when it cannot be parsed."""
+    try:
+        return module_symbols(ast.parse(path.read_bytes()))
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning("Could not read the constants of %s: %s", path, e)
+        return ModuleSymbols()
+
+
+class SymbolIndex:
+    """Index of the module-level string constants of a project and its imports.
+
+    The symbols of each module are read once, on first use, and each name is
+    resolved once per module it is used in, following imports and assignments
+    from other names across modules. Using a name again is a dictionary lookup,
+    and the modules defining constants are not parsed again for every use.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path,
+        get_symbols: Callable[[Path], ModuleSymbols] = read_symbols,
+    ) -> None:
+        """Initialize an empty index.
+
+        Args:
+            base_dir: The base directory of the pyramid application, also
+                searched for absolute module names.
+            get_symbols: Returns the symbols of an existing python file.
+
+        """
+        self.base_dir = base_dir
+        self.get_symbols = get_symbols
+        self._tables: dict[Path, SymbolTable] = {}
+        self._values: dict[tuple[Path, str], str | None] = {}
+        self._modules: dict[tuple[Path, str], Path | None] = {}
+
+    def resolve(
+        self, path: Path, facts: FileFacts, pairs: Iterable[tuple[Value, Value]]
+    ) -> Generator[tuple[str, str]]:
+        """Yield pairs of the facts of path with their symbols replaced.
+
+        Pairs naming something that is not a string constant are skipped.
+
+        Args:
+            path: The python file the facts were extracted from.
+            facts: The facts of path, whose symbols are used when they have any.
+            pairs: Routes or views of facts.
+
+        """
+        if facts.symbols is None:
+            # Facts without symbols only hold strings.
+            yield from cast("Iterable[tuple[str, str]]", pairs)
+            return
+        self._tables.setdefault(path, symbol_table(facts.symbols))
+        for pair in pairs:
+            first, second = self.value(pair[0], path), self.value(pair[1], path)
+            if first and second:
+                yield first, second
+            else:
+                logger.warning("Skipping %s in %s, not string constants", pair, path)
+
+    def value(self, value: Value, path: Path) -> str | None:
+        """Return the string value stands for in path, None if it is not known."""
+        if isinstance(value, str):
+            return value
+        return self._lookup(path, value.name, frozenset())
+
+    def _lookup(
+        self, path: Path, name: str, seen: frozenset[tuple[Path, str]]
+    ) -> str | None:
+        key = (path, name)
+        if key in self._values:
+            return self._values[key]
+        if key in seen:
+            logger.warning("Skipping circular definition of %s in %s", name, path)
+            return None
+        value = self._find(path, name, seen | {key})
+        self._values[key] = value
+        return value
+
+    def _find(
+        self, path: Path, name: str, seen: frozenset[tuple[Path, str]]
+    ) -> str | None:
+        """Return the string the dotted name has in the module at path."""
+        head, _, rest = name.partition(".")
+        constants, imports = self._table(path)
+        value = constants.get(head)
+        # A string constant has no attributes.
+        if isinstance(value, str):
+            return None if rest else value
+        if value is not None:
+            return self._lookup(path, f"{value.name}.{rest}".rstrip("."), seen)
+        if head in imports:
+            module, imported = imports[head]
+            target = self._module(module, path)
+            name = ".".join(part for part in (imported, rest) if part)
+            return self._lookup(target, name, seen) if target and name else None
+        if rest and path.name == "__init__.py":
+            # The attribute of a package may be one of its modules.
+            target = self._module(f".{head}", path)
+            if target is not None:
+                return self._lookup(target, rest, seen)
+        return None
+
+    def _table(self, path: Path) -> SymbolTable:
+        table = self._tables.get(path)
+        if table is None:
+            symbols = self.get_symbols(path) if path.is_file() else ModuleSymbols()
+            table = self._tables[path] = symbol_table(symbols)
+        return table
+
+    def _module(self, module: str, importing_file: Path) -> Path | None:
+        key = (importing_file, module)
+        if key not in self._modules:
+            self._modules[key] = find_module(module, importing_file, self.base_dir)
+        return self._modules[key]
+
+    @property
+    def modules(self) -> set[Path]:
+        """Return the files whose symbols were looked up."""
+        return set(self._tables)
+
+    def invalidate(self, changed_paths: Iterable[Path]) -> bool:
+        """Forget what is known about changed files.
+
+        Args:
+            changed_paths: Files that were created, modified or deleted.
+
+        Returns:
+            Whether names used in other files may now have another value,
+            because a changed file is imported from or may be a module that
+            could not be found before.
+
+        """
+        changed = set(changed_paths)
+        targets = set(self._modules.values())
+        affected = bool(changed & targets) or (
+            None in targets and any(path.suffix == ".py" for path in changed)
+        )
+        for path in changed:
+            self._tables.pop(path, None)
+        if affected:
+            self._values.clear()
+            self._modules.clear()
+        else:
+            self._values = {
+                key: value
+                for key, value in self._values.items()
+                if key[0] not in changed
+            }
+        return affected
+
+
+def symbol_table(symbols: ModuleSymbols) -> SymbolTable:
+    """Return the symbols of a module as dictionaries, for lookups by name."""
+    return dict(symbols.constants), {
+        name: (module, imported) for name, module, imported in symbols.imports
+    }
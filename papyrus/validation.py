@@ -0,0 +1,67 @@
+"""Module responsible for validating the generated OpenAPI document."""
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import StrEnum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationMode(StrEnum):
+    """When the generated document is validated."""
+
+    OFF = "off"
+    BACKGROUND = "background"
+    STRICT = "strict"
+
+
+def validate_document(document: dict[str, Any]) -> bool:
+    """Validate an unstructured OpenAPI document, logging what is wrong with it.
+
+    Args:
+        document: The document, as returned by OpenAPI.to_dict.
+
+    Returns:
+        Whether the document is valid.
+
+    """
+    # openapi_spec_validator takes longer to import than a small run takes, so
+    # it is only imported when a document is validated.
+    from openapi_spec_validator import validate  # noqa: PLC0415
+    from openapi_spec_validator.exceptions import (  # noqa: PLC0415
+        OpenAPISpecValidatorError,
+    )
+    from openapi_spec_validator.validation.exceptions import (  # noqa: PLC0415
+        OpenAPIValidationError,
+        UnresolvableParameterError,
+    )
+
+    try:
+        validate(document)
+    # Caught first, as it subclasses OpenAPIValidationError: the placeholders
+    # of patterns with a regex, like {id:\d+}, are not parameters it knows.
+    except UnresolvableParameterError as e:
+        logger.info(e)
+    except (OpenAPISpecValidatorError, OpenAPIValidationError) as e:
+        logger.error(e)
+        return False
+    return True
+
+
+def validate_in_background(document: dict[str, Any]) -> Future[bool]:
+    """Start validating document in a worker thread.
+
+    The document must not be modified until the returned future is done.
+
+    Args:
+        document: The document, as returned by OpenAPI.to_dict.
+
+    Returns:
+        A future resolving to whether the document is valid.
+
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="validate")
+    future = executor.submit(validate_document, document)
+    executor.shutdown(wait=False)
+    return future
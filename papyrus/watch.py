@@ -0,0 +1,318 @@
+"""Module responsible for regenerating the OpenAPI document when sources change."""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Generator, Iterable
+from pathlib import Path
+
+from papyrus.components import share_components
+from papyrus.finder import Finder
+from papyrus.project import Project
+from papyrus.sharding import ShardWriter
+from papyrus.writing import OpenAPI, OutputFormat, open_atomic
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+# Seconds between two checks of the stop event of iter_changes.
+STOP_INTERVAL = 0.5
+
+
+class Watcher(ABC):
+    """Abstract base class for file system watchers."""
+
+    @abstractmethod
+    def read_changes(self, timeout: float | None = None) -> set[Path]:
+        """Wait up to timeout seconds (forever if None) for changed paths."""
+
+    @abstractmethod
+    def add_directories(self, directories: Iterable[Path]) -> None:
+        """Also watch directories, the ones already watched are ignored."""
+
+    def close(self) -> None:  # noqa: B027
+        """Release the resources of the watcher."""
+
+
+class InotifyWatcher(Watcher):
+    """Watcher backed by Linux inotify, called through ctypes."""
+
+    def __init__(self, directories: Iterable[Path], trees: Iterable[Path]) -> None:
+        """Watch directories, and trees including their future subdirectories.
+
+        Raises:
+            OSError: If inotify is not available.
+
+        """
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            msg = "libc not found"
+            raise OSError(msg)
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            msg = "inotify is not available"
+            raise OSError(msg)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches: dict[int, Path] = {}
+        self._trees: set[Path] = set()
+        for directory in directories:
+            self._add_watch(directory)
+        for tree in trees:
+            self._add_tree(tree)
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            logger.debug("Could not watch %s", directory)
+            return
+        self._watches[wd] = directory
+
+    def add_directories(self, directories: Iterable[Path]) -> None:
+        """Also watch directories, the ones already watched are ignored."""
+        watched = set(self._watches.values())
+        for directory in directories:
+            if directory not in watched:
+                self._add_watch(directory)
+
+    def _add_tree(self, tree: Path) -> None:
+        self._trees.add(tree)
+        self._add_watch(tree)
+        for entry in Finder.walk(tree):
+            if entry.is_dir():
+                self._add_watch(Path(entry.path))
+
+    def _in_tree(self, path: Path) -> bool:
+        return any(path.is_relative_to(tree) for tree in self._trees)
+
+    def read_changes(self, timeout: float | None = None) -> set[Path]:
+        """Wait up to timeout seconds (forever if None) for changed paths."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self._fd, READ_SIZE)
+        changes: set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                logger.debug("Inotify queue overflowed, rescanning")
+                changes.update(self._watches.values())
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            is_new_dir = mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO)
+            if is_new_dir and self._in_tree(path):
+                self._add_tree(path)
+            changes.add(path)
+        return changes
+
+    def close(self) -> None:
+        """Close the inotify file descriptor."""
+        os.close(self._fd)
+
+
+class PollingWatcher(Watcher):
+    """Watcher comparing snapshots of file sizes and mtimes, for any platform."""
+
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        trees: Iterable[Path],
+        interval: float = 0.5,
+    ) -> None:
+        """Watch the files in directories and, recursively, in trees."""
+        self.directories = list(directories)
+        self.trees = list(trees)
+        self.interval = interval
+        self._snapshot = self._scan(self.directories, self.trees)
+
+    def add_directories(self, directories: Iterable[Path]) -> None:
+        """Also watch directories, the ones already watched are ignored."""
+        new_directories = [d for d in set(directories) if d not in self.directories]
+        self.directories.extend(new_directories)
+        self._snapshot.update(self._scan(new_directories, []))
+
+    @staticmethod
+    def _scan(
+        directories: Iterable[Path], trees: Iterable[Path]
+    ) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for root, max_depth in [(d, 0) for d in directories] + [
+            (t, None) for t in trees
+        ]:
+            if not root.is_dir():
+                continue
+            for entry in Finder.walk(root, max_depth):
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read_changes(self, timeout: float | None = None) -> set[Path]:
+        """Wait up to timeout seconds (forever if None) for changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(
+                self.interval if remaining is None else min(self.interval, remaining)
+            )
+            snapshot = self._scan(self.directories, self.trees)
+            changes = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changes:
+                return changes
+
+
+def watched_directories(project: Project) -> set[Path]:
+    """Return the directories of the modules the project reads, outside its views.
+
+    These are the routes modules and the modules defining the constants routes
+    and views are added with.
+    """
+    return {
+        module.parent
+        for module in project.routes_modules | project.symbol_modules
+        if not module.is_relative_to(project.views_dir)
+    }
+
+
+def make_watcher(project: Project) -> Watcher:
+    """Return an inotify watcher for the project, or a polling one as fallback.
+
+    Call add_directories with watched_directories after each update, so the
+    modules the project starts to depend on are watched too.
+    """
+    trees = [project.views_dir]
+    directories = watched_directories(project)
+    try:
+        return InotifyWatcher(directories, trees)
+    except OSError as e:
+        logger.info("Falling back to polling for changes: %s", e)
+        return PollingWatcher(directories, trees)
+
+
+def iter_changes(
+    watcher: Watcher, debounce: float, stop: threading.Event | None = None
+) -> Generator[set[Path]]:
+    """Yield the batches of changes seen by watcher.
+
+    Changes are collected until none arrive for debounce seconds.
+
+    Args:
+        watcher: The watcher to read the changes from.
+        debounce: Seconds without changes to wait before yielding a batch.
+        stop: When given, the event that ends the iteration once set.
+
+    """
+    while stop is None or not stop.is_set():
+        changes = watcher.read_changes(None if stop is None else STOP_INTERVAL)
+        if not changes:
+            continue
+        while more_changes := watcher.read_changes(debounce):
+            changes |= more_changes
+        yield changes
+
+
+def watch(  # noqa: PLR0913
+    project: Project,
+    openapi: OpenAPI,
+    output: Path,
+    output_format: OutputFormat = OutputFormat.YAML,
+    debounce: float = 0.2,
+    *,
+    components: bool = False,
+    shard_writer: ShardWriter | None = None,
+) -> None:
+    """Keep output up to date with the project until interrupted.
+
+    Changes are collected until none arrive for debounce seconds, then only the
+    changed files are re-extracted and only their path items are rebuilt. A
+    batch that fails is logged, output is left as it is, and the path items of
+    the batch are rebuilt again with the next batch.
+
+    Args:
+        project: The loaded project to keep up to date.
+        openapi: The document generated from the project, patched in place.
+        output: The file to rewrite after each batch of changes.
+        output_format: The format to write the document in.
+        debounce: Seconds without changes to wait before regenerating.
+        components: Whether to move repeated objects to the components.
+        shard_writer: When given, writes output and the shards of its paths
+            instead, only rewriting the shards of the changed paths.
+
+    """
+    watcher = make_watcher(project)
+    logger.info("Watching %s for changes", project.base_dir)
+    # The patterns of a batch that failed, patched again with the next batch.
+    pending: set[str] = set()
+    try:
+        for changes in iter_changes(watcher, debounce):
+            start_time = time.perf_counter()
+            try:
+                patterns = project.update(changes) | pending
+                watcher.add_directories(watched_directories(project))
+                if not patterns:
+                    continue
+                pending = patterns
+                project.patch(openapi, patterns)
+                document = share_components(openapi.to_dict()) if components else None
+                if shard_writer is not None:
+                    shard_writer.write(openapi, document)
+                else:
+                    with open_atomic(output) as f:
+                        openapi.write(f, output_format, document)
+            except Exception:
+                logger.exception("Could not update %s, keeping it as it is", output)
+                continue
+            pending = set()
+            logger.info(
+                "Updated %d paths in %s (took %.4fs)",
+                len(patterns),
+                output,
+                time.perf_counter() - start_time,
+            )
+    finally:
+        watcher.close()
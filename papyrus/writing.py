@@ -1,15 +1,50 @@
 """Module responsible for writing OpenAPI documentation."""
 
+import contextlib
+import functools
+import json
+import os
+import stat
+import textwrap
+from collections.abc import Generator, Iterable, Mapping
+from contextlib import contextmanager
 from dataclasses import dataclass
-
-import yaml
-from cattrs import Converter
-from cattrs.gen import make_dict_unstructure_fn, override
+from enum import StrEnum
+from pathlib import Path
+from types import MappingProxyType
+from typing import IO, TYPE_CHECKING, Any
 
 from papyrus.pyramid import Route, extract_url_parameters
+from papyrus.route_table import RouteTable
+
+if TYPE_CHECKING:
+    from cattrs import Converter
+
+YAML_WIDTH = 80
+YAML_INDENT = 2
+JSON_INDENT = 2
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+
+class OutputFormat(StrEnum):
+    """Formats the OpenAPI document can be written in."""
+
+    YAML = "yaml"
+    JSON = "json"
 
 
-@dataclass
+# Every path parameter and operation shares these read-only objects.
+STRING_SCHEMA: Mapping[str, str] = MappingProxyType({"type": "string"})
+DEFAULT_RESPONSES: Mapping[str, Mapping[str, str]] = MappingProxyType(
+    {
+        "200": MappingProxyType({"description": "OK"}),
+        "404": MappingProxyType({"description": "Not Found"}),
+        "401": MappingProxyType({"description": "Unauthorized"}),
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
 class Info:
     """OpenAPI info object."""
 
@@ -17,57 +52,70 @@ class Info:
     version: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Parameter:
     """OpenAPI parameter object."""
 
     name: str
     _in: str
     required: bool
-    schema: dict[str, str]
+    schema: Mapping[str, str]
+
+    @staticmethod
+    @functools.cache
+    def path(name: str) -> "Parameter":
+        """Return the shared parameter of the URL placeholder name."""
+        return Parameter(name=name, _in="path", required=True, schema=STRING_SCHEMA)
+
+    @staticmethod
+    def from_pattern(pattern: str) -> tuple["Parameter", ...]:
+        """Return the shared parameters of the URL placeholders of pattern."""
+        return tuple(Parameter.path(name) for name in extract_url_parameters(pattern))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Operation:
     """OpenAPI operation object."""
 
     summary: str
     description: str
-    parameters: list[Parameter]
-    responses: dict[str, dict[str, str]]
+    parameters: tuple[Parameter, ...]
+    responses: Mapping[str, Mapping[str, str]]
 
     @classmethod
     def from_route(
-        cls: type["Operation"], route: Route, method: str
+        cls: type["Operation"],
+        route: Route,
+        method: str,
+        parameters: tuple[Parameter, ...] | None = None,
     ) -> "Operation | None":
-        """Create an Operation from a Route."""
+        """Create an Operation from a Route.
+
+        Args:
+            route: The route to document.
+            method: The request method of the operation.
+            parameters: The parameters of the route pattern, if already known.
+
+        Returns:
+            The operation, or None if the route does not accept method.
+
+        """
         if method not in route.methods:
             return None
 
         description = f"{method} {route.name}"
-        params = extract_url_parameters(route.pattern)
+        if parameters is None:
+            parameters = Parameter.from_pattern(route.pattern)
 
         return cls(
             summary=description,
             description=description,
-            parameters=[
-                Parameter(
-                    name=param,
-                    _in="path",
-                    required=True,
-                    schema={"type": "string"},
-                )
-                for param in params
-            ],
-            responses={
-                "200": {"description": "OK"},
-                "404": {"description": "Not Found"},
-                "401": {"description": "Unauthorized"},
-            },
+            parameters=parameters,
+            responses=DEFAULT_RESPONSES,
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PathItem:
     """OpenAPI path item object."""
 
@@ -82,39 +130,60 @@ class PathItem:
     def from_route(cls: type["PathItem"], route: Route) -> "PathItem":
         """Create a PathItem from a Route."""
         description = f"{route.name}"
+        parameters = Parameter.from_pattern(route.pattern)
         return cls(
             summary=description,
             description=description,
-            get=Operation.from_route(route, "GET"),
-            post=Operation.from_route(route, "POST"),
-            put=Operation.from_route(route, "PUT"),
-            delete=Operation.from_route(route, "DELETE"),
+            get=Operation.from_route(route, "GET", parameters),
+            post=Operation.from_route(route, "POST", parameters),
+            put=Operation.from_route(route, "PUT", parameters),
+            delete=Operation.from_route(route, "DELETE", parameters),
         )
 
 
-c = Converter()
-c.register_unstructure_hook(
-    Parameter,
-    make_dict_unstructure_fn(
+@functools.cache
+def converter() -> "Converter":
+    """Return the converter unstructuring OpenAPI objects.
+
+    It is built on first use, so that importing this module (for OutputFormat,
+    say) does not import cattrs.
+    """
+    from cattrs import Converter  # noqa: PLC0415
+    from cattrs.gen import make_dict_unstructure_fn, override  # noqa: PLC0415
+
+    c = Converter()
+    c.register_unstructure_hook(
         Parameter,
-        c,
-        _in=override(rename="in"),
-    ),
-)
-c.register_unstructure_hook(
-    PathItem,
-    make_dict_unstructure_fn(
+        make_dict_unstructure_fn(
+            Parameter,
+            c,
+            _in=override(rename="in"),
+        ),
+    )
+    c.register_unstructure_hook(
         PathItem,
-        c,
-        get=override(omit_if_default=True),
-        post=override(omit_if_default=True),
-        put=override(omit_if_default=True),
-        delete=override(omit_if_default=True),
-    ),
-)
+        make_dict_unstructure_fn(
+            PathItem,
+            c,
+            get=override(omit_if_default=True),
+            post=override(omit_if_default=True),
+            put=override(omit_if_default=True),
+            delete=override(omit_if_default=True),
+        ),
+    )
+    return c
+
+
+def dump_yaml(data: Any, width: int = YAML_WIDTH) -> str:  # noqa: ANN401
+    """Dump data to a YAML string."""
+    import yaml  # noqa: PLC0415
+
+    # libyaml's emitter is much faster than the pure python one, when it is built.
+    dumper: type[yaml.SafeDumper] = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return yaml.dump(data, Dumper=dumper, width=width)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OpenAPI:
     """OpenAPI root object."""
 
@@ -123,16 +192,160 @@ class OpenAPI:
     paths: dict[str, PathItem]
 
     @classmethod
-    def from_routes(cls: type["OpenAPI"], routes: list[Route]) -> "OpenAPI":
-        """Create a OpenAPI object from a list of routes."""
+    def from_routes(cls: type["OpenAPI"], routes: Iterable[Route]) -> "OpenAPI":
+        """Create a OpenAPI object from routes.
+
+        Routes sharing a pattern are merged into a single path item.
+        """
         return cls(
             openapi="3.0.3",
             info=Info(title="API", version="1.0.0"),
-            paths={route.pattern: PathItem.from_route(route) for route in routes},
+            paths={
+                route.pattern: PathItem.from_route(route)
+                for route in RouteTable(routes).merged()
+            },
         )
 
     def to_yaml(self) -> str:
         """Convert the OpenAPI object to a YAML string."""
-        return yaml.dump(
-            c.unstructure(self),
+        return dump_yaml(self.to_dict())
+
+    def to_json(self) -> str:
+        """Convert the OpenAPI object to a JSON string."""
+        return json.dumps(self.to_dict(), indent=JSON_INDENT, sort_keys=True) + "\n"
+
+    def render(self, output_format: OutputFormat = OutputFormat.YAML) -> str:
+        """Convert the OpenAPI object to a string in the given format."""
+        if output_format is OutputFormat.JSON:
+            return self.to_json()
+        return self.to_yaml()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the OpenAPI object to plain python data."""
+        return converter().unstructure(self)  # type: ignore[no-any-return]
+
+    def write(
+        self,
+        stream: IO[str],
+        output_format: OutputFormat = OutputFormat.YAML,
+        document: dict[str, Any] | None = None,
+    ) -> None:
+        """Write the document to stream one path item at a time.
+
+        The output is identical to render, but neither the whole unstructured
+        document nor the whole string is ever held in memory.
+
+        Args:
+            stream: The stream to write to.
+            output_format: The format to write the document in.
+            document: The document already converted by to_dict, if available,
+                so it is not converted again.
+
+        """
+        chunks = (
+            self.iter_json(document)
+            if output_format is OutputFormat.JSON
+            else self.iter_yaml(document)
         )
+        stream.writelines(chunks)
+
+    def iter_yaml(self, document: dict[str, Any] | None = None) -> Generator[str]:
+        """Yield the YAML document in chunks, one per path item."""
+        header = self.header(document)
+        if before := {key: value for key, value in header.items() if key < "paths"}:
+            yield dump_yaml(before)
+        if not self.paths:
+            yield "paths: {}\n"
+        else:
+            yield "paths:\n"
+        indent = " " * YAML_INDENT
+        for pattern, path_item in self.iter_path_items(document):
+            # Narrower, so lines wrap where they would inside the whole document.
+            chunk = dump_yaml({pattern: path_item}, width=YAML_WIDTH - YAML_INDENT)
+            yield textwrap.indent(chunk, indent)
+        if after := {key: value for key, value in header.items() if key > "paths"}:
+            yield dump_yaml(after)
+
+    def iter_json(self, document: dict[str, Any] | None = None) -> Generator[str]:
+        """Yield the JSON document in chunks, one per path item."""
+        header = self.header(document)
+        indent = " " * JSON_INDENT
+        separator = "{\n"
+        for key in sorted([*header, "paths"]):
+            yield f"{separator}{indent}{json.dumps(key)}: "
+            separator = ",\n"
+            if key != "paths":
+                value = json.dumps(header[key], indent=JSON_INDENT, sort_keys=True)
+                yield textwrap.indent(value, indent).lstrip()
+                continue
+            if not self.paths:
+                yield "{}"
+                continue
+            path_separator = "{\n"
+            for pattern, path_item in self.iter_path_items(document):
+                value = json.dumps(path_item, indent=JSON_INDENT, sort_keys=True)
+                value = textwrap.indent(value, indent * 2).lstrip()
+                yield f"{path_separator}{indent * 2}{json.dumps(pattern)}: {value}"
+                path_separator = ",\n"
+            yield f"\n{indent}}}"
+        yield "\n}\n"
+
+    def header(self, document: dict[str, Any] | None) -> dict[str, Any]:
+        """Return the unstructured document without its paths."""
+        if document is not None:
+            return {key: value for key, value in document.items() if key != "paths"}
+        return {"info": converter().unstructure(self.info), "openapi": self.openapi}
+
+    def iter_path_items(
+        self, document: dict[str, Any] | None
+    ) -> Generator[tuple[str, Any]]:
+        """Yield the unstructured path items, sorted by pattern."""
+        if document is not None:
+            paths = document["paths"]
+            for pattern in sorted(paths):
+                yield pattern, paths[pattern]
+            return
+        unstructure = converter().unstructure
+        for pattern in sorted(self.paths):
+            yield pattern, unstructure(self.paths[pattern])
+
+
+@contextmanager
+def open_atomic(path: Path) -> Generator[IO[str]]:
+    """Open path for writing so readers never see a partially written file.
+
+    The content goes to a temporary file that replaces path once the block exits
+    without an error. The file keeps the mode of the file it replaces, and a new
+    file gets the mode open gives it, with the umask applied.
+    """
+    temp_path, fd = create_temporary(path)
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+        with contextlib.suppress(OSError):
+            temp_path.chmod(stat.S_IMODE(path.stat().st_mode))
+    except BaseException:
+        temp_path.unlink()
+        raise
+    temp_path.replace(path)
+
+
+def create_temporary(path: Path) -> tuple[Path, int]:
+    """Create a new hidden file next to path and return it with its descriptor.
+
+    Unlike tempfile, the file is created with the mode 0o666 minus the umask,
+    so that replacing path with it does not make path private.
+    """
+    while True:
+        temp_path = path.with_name(f".{path.name}.{os.urandom(4).hex()}")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        return temp_path, fd
+
+
+def write_atomic(path: Path, content: str) -> None:
+    """Write content to path so readers never see a partially written file."""
+    with open_atomic(path) as f:
+        f.write(content)
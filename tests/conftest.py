@@ -1,10 +1,33 @@
 """Pytest conftest file."""
 
+import textwrap
+from collections.abc import Callable
 from pathlib import Path
 
 import pytest
 
 
+class CountingCalls[T]:
+    """Function of a path recording which paths it was called with."""
+
+    def __init__(self: "CountingCalls[T]", function: Callable[[Path], T]) -> None:
+        """Wrap function, with no call recorded."""
+        self.function = function
+        self.paths: list[Path] = []
+
+    def __call__(self: "CountingCalls[T]", path: Path) -> T:
+        """Record the call and return what function returns."""
+        self.paths.append(path)
+        return self.function(path)
+
+
+def write(path: Path, source: str) -> Path:
+    """Write dedented source to path, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(source))
+    return path
+
+
 @pytest.fixture
 def pyramid_app_dir(tmp_path: Path) -> Path:
     """Fixture for a directory with routes."""
@@ -0,0 +1,85 @@
+"""Tests for the synthetic app generator and the benchmarks."""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_memory import measure_models
+from benchmarks.bench_stages import compare
+from benchmarks.generator import (
+    ROUTES_FILE_NAME,
+    VIEWS_DIR_NAME,
+    AppSpec,
+    generate_app,
+)
+from papyrus.parsing import Parser
+from papyrus.pyramid import PyramidInfo
+
+
+class TestGenerator:
+    """Tests for generate_app."""
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            AppSpec(),
+            AppSpec(routes=30, view_files=50, decorators_per_view=6, depth=0),
+            AppSpec(routes=0, view_files=1, noise_files=0),
+        ],
+    )
+    def test_routes_are_extracted(
+        self: "TestGenerator", tmp_path: Path, spec: AppSpec
+    ) -> None:
+        """Test papyrus finds exactly the routes the generator wrote."""
+        app = generate_app(tmp_path, spec)
+        pyramid_info = PyramidInfo(
+            views_dir_name=VIEWS_DIR_NAME, routes_file_name=ROUTES_FILE_NAME
+        )
+        routes = Parser.get_routes(tmp_path, pyramid_info)
+        assert sorted(routes, key=lambda route: route.name) == sorted(
+            app.routes, key=lambda route: route.name
+        )
+
+    def test_shape(self: "TestGenerator", tmp_path: Path) -> None:
+        """Test the views are nested depth packages deep among noise files."""
+        generate_app(tmp_path, AppSpec(view_files=5, depth=3, noise_files=4))
+        views = list((tmp_path / VIEWS_DIR_NAME).rglob("views_*.py"))
+        assert len(views) == 5  # noqa: PLR2004
+        assert all(
+            len(view.relative_to(tmp_path / VIEWS_DIR_NAME).parts) == 4  # noqa: PLR2004
+            for view in views
+        )
+        assert len(list(tmp_path.rglob("noise_*.py"))) == 4  # noqa: PLR2004
+
+
+class TestCompare:
+    """Tests for the comparison against a baseline."""
+
+    def test_regressions(self: "TestCompare") -> None:
+        """Test only slowdowns above both thresholds are regressions."""
+        baseline = {"extraction": {"cold": 1.0, "warm": 0.5}, "model": {"warm": 0.001}}
+        results = {
+            "extraction": {"cold": 1.1, "warm": 1.0},
+            "model": {"warm": 0.002},
+            "validation": {"warm": 2.0},
+        }
+        comparison = compare(baseline, results, threshold=0.2, min_delta=0.005)
+        assert [
+            (stage, state, regressed) for stage, state, *_, regressed in comparison
+        ] == [
+            ("extraction", "cold", False),
+            ("extraction", "warm", True),
+            ("model", "warm", False),
+        ]
+
+
+class TestMeasureModels:
+    """Tests for the memory benchmark."""
+
+    def test_measure_models(self: "TestMeasureModels", tmp_path: Path) -> None:
+        """Test the memory of both models is measured."""
+        app = generate_app(tmp_path, AppSpec(routes=30, view_files=3, noise_files=0))
+        n_routes, sizes = measure_models(tmp_path, jobs=1)
+        assert n_routes == len(app.documented_routes)
+        assert set(sizes) == {"routes", "model"}
+        assert all(size > 0 for size in sizes.values())
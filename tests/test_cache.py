@@ -0,0 +1,118 @@
+"""Tests for the cache module."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from papyrus.cache import CACHE_DIR_NAME, ExtractionCache
+from papyrus.parsing import Parser
+from papyrus.pyramid import FileFacts, PyramidInfo
+
+
+class CountingExtractor:
+    """Extractor that counts how many times it was called."""
+
+    def __init__(self: "CountingExtractor") -> None:
+        """Initialize the call counter."""
+        self.calls = 0
+
+    def __call__(self: "CountingExtractor", source: bytes) -> FileFacts:
+        """Extract the facts with the parser."""
+        self.calls += 1
+        return Parser.extract_facts(source)
+
+
+class TestExtractionCache:
+    """Tests for the ExtractionCache class."""
+
+    @pytest.fixture
+    def views_file(self: "TestExtractionCache", pyramid_app_dir: Path) -> Path:
+        """Fixture for a views file."""
+        return pyramid_app_dir / "views" / "views.py"
+
+    @pytest.fixture
+    def cache_dir(self: "TestExtractionCache", pyramid_app_dir: Path) -> Path:
+        """Fixture for the cache directory."""
+        return pyramid_app_dir / CACHE_DIR_NAME
+
+    def test_hit_after_save(
+        self: "TestExtractionCache", cache_dir: Path, views_file: Path
+    ) -> None:
+        """Test unchanged files are served from a reloaded cache."""
+        extract = CountingExtractor()
+        cache = ExtractionCache.load(cache_dir)
+        facts = cache.get_or_extract(views_file, extract)
+        cache.save()
+
+        reloaded = ExtractionCache.load(cache_dir)
+        assert reloaded.get_or_extract(views_file, extract) == facts
+        assert extract.calls == 1
+        assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+    def test_touched_file_hits_by_digest(
+        self: "TestExtractionCache", cache_dir: Path, views_file: Path
+    ) -> None:
+        """Test a file with a new mtime but the same content is not parsed again."""
+        extract = CountingExtractor()
+        cache = ExtractionCache.load(cache_dir)
+        cache.get_or_extract(views_file, extract)
+        stat = views_file.stat()
+        os.utime(views_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        cache.get_or_extract(views_file, extract)
+        assert extract.calls == 1
+        assert cache.hits == 1
+
+    def test_changed_file_misses(
+        self: "TestExtractionCache", cache_dir: Path, views_file: Path
+    ) -> None:
+        """Test a file with new content is parsed again."""
+        extract = CountingExtractor()
+        cache = ExtractionCache.load(cache_dir)
+        cache.get_or_extract(views_file, extract)
+        views_file.write_text(
+            "@view_config(route_name='new', request_method='GET')\ndef f(): ..."
+        )
+
+        facts = cache.get_or_extract(views_file, extract)
+        assert facts.views == (("new", "GET"),)
+        assert extract.calls == 2  # noqa: PLR2004
+
+    def test_other_version_is_ignored(
+        self: "TestExtractionCache",
+        cache_dir: Path,
+        views_file: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test a cache written by another papyrus version is not reused."""
+        cache = ExtractionCache.load(cache_dir)
+        cache.get_or_extract(views_file, Parser.extract_facts)
+        cache.save()
+
+        monkeypatch.setattr("papyrus.cache.cache_version", lambda: "other")
+        reloaded = ExtractionCache.load(cache_dir)
+        assert reloaded.get(views_file, (0, 0)) is None
+        reloaded.get_or_extract(views_file, Parser.extract_facts)
+        assert reloaded.misses == 1
+
+    def test_clear(self: "TestExtractionCache", cache_dir: Path) -> None:
+        """Test clear removes the cache directory."""
+        cache_dir.mkdir()
+        ExtractionCache.clear(cache_dir)
+        assert not cache_dir.exists()
+
+    def test_get_routes_with_cache(
+        self: "TestExtractionCache", pyramid_app_dir: Path, cache_dir: Path
+    ) -> None:
+        """Test the parser gives the same routes with a cold and a warm cache."""
+        pyramid_info = PyramidInfo(routes_file_name="routes.py", views_dir_name="views")
+        expected = Parser.get_routes(pyramid_app_dir, pyramid_info)
+
+        cold_cache = ExtractionCache.load(cache_dir)
+        assert Parser.get_routes(pyramid_app_dir, pyramid_info, cold_cache) == expected
+        cold_cache.save()
+
+        warm_cache = ExtractionCache.load(cache_dir)
+        assert Parser.get_routes(pyramid_app_dir, pyramid_info, warm_cache) == expected
+        assert warm_cache.misses == 0
@@ -0,0 +1,112 @@
+"""Tests for the components module."""
+
+import copy
+import re
+from typing import Any
+
+from papyrus.components import (
+    ComponentTable,
+    parameter_name,
+    response_name,
+    share_components,
+)
+from papyrus.pyramid import Route
+from papyrus.validation import validate_document
+from papyrus.writing import OpenAPI
+
+
+def make_document() -> dict[str, Any]:
+    """Return a document with parameters repeated across operations."""
+    return OpenAPI.from_routes(
+        [
+            Route(name="user", pattern="/user/{id}", methods={"GET", "DELETE"}),
+            Route(name="item", pattern="/item/{id}", methods={"PUT"}),
+            Route(name="home", pattern="/", methods={"GET"}),
+        ]
+    ).to_dict()
+
+
+class TestComponentTable:
+    """Tests for the ComponentTable class."""
+
+    def test_shares_repeated_objects(self: "TestComponentTable") -> None:
+        """Test only objects seen several times and longer than a $ref are shared."""
+        long = {
+            "description": "Created",
+            "content": {"application/json": {"schema": {"type": "object"}}},
+        }
+        short = {"description": "OK"}
+        once = {**long, "description": "Accepted"}
+        table = ComponentTable(
+            "responses",
+            [long, dict(long), short, dict(short), once],
+            response_name,
+        )
+        assert table.components == {"Created": long}
+        assert table.ref(dict(long)) == {"$ref": "#/components/responses/Created"}
+        assert table.ref(short) is short
+        assert table.ref(once) is once
+
+    def test_unique_names(self: "TestComponentTable") -> None:
+        """Test different objects with the same name get numbered names."""
+        first = {"description": "Not found", "x-reason": "no user with this id"}
+        second = {"description": "Not found", "x-reason": "no item with this id"}
+        table = ComponentTable(
+            "responses", [first, first, second, second], response_name
+        )
+        assert table.components == {"NotFound": first, "NotFound2": second}
+
+
+class TestShareComponents:
+    """Tests for the share_components function."""
+
+    def test_parameters_are_shared(self: "TestShareComponents") -> None:
+        """Test the repeated path parameter is moved to the components."""
+        document = make_document()
+        shared = share_components(document)
+        assert set(shared["components"]["parameters"]) == {"id"}
+        ref = {"$ref": "#/components/parameters/id"}
+        assert shared["paths"]["/user/{id}"]["get"]["parameters"] == [ref]
+        assert shared["paths"]["/item/{id}"]["put"]["parameters"] == [ref]
+        assert shared["paths"]["/"] == document["paths"]["/"]
+
+    def test_document_is_not_modified(self: "TestShareComponents") -> None:
+        """Test the original document is left as it was."""
+        document = make_document()
+        original = copy.deepcopy(document)
+        share_components(document)
+        assert document == original
+
+    def test_nothing_to_share(self: "TestShareComponents") -> None:
+        """Test a document without repeated objects gets no components."""
+        document = OpenAPI.from_routes(
+            [Route(name="a", pattern="/a/{id}", methods={"GET"})]
+        ).to_dict()
+        assert share_components(document) == document
+
+    def test_valid(self: "TestShareComponents") -> None:
+        """Test the document with components is still a valid document."""
+        assert validate_document(share_components(make_document()))
+
+    def test_parameter_names(self: "TestShareComponents") -> None:
+        """Test parameter names are made valid component keys, without collisions."""
+        assert parameter_name({"name": "id:\\d+"}) == "id_d"
+        assert parameter_name({"name": "{}"}) == "parameter"
+        document = share_components(
+            OpenAPI.from_routes(
+                [
+                    Route(name="a", pattern="/a/{id:\\d+}", methods={"GET", "PUT"}),
+                    Route(name="b", pattern="/b/{a/b}", methods={"GET", "PUT"}),
+                    Route(name="c", pattern="/c/{a~b}", methods={"GET", "PUT"}),
+                ]
+            ).to_dict()
+        )
+        parameters = document["components"]["parameters"]
+        assert sorted(parameters) == ["a_b", "a_b2", "id_d"]
+        assert all(re.fullmatch(r"[A-Za-z0-9._-]+", name) for name in parameters)
+        for path_item in document["paths"].values():
+            for method in ("get", "put"):
+                (parameter,) = path_item[method]["parameters"]
+                name = parameter["$ref"].removeprefix("#/components/parameters/")
+                assert name in parameters
+        assert validate_document(document)
@@ -0,0 +1,161 @@
+"""Tests for the diff module."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from papyrus.components import share_components
+from papyrus.diff import (
+    Change,
+    ChangeKind,
+    DiffFormat,
+    diff_documents,
+    format_changes,
+    load_document,
+    path_hashes,
+    stable_hash,
+)
+from papyrus.pyramid import Route
+from papyrus.sharding import ShardWriter
+from papyrus.writing import OpenAPI, OutputFormat
+
+
+def make_document(*routes: Route) -> dict[str, Any]:
+    """Return the unstructured document of routes."""
+    return OpenAPI.from_routes(list(routes)).to_dict()
+
+
+class TestDiff:
+    """Tests for comparing documents."""
+
+    def test_stable_hash_ignores_key_order(self: "TestDiff") -> None:
+        """Test the digest does not depend on the order of keys."""
+        assert stable_hash({"a": 1, "b": [1, 2]}) == stable_hash({"b": [1, 2], "a": 1})
+        assert stable_hash({"a": [1, 2]}) != stable_hash({"a": [2, 1]})
+
+    def test_same_document(self: "TestDiff") -> None:
+        """Test identical documents have no changes."""
+        document = make_document(Route(name="a", pattern="/a", methods={"GET"}))
+        assert diff_documents(document, json.loads(json.dumps(document))) == []
+
+    def test_added_and_removed_paths(self: "TestDiff") -> None:
+        """Test whole paths are reported without their operations."""
+        old = make_document(Route(name="a", pattern="/a", methods={"GET"}))
+        new = make_document(Route(name="b", pattern="/b", methods={"GET", "POST"}))
+        assert diff_documents(old, new) == [
+            Change(ChangeKind.REMOVED, "/a"),
+            Change(ChangeKind.ADDED, "/b"),
+        ]
+
+    def test_changed_path(self: "TestDiff") -> None:
+        """Test a changed path reports its changed fields and operations."""
+        old = make_document(
+            Route(name="user", pattern="/user/{id}", methods={"GET", "DELETE"})
+        )
+        new = make_document(
+            Route(name="edit_user", pattern="/user/{id}", methods={"GET", "POST"})
+        )
+        assert diff_documents(old, new) == [
+            Change(ChangeKind.CHANGED, "/user/{id}", fields=("description", "summary")),
+            Change(ChangeKind.CHANGED, "/user/{id}", "get", ("description", "summary")),
+            Change(ChangeKind.ADDED, "/user/{id}", "post"),
+            Change(ChangeKind.REMOVED, "/user/{id}", "delete"),
+        ]
+
+    def test_only_changed_hashes_are_compared(self: "TestDiff") -> None:
+        """Test path items with the same digest are not compared in depth."""
+        old = make_document(Route(name="a", pattern="/a", methods={"GET"}))
+        new = make_document(Route(name="b", pattern="/a", methods={"GET"}))
+        hashes = path_hashes(old["paths"])
+        assert diff_documents(old, new, hashes, hashes) == []
+
+    def test_format_changes(self: "TestDiff") -> None:
+        """Test changes are printed as text lines or as JSON."""
+        changes = [
+            Change(ChangeKind.ADDED, "/a"),
+            Change(ChangeKind.CHANGED, "/b", "get", ("summary",)),
+        ]
+        assert format_changes(changes, DiffFormat.TEXT) == (
+            "added    /a\nchanged  /b GET (summary)\n"
+        )
+        assert json.loads(format_changes(changes, DiffFormat.JSON)) == [
+            {"kind": "added", "path": "/a", "method": None, "fields": []},
+            {"kind": "changed", "path": "/b", "method": "GET", "fields": ["summary"]},
+        ]
+
+
+class TestLoadDocument:
+    """Tests for the load_document function."""
+
+    @pytest.mark.parametrize("output_format", list(OutputFormat))
+    def test_load(
+        self: "TestLoadDocument", tmp_path: Path, output_format: OutputFormat
+    ) -> None:
+        """Test documents written by papyrus are loaded back."""
+        openapi = OpenAPI.from_routes(
+            [Route(name="a", pattern="/a/{id}", methods={"GET"})]
+        )
+        spec_file = tmp_path / f"openapi.{output_format}"
+        spec_file.write_text(openapi.render(output_format))
+        assert load_document(spec_file) == openapi.to_dict()
+
+    def test_components_are_resolved(self: "TestLoadDocument", tmp_path: Path) -> None:
+        """Test the $refs to components are replaced by the shared objects."""
+        openapi = OpenAPI.from_routes(
+            [
+                Route(name="a", pattern="/a/{id}", methods={"GET", "PUT"}),
+                Route(name="b", pattern="/b/{id}", methods={"GET"}),
+            ]
+        )
+        document = share_components(openapi.to_dict())
+        assert "components" in document
+        spec_file = tmp_path / "openapi.json"
+        spec_file.write_text(json.dumps(document))
+        loaded = load_document(spec_file)
+        assert diff_documents(loaded, openapi.to_dict()) == []
+        assert loaded["components"] == document["components"]
+
+    def test_circular_refs(self: "TestLoadDocument", tmp_path: Path) -> None:
+        """Test circular $refs are kept and missing ones raise ValueError."""
+        node = {"$ref": "#/components/schemas/Node"}
+        components = {"schemas": {"Node": {"properties": {"next": node}}}}
+        spec_file = tmp_path / "openapi.json"
+        spec_file.write_text(
+            json.dumps({"paths": {"/": {"get": node}}, "components": components})
+        )
+        assert load_document(spec_file)["paths"]["/"]["get"] == {
+            "properties": {"next": node}
+        }
+        spec_file.write_text(json.dumps({"paths": {"/": {"$ref": "#/missing"}}}))
+        with pytest.raises(ValueError, match="#/missing"):
+            load_document(spec_file)
+
+    @pytest.mark.parametrize("components", [False, True])
+    def test_shards_are_resolved(
+        self: "TestLoadDocument", tmp_path: Path, components: bool
+    ) -> None:
+        """Test the $refs to shards, and from shards to components, are resolved."""
+        openapi = OpenAPI.from_routes(
+            [
+                Route(name="a", pattern="/a/{id}", methods={"GET", "PUT"}),
+                Route(name="b", pattern="/b/{id}", methods={"GET"}),
+            ]
+        )
+        document = share_components(openapi.to_dict()) if components else None
+        output = tmp_path / "openapi.yaml"
+        ShardWriter(output, tmp_path / "paths").write(openapi, document)
+        assert diff_documents(load_document(output), openapi.to_dict()) == []
+
+        (tmp_path / "paths" / "a.yaml").unlink()
+        with pytest.raises(ValueError, match=r"paths/a\.yaml"):
+            load_document(output)
+
+    @pytest.mark.parametrize("content", ["- a\n- b\n", "a: [b\n"])
+    def test_invalid(self: "TestLoadDocument", tmp_path: Path, content: str) -> None:
+        """Test files without a document raise ValueError."""
+        spec_file = tmp_path / "openapi.yaml"
+        spec_file.write_text(content)
+        with pytest.raises(ValueError, match=r"openapi\.yaml|flow sequence"):
+            load_document(spec_file)
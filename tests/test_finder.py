@@ -4,7 +4,7 @@ from pathlib import Path
 
 import pytest
 
-from papyrus.finder import Finder
+from papyrus.finder import Discovery, DiscoveryStream, Finder
 
 
 class TestFinder:
@@ -75,3 +75,104 @@ class TestFinder:
         """Test the find_dir method returns first found directory in nested dirs."""
         result = Finder.find_dir(tmp_dir, "last")
         assert result == tmp_dir / "dir" / "dir" / "last"
+
+
+class TestFinderDiscover:
+    """Test suite for the Finder.discover method."""
+
+    @pytest.fixture
+    def app_dir(self: "TestFinderDiscover", tmp_path: Path) -> Path:
+        """Create an application tree with a routes file and a views directory."""
+        views_dir = tmp_path / "app" / "views"
+        (views_dir / "nested").mkdir(parents=True)
+        (tmp_path / "app" / "routes.py").touch()
+        (views_dir / "home.py").touch()
+        (views_dir / "nested" / "user.py").touch()
+        (views_dir / "README.md").touch()
+        (tmp_path / "app" / "models.py").touch()
+        return tmp_path
+
+    def test_discover_finds_everything(
+        self: "TestFinderDiscover", app_dir: Path
+    ) -> None:
+        """Test discover finds the file, the directory and the files inside it."""
+        result = Finder.discover(app_dir, "routes.py", "views", ".py")
+        views_dir = app_dir / "app" / "views"
+        assert result.routes_file == app_dir / "app" / "routes.py"
+        assert result.views_dir == views_dir
+        assert set(result.views_files) == {
+            views_dir / "home.py",
+            views_dir / "nested" / "user.py",
+        }
+
+    def test_discover_prefers_shallow_matches(
+        self: "TestFinderDiscover", app_dir: Path
+    ) -> None:
+        """Test discover returns the shallowest match (breadth-first)."""
+        deep_dir = app_dir / "a" / "b" / "c"
+        deep_dir.mkdir(parents=True)
+        (deep_dir / "routes.py").touch()
+        result = Finder.discover(app_dir, "routes.py", "views")
+        assert result.routes_file == app_dir / "app" / "routes.py"
+
+    def test_discover_skips_excluded_dirs(
+        self: "TestFinderDiscover", tmp_path: Path
+    ) -> None:
+        """Test discover never walks directories such as .venv or node_modules."""
+        for excluded in (".venv", "node_modules"):
+            (tmp_path / excluded).mkdir()
+            (tmp_path / excluded / "routes.py").touch()
+        result = Finder.discover(tmp_path, "routes.py")
+        assert result.routes_file is None
+
+    def test_discover_max_depth(self: "TestFinderDiscover", app_dir: Path) -> None:
+        """Test discover does not go deeper than max_depth."""
+        assert Finder.discover(app_dir, "routes.py", max_depth=0).routes_file is None
+        assert Finder.discover(app_dir, "routes.py", max_depth=1).routes_file
+
+    def test_discover_max_depth_walks_views_dir(
+        self: "TestFinderDiscover", app_dir: Path
+    ) -> None:
+        """Test max_depth bounds the search, not the files of the views dir."""
+        result = Finder.discover(app_dir, "routes.py", "views", max_depth=1)
+        views_dir = app_dir / "app" / "views"
+        assert result.routes_file == app_dir / "app" / "routes.py"
+        assert result.views_dir == views_dir
+        assert set(result.views_files) == {
+            views_dir / "home.py",
+            views_dir / "nested" / "user.py",
+        }
+        assert Finder.discover(app_dir, "routes.py", "views", max_depth=0) == (
+            Discovery()
+        )
+
+    def test_discover_symlink_cycle(self: "TestFinderDiscover", app_dir: Path) -> None:
+        """Test discover follows symlinks but does not loop on cycles."""
+        (app_dir / "app" / "views" / "nested" / "loop").symlink_to(app_dir / "app")
+        result = Finder.discover(app_dir, "routes.py", "views")
+        expected_length = 2
+        assert len(result.views_files) == expected_length
+
+    def test_discover_follows_symlinked_dir(
+        self: "TestFinderDiscover", tmp_path: Path, app_dir: Path
+    ) -> None:
+        """Test discover finds files through a symlinked directory."""
+        link_dir = tmp_path / "linked"
+        link_dir.mkdir()
+        (link_dir / "app").symlink_to(app_dir / "app")
+        result = Finder.discover(link_dir, "routes.py", "views")
+        assert result.routes_file == link_dir / "app" / "routes.py"
+
+    def test_stream_yields_while_walking(
+        self: "TestFinderDiscover", app_dir: Path
+    ) -> None:
+        """Test the stream yields each views file as soon as it is found."""
+        stream = DiscoveryStream(app_dir, "routes.py", "views")
+        views_files = iter(stream)
+        views_dir = app_dir / "app" / "views"
+        assert next(views_files) == views_dir / "home.py"
+        assert stream.routes_file == app_dir / "app" / "routes.py"
+        assert list(views_files) == [views_dir / "nested" / "user.py"]
+        assert stream.discovery() == Discovery(
+            routes_file=app_dir / "app" / "routes.py", views_dir=views_dir
+        )
@@ -0,0 +1,187 @@
+"""Tests for the git module and the git-aware extraction cache."""
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import papyrus.git
+from papyrus.cache import CACHE_DIR_NAME, ExtractionCache
+from papyrus.git import WorkingTree
+from papyrus.parsing import Parser
+from papyrus.pyramid import FileFacts
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def git(cwd: Path, *args: str) -> None:
+    """Run a git command in cwd."""
+    subprocess.run(  # noqa: S603
+        ["git", "-c", "user.name=papyrus", "-c", "user.email=papyrus@test", *args],  # noqa: S607
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+def fail_extract(source: bytes) -> FileFacts:
+    """Extractor failing the test, for files expected to come from the cache."""
+    pytest.fail(f"Unexpected extraction of {source[:20]!r}")
+
+
+def fail_read(path: Path) -> bytes | None:
+    """Reader failing the test, for files expected to come from the cache."""
+    pytest.fail(f"Unexpected read of {path}")
+
+
+def touch(path: Path) -> None:
+    """Give path another mtime, like a fresh checkout does."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def repository(pyramid_app_dir: Path) -> Path:
+    """Fixture for the pyramid application committed to a git repository."""
+    git(pyramid_app_dir, "init", "-q")
+    git(pyramid_app_dir, "add", "routes.py", "views")
+    git(pyramid_app_dir, "commit", "-q", "-m", "Initial commit")
+    return pyramid_app_dir
+
+
+class TestGit:
+    """Tests for the git helpers."""
+
+    def test_outside_repository(self: "TestGit", tmp_path: Path) -> None:
+        """Test directories outside a working tree have none."""
+        tree = WorkingTree.read(tmp_path)
+        assert tree is None or tree.root in tmp_path.parents
+
+    def test_changed_files(self: "TestGit", repository: Path) -> None:
+        """Test modified, deleted and untracked files are reported."""
+        tree = WorkingTree.read(repository / "views")
+        assert tree is not None
+        assert tree.root == repository
+        assert tree.changed_files(tree.commit) == set()
+        assert tree.tracked == {"routes.py", "views/views.py"}
+
+        (repository / "routes.py").unlink()
+        (repository / "views" / "views.py").write_text("x = 1\n")
+        (repository / "views" / "new.py").write_text("y = 2\n")
+        tree = WorkingTree.read(repository)
+        assert tree is not None
+        assert tree.untracked == {"views/new.py"}
+        assert tree.changed_files(tree.commit) == {
+            "routes.py",
+            "views/views.py",
+            "views/new.py",
+        }
+
+    def test_unknown_commit(self: "TestGit", repository: Path) -> None:
+        """Test a commit missing from the history gives no answer."""
+        tree = WorkingTree.read(repository)
+        assert tree is not None
+        assert tree.changed_files("0" * 40) is None
+
+
+class TestFollowGit:
+    """Tests for the ExtractionCache.follow_git method."""
+
+    @pytest.fixture
+    def cache_dir(self: "TestFollowGit", repository: Path) -> Path:
+        """Fixture for a cache saved at the current commit."""
+        cache_dir = repository / CACHE_DIR_NAME
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        for name in ("routes.py", "views/views.py"):
+            cache.get_or_extract(repository / name, Parser.extract_facts)
+        cache.save()
+        return cache_dir
+
+    def test_unchanged_files_are_trusted(
+        self: "TestFollowGit", repository: Path, cache_dir: Path
+    ) -> None:
+        """Test touched files unchanged since the commit are not read."""
+        views_file = repository / "views" / "views.py"
+        touch(views_file)
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        cache.get_or_extract(views_file, fail_extract, read=fail_read)
+        assert cache.hits == 1
+
+    def test_changed_files_are_extracted(
+        self: "TestFollowGit", repository: Path, cache_dir: Path
+    ) -> None:
+        """Test files changed since the commit are read again."""
+        views_file = repository / "views" / "views.py"
+        views_file.write_text(views_file.read_text() + "\n# changed\n")
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        cache.get_or_extract(views_file, Parser.extract_facts)
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_dirty_files_are_not_trusted(
+        self: "TestFollowGit", repository: Path, cache_dir: Path
+    ) -> None:
+        """Test files that differed from the commit on save are read again."""
+        views_file = repository / "views" / "views.py"
+        original = views_file.read_text()
+        views_file.write_text("x = 1\n")
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        assert cache.get_or_extract(views_file, Parser.extract_facts) == FileFacts()
+        cache.save()
+
+        views_file.write_text(original)
+        touch(views_file)
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        assert cache.get_or_extract(views_file, Parser.extract_facts).views
+
+    def test_fresh_clone(
+        self: "TestFollowGit",
+        repository: Path,
+        cache_dir: Path,
+        tmp_path_factory: pytest.TempPathFactory,
+    ) -> None:
+        """Test a cache copied to a clone of the repository is used there."""
+        clone = tmp_path_factory.mktemp("clone")
+        git(clone, "clone", "-q", str(repository), ".")
+        shutil.copytree(cache_dir, clone / CACHE_DIR_NAME)
+        cache = ExtractionCache.load(clone / CACHE_DIR_NAME)
+        cache.follow_git(clone)
+        for name in ("routes.py", "views/views.py"):
+            cache.get_or_extract(clone / name, fail_extract, read=fail_read)
+        assert cache.hits == 2  # noqa: PLR2004
+
+    def test_git_runs_only_on_misses(
+        self: "TestFollowGit",
+        repository: Path,
+        cache_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test git is not run while the entries match, and a few times after."""
+        calls: list[tuple[str, ...]] = []
+        run_git = papyrus.git.run_git
+
+        def counting_run_git(cwd: Path, *args: str) -> str | None:
+            calls.append(args)
+            return run_git(cwd, *args)
+
+        monkeypatch.setattr(papyrus.git, "run_git", counting_run_git)
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        for name in ("routes.py", "views/views.py"):
+            cache.get_or_extract(repository / name, fail_extract, read=fail_read)
+        cache.save()
+        assert calls == []
+
+        touch(repository / "views" / "views.py")
+        cache = ExtractionCache.load(cache_dir)
+        cache.follow_git(repository)
+        for name in ("routes.py", "views/views.py"):
+            cache.get_or_extract(repository / name, fail_extract, read=fail_read)
+        cache.save()
+        assert [args[0] for args in calls] == ["rev-parse", "ls-files", "diff", "diff"]
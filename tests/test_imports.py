@@ -0,0 +1,69 @@
+"""Tests for the modules the command line interface imports on startup."""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Modules that are slow to import and only needed by some code paths.
+HEAVY_MODULES = (
+    "openapi_spec_validator",
+    "yaml",
+    "cattrs",
+    "http.server",
+    "multiprocessing",
+    "rich.console",
+)
+IMPORT_TIME_LINE = re.compile(r"^import time:\s*\d+ \|\s*\d+ \| ( *)(\S+)$")
+
+
+def imported_modules(*args: str) -> set[str]:
+    """Run python with -X importtime and return the modules it imported."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        match.group(2)
+        for line in result.stderr.splitlines()
+        if (match := IMPORT_TIME_LINE.match(line))
+    }
+
+
+class TestImports:
+    """Tests for what importing and starting papyrus loads."""
+
+    def test_import_main(self: "TestImports") -> None:
+        """Test importing the entry point does not import the heavy modules."""
+        modules = imported_modules("-c", "import papyrus.main")
+        assert "papyrus.main" in modules
+        assert modules.isdisjoint(HEAVY_MODULES)
+
+    @pytest.mark.parametrize("args", [["--help"], ["serve", "--help"]])
+    def test_help(self: "TestImports", args: list[str]) -> None:
+        """Test printing the help does not import the heavy modules.
+
+        rich.console is left out, since typer uses it to print the help.
+        """
+        modules = imported_modules("-m", "papyrus.main", *args)
+        assert modules.isdisjoint(set(HEAVY_MODULES) - {"rich.console"})
+
+    def test_validation_off(self: "TestImports", pyramid_app_dir: Path) -> None:
+        """Test the validator is only imported when validation is enabled."""
+        modules = imported_modules(
+            "-m", "papyrus.main", str(pyramid_app_dir), "--validate", "off"
+        )
+        assert "papyrus.project" in modules
+        assert "openapi_spec_validator" not in modules
+
+    def test_replayed_run(self: "TestImports", pyramid_app_dir: Path) -> None:
+        """Test a run replaying the last one imports neither the parser nor yaml."""
+        imported_modules("-m", "papyrus.main", str(pyramid_app_dir))
+        modules = imported_modules("-m", "papyrus.main", str(pyramid_app_dir))
+        assert "papyrus.memo" in modules
+        assert modules.isdisjoint({"papyrus.project", "papyrus.parsing"})
+        assert modules.isdisjoint(HEAVY_MODULES)
@@ -0,0 +1,115 @@
+"""Tests for includes.py."""
+
+from pathlib import Path
+
+import pytest
+
+from papyrus.includes import IncludeGraph, apply_route_prefix, join_route_prefix
+from papyrus.parsing import Parser
+from tests.conftest import CountingCalls, write
+
+
+@pytest.fixture
+def app_dir(tmp_path: Path) -> Path:
+    """Fixture for an application spreading its routes over included modules."""
+    write(tmp_path / "myapp" / "__init__.py", "")
+    write(
+        tmp_path / "myapp" / "routes.py",
+        """
+        def includeme(config):
+            config.add_route("home", "/")
+            config.include(".api", route_prefix="/api")
+            config.include("myapp.admin:includeme", route_prefix="admin/")
+            config.add_route("about", "/about")
+        """,
+    )
+    write(
+        tmp_path / "myapp" / "api" / "__init__.py",
+        """
+        def includeme(config):
+            config.add_route("users", "/users")
+            config.include(".v2", route_prefix="v2")
+        """,
+    )
+    write(
+        tmp_path / "myapp" / "api" / "v2.py",
+        """
+        def includeme(config):
+            config.add_route("users_v2", "users/{id}")
+            config.include("..routes")
+        """,
+    )
+    write(
+        tmp_path / "myapp" / "admin.py",
+        """
+        def includeme(config):
+            config.add_route("admin", "/")
+        """,
+    )
+    write(
+        tmp_path / "myapp" / "unused.py",
+        """
+        def includeme(config):
+            config.add_route("unused", "/unused")
+        """,
+    )
+    return tmp_path
+
+
+class TestIncludeGraph:
+    """Tests for the IncludeGraph class."""
+
+    def test_prefixes(self: "TestIncludeGraph") -> None:
+        """Test route prefixes are joined like pyramid does."""
+        assert join_route_prefix("", "/api/") == "api"
+        assert join_route_prefix("api", "v2") == "api/v2"
+        assert apply_route_prefix("api/v2", "/users") == "/api/v2/users"
+        assert apply_route_prefix("", "users") == "/users"
+
+    def test_routes(self: "TestIncludeGraph", app_dir: Path) -> None:
+        """Test routes are collected in order through the include graph."""
+        get_facts = CountingCalls(Parser.get_file_facts)
+        graph = IncludeGraph(app_dir / "myapp" / "routes.py", app_dir, get_facts)
+        routes = graph.routes()
+        assert list(routes.items()) == [
+            ("home", "/"),
+            ("users", "/api/users"),
+            ("users_v2", "/api/v2/users/{id}"),
+            ("admin", "/admin/"),
+            ("about", "/about"),
+        ]
+        assert app_dir / "myapp" / "unused.py" not in get_facts.paths
+        assert len(get_facts.paths) == len(set(get_facts.paths)) == 4  # noqa: PLR2004
+
+    def test_memoized(self: "TestIncludeGraph", app_dir: Path) -> None:
+        """Test only the changed modules are parsed again."""
+        get_facts = CountingCalls(Parser.get_file_facts)
+        graph = IncludeGraph(app_dir / "myapp" / "routes.py", app_dir, get_facts)
+        graph.routes()
+        admin = write(
+            app_dir / "myapp" / "admin.py",
+            """
+            def includeme(config):
+                config.add_route("admin", "/dashboard")
+            """,
+        )
+        get_facts.paths.clear()
+        assert graph.invalidate([admin])
+        assert graph.routes()["admin"] == "/admin/dashboard"
+        assert get_facts.paths == [admin]
+        assert not graph.invalidate([app_dir / "myapp" / "unused.py"])
+
+    def test_new_module(self: "TestIncludeGraph", tmp_path: Path) -> None:
+        """Test a module that could not be found is included once it exists."""
+        routes_file = write(
+            tmp_path / "routes.py",
+            """
+            def includeme(config):
+                config.include("extra")
+            """,
+        )
+        graph = IncludeGraph(routes_file, tmp_path, Parser.get_file_facts)
+        assert graph.routes() == {}
+        extra = write(tmp_path / "extra.py", 'config.add_route("extra", "/extra")\n')
+        assert graph.invalidate([extra])
+        assert graph.routes() == {"extra": "/extra"}
@@ -1,6 +1,203 @@
 """Tests for main.py."""
 
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from openapi_spec_validator.exceptions import OpenAPISpecValidatorError
+from typer.testing import CliRunner
+
+from papyrus.main import app
+from papyrus.metrics import registry
+
+runner = CliRunner()
+
 
 def test_main() -> None:
     """Mock test."""
     assert True
+
+
+class TestMain:
+    """Tests for the command line interface."""
+
+    def test_yaml_output(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test the document is printed as YAML by default."""
+        result = runner.invoke(app, [str(pyramid_app_dir), "--no-cache"])
+        assert result.exit_code == 0
+        document = yaml.safe_load(result.stdout)
+        assert set(document["paths"]) == {"/", "/about", "/user/{id}"}
+
+    def test_json_output_file(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test the document can be written to a file as JSON."""
+        output = pyramid_app_dir / "api.json"
+        result = runner.invoke(
+            app,
+            [str(pyramid_app_dir), "--format", "json", "--output", str(output)],
+        )
+        assert result.exit_code == 0
+        document = json.loads(output.read_text())
+        assert set(document["paths"]) == {"/", "/about", "/user/{id}"}
+
+    def test_watch_needs_output(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test --watch is refused without --output."""
+        result = runner.invoke(app, [str(pyramid_app_dir), "--watch"])
+        assert result.exit_code != 0
+
+    @pytest.mark.parametrize("validation", ["off", "background", "strict"])
+    def test_validation_modes(
+        self: "TestMain", pyramid_app_dir: Path, validation: str
+    ) -> None:
+        """Test a valid document is written whatever the validation mode."""
+        result = runner.invoke(
+            app, [str(pyramid_app_dir), "--no-cache", "--validate", validation]
+        )
+        assert result.exit_code == 0
+        assert yaml.safe_load(result.stdout)["paths"]
+
+    @pytest.mark.parametrize("validation", ["background", "strict"])
+    def test_regex_placeholder(
+        self: "TestMain", pyramid_app_dir: Path, validation: str
+    ) -> None:
+        """Test placeholders with a regex do not make the document invalid."""
+        routes_file = pyramid_app_dir / "routes.py"
+        routes_file.write_text(
+            routes_file.read_text().replace('"/user/{id}"', r'r"/user/{id:\d+}"')
+        )
+        output = pyramid_app_dir / "openapi.yaml"
+        result = runner.invoke(
+            app,
+            [
+                str(pyramid_app_dir),
+                "--no-cache",
+                "--validate",
+                validation,
+                "-o",
+                str(output),
+            ],
+        )
+        assert result.exit_code == 0
+        assert r"/user/{id:\d+}" in yaml.safe_load(output.read_text())["paths"]
+
+    def test_strict_invalid(
+        self: "TestMain", pyramid_app_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test nothing is written and the exit code is 1 on strict failure."""
+        monkeypatch.setattr("papyrus.main.validate_document", lambda _: False)
+        result = runner.invoke(
+            app, [str(pyramid_app_dir), "--no-cache", "--validate", "strict"]
+        )
+        assert result.exit_code == 1
+        assert not result.stdout
+
+    def test_background_invalid(
+        self: "TestMain", pyramid_app_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the document is written but the exit code is 1 on failure."""
+        monkeypatch.setattr(
+            "openapi_spec_validator.validate", self._raise_validation_error
+        )
+        result = runner.invoke(app, [str(pyramid_app_dir), "--no-cache"])
+        assert result.exit_code == 1
+        assert yaml.safe_load(result.stdout)["paths"]
+
+    @staticmethod
+    def _raise_validation_error(_: object) -> None:
+        raise OpenAPISpecValidatorError
+
+    def test_stats_json(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test --stats json prints the metrics to stderr."""
+        result = runner.invoke(
+            app, [str(pyramid_app_dir), "--no-cache", "--stats", "json"]
+        )
+        assert result.exit_code == 0
+        names = {summary["name"] for summary in json.loads(result.stderr)}
+        assert "papyrus.project.Project.load" in names
+        assert yaml.safe_load(result.stdout)["paths"]
+        registry.reset()
+
+    def test_generate_command(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test the generate command can also be named explicitly."""
+        result = runner.invoke(app, ["generate", str(pyramid_app_dir), "--no-cache"])
+        assert result.exit_code == 0
+        assert "/user/{id}" in yaml.safe_load(result.stdout)["paths"]
+
+    def test_serve_missing_routes(self: "TestMain", tmp_path: Path) -> None:
+        """Test serve fails when the directory holds no pyramid application."""
+        result = runner.invoke(app, ["serve", str(tmp_path), "--no-cache"])
+        assert result.exit_code == 1
+
+    def test_diff(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test diff exits with 0 when unchanged and 1 with the changes."""
+        spec_file = pyramid_app_dir / "openapi.yaml"
+        result = runner.invoke(app, [str(pyramid_app_dir), "-o", str(spec_file)])
+        assert result.exit_code == 0
+        result = runner.invoke(app, ["diff", str(spec_file), str(pyramid_app_dir)])
+        assert result.exit_code == 0
+        assert not result.stdout
+
+        routes_file = pyramid_app_dir / "routes.py"
+        routes_file.write_text(routes_file.read_text().replace('"/about"', '"/us"'))
+        result = runner.invoke(
+            app, ["diff", str(spec_file), str(pyramid_app_dir), "-f", "json"]
+        )
+        assert result.exit_code == 1
+        assert [
+            (change["kind"], change["path"]) for change in json.loads(result.stdout)
+        ] == [("removed", "/about"), ("added", "/us")]
+
+    def test_diff_components(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test diff finds no change against the --components document."""
+        spec_file = pyramid_app_dir / "openapi.yaml"
+        result = runner.invoke(
+            app, [str(pyramid_app_dir), "--components", "-o", str(spec_file)]
+        )
+        assert result.exit_code == 0
+        assert "components" in yaml.safe_load(spec_file.read_text())
+        result = runner.invoke(app, ["diff", str(spec_file), str(pyramid_app_dir)])
+        assert result.exit_code == 0
+        assert not result.stdout
+
+    def test_components(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test --components writes a valid document with the components."""
+        result = runner.invoke(
+            app,
+            [
+                str(pyramid_app_dir),
+                "--no-cache",
+                "--components",
+                "--validate",
+                "strict",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "components" in yaml.safe_load(result.stdout)
+
+    def test_shards(self: "TestMain", pyramid_app_dir: Path) -> None:
+        """Test --shards writes the paths next to a root document referring to them."""
+        output = pyramid_app_dir / "api" / "openapi.yaml"
+        output.parent.mkdir()
+        result = runner.invoke(app, [str(pyramid_app_dir), "--shards", "paths"])
+        assert result.exit_code != 0
+        result = runner.invoke(
+            app,
+            [
+                str(pyramid_app_dir),
+                "--no-cache",
+                "--output",
+                str(output),
+                "--shards",
+                str(output.parent / "paths"),
+            ],
+        )
+        assert result.exit_code == 0
+        document = yaml.safe_load(output.read_text())
+        assert document["paths"]["/user/{id}"] == {
+            "$ref": "paths/user.yaml#/~1user~1%7Bid%7D"
+        }
+        shard = yaml.safe_load((output.parent / "paths" / "user.yaml").read_text())
+        assert set(shard) == {"/user/{id}"}
+        result = runner.invoke(app, ["diff", str(output), str(pyramid_app_dir)])
+        assert result.exit_code == 0
+        assert not result.stdout
@@ -0,0 +1,110 @@
+"""Tests for the memo module."""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+import papyrus.main
+from papyrus.main import app
+from papyrus.memo import RunMemo
+from papyrus.metrics import registry
+
+runner = CliRunner()
+
+
+class TestRunMemo:
+    """Tests for the RunMemo class."""
+
+    @pytest.fixture
+    def memo(self: "TestRunMemo", tmp_path: Path) -> RunMemo:
+        """Fixture for the memo of a run that printed a document."""
+        memo = RunMemo(tmp_path / "cache", {"format": "yaml"})
+        with memo.open_output() as f:
+            f.write("openapi: 3.0.3\n")
+        (tmp_path / "routes.py").write_text("")
+        memo.record([tmp_path, tmp_path / "routes.py", memo.output_file])
+        return memo
+
+    def test_replay(self: "TestRunMemo", memo: RunMemo) -> None:
+        """Test an unchanged run prints the document of the last one."""
+        stdout = io.StringIO()
+        assert memo.replay(stdout)
+        assert stdout.getvalue() == "openapi: 3.0.3\n"
+
+    def test_changed_options(self: "TestRunMemo", memo: RunMemo) -> None:
+        """Test a run with other options is not replayed."""
+        other = RunMemo(memo.cache_dir, {"format": "json"})
+        assert not other.replay(io.StringIO())
+
+    @pytest.mark.parametrize("change", ["modify", "create", "delete"])
+    def test_changed_inputs(
+        self: "TestRunMemo", memo: RunMemo, tmp_path: Path, change: str
+    ) -> None:
+        """Test changed, new and deleted files make the last run stale for good."""
+        routes_file = tmp_path / "routes.py"
+        if change == "modify":
+            routes_file.write_text("# changed\n")
+        elif change == "create":
+            (tmp_path / "views.py").write_text("")
+        else:
+            routes_file.unlink()
+        assert not memo.replay(io.StringIO())
+        assert not memo.run_file.exists()
+
+
+class TestReplayedRuns:
+    """Tests for the runs of generate replaying the last one."""
+
+    def test_stdout(
+        self: "TestReplayedRuns",
+        pyramid_app_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test an unchanged run prints the same document without extracting."""
+        first = runner.invoke(app, [str(pyramid_app_dir)])
+        assert first.exit_code == 0
+        monkeypatch.setattr(papyrus.main, "load_project", None)
+        second = runner.invoke(app, [str(pyramid_app_dir), "--jobs", "2"])
+        assert second.exit_code == 0
+        assert second.stdout == first.stdout
+
+    def test_changed_views_file(
+        self: "TestReplayedRuns", pyramid_app_dir: Path
+    ) -> None:
+        """Test a changed views file is extracted again."""
+        runner.invoke(app, [str(pyramid_app_dir)])
+        views_file = pyramid_app_dir / "views" / "views.py"
+        views_file.write_text(views_file.read_text().replace('"about"', '"home"'))
+        result = runner.invoke(app, [str(pyramid_app_dir)])
+        assert result.exit_code == 0
+        assert "/about:\n" not in result.stdout
+
+    def test_output_file(self: "TestReplayedRuns", pyramid_app_dir: Path) -> None:
+        """Test an unchanged output file is left alone, and a deleted one written."""
+        output = pyramid_app_dir / "openapi.yaml"
+        args = [str(pyramid_app_dir), "--output", str(output)]
+        runner.invoke(app, args)
+        mtime = output.stat().st_mtime_ns
+        assert runner.invoke(app, args).exit_code == 0
+        assert output.stat().st_mtime_ns == mtime
+        output.unlink()
+        assert runner.invoke(app, args).exit_code == 0
+        assert output.exists()
+
+    def test_stats(self: "TestReplayedRuns", pyramid_app_dir: Path) -> None:
+        """Test runs with --stats are not replayed, so their stats are not empty."""
+        first = runner.invoke(app, [str(pyramid_app_dir)])
+        result = runner.invoke(app, [str(pyramid_app_dir), "--stats", "json"])
+        registry.reset()
+        assert result.exit_code == 0
+        assert result.stdout == first.stdout
+        names = {summary["name"] for summary in json.loads(result.stderr)}
+        assert "papyrus.project.Project.load" in names
+
+    def test_no_cache(self: "TestReplayedRuns", pyramid_app_dir: Path) -> None:
+        """Test runs without the cache neither record nor replay anything."""
+        runner.invoke(app, [str(pyramid_app_dir), "--no-cache"])
+        assert not (pyramid_app_dir / ".papyrus_cache").exists()
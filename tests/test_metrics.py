@@ -0,0 +1,72 @@
+"""Tests for metrics.py."""
+
+import logging
+from collections.abc import Generator
+
+import pytest
+
+from papyrus.log import log_time
+from papyrus.metrics import MetricsRegistry, percentile, registry
+
+logger = logging.getLogger(__name__)
+
+
+@log_time(logger)
+def double(value: int) -> int:
+    """Return twice value."""
+    return value * 2
+
+
+@pytest.fixture
+def enabled_registry() -> Generator[MetricsRegistry]:
+    """Enable the global registry for the duration of a test."""
+    registry.reset(enabled=True)
+    yield registry
+    registry.reset()
+
+
+class TestMetricsRegistry:
+    """Tests for the MetricsRegistry class."""
+
+    def test_percentile(self: "TestMetricsRegistry") -> None:
+        """Test the nearest-rank percentile."""
+        samples = [float(i) for i in range(1, 101)]
+        assert percentile(samples, 0.5) == 50.0  # noqa: PLR2004
+        assert percentile(samples, 0.95) == 95.0  # noqa: PLR2004
+        assert percentile([3.0], 0.95) == 3.0  # noqa: PLR2004
+
+    def test_summary(self: "TestMetricsRegistry") -> None:
+        """Test the summary is computed per name, slowest in total first."""
+        metrics = MetricsRegistry()
+        for seconds in (0.1, 0.3, 0.2):
+            metrics.record("slow", seconds)
+        metrics.record("fast", 0.01)
+        slow, fast = metrics.summary()
+        assert slow["name"] == "slow"
+        assert slow["count"] == 3  # noqa: PLR2004
+        assert slow["total"] == pytest.approx(0.6)
+        assert (slow["p50"], slow["max"]) == (0.2, 0.3)
+        assert fast["name"] == "fast"
+
+    def test_drain_and_merge(self: "TestMetricsRegistry") -> None:
+        """Test samples can be moved from one registry to another."""
+        worker, parent = MetricsRegistry(), MetricsRegistry()
+        worker.record("f", 0.1)
+        parent.record("f", 0.2)
+        parent.merge(worker.drain())
+        parent.merge(worker.drain())
+        assert parent.summary()[0]["count"] == 2  # noqa: PLR2004
+
+    @pytest.mark.usefixtures("enabled_registry")
+    def test_log_time_records(self: "TestMetricsRegistry") -> None:
+        """Test log_time records each call when the registry is enabled."""
+        double(1)
+        double(2)
+        (summary,) = registry.summary()
+        assert summary["name"] == f"{__name__}.double"
+        assert summary["count"] == 2  # noqa: PLR2004
+
+    def test_log_time_disabled(self: "TestMetricsRegistry") -> None:
+        """Test log_time records nothing when the registry is disabled."""
+        assert double(1) == 2  # noqa: PLR2004
+        assert registry.summary() == []
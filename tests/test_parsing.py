@@ -1,11 +1,23 @@
 """Tests for the parsing module."""
 
 import ast
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
 
-from papyrus.parsing import AstCrawler, AstFilterMethodCall, Parser
+from papyrus.parsing import (
+    AstCrawler,
+    AstFilter,
+    AstFilterMethodCall,
+    CallExtractor,
+    DecoratorExtractor,
+    Parser,
+    Scope,
+    size_balanced_chunks,
+)
+from papyrus.prefilter import Prefilter
 from papyrus.pyramid import PyramidInfo, Route
 
 
@@ -77,7 +89,111 @@ class TestParsing:
             Route("home", "/", set()),
         ]
         filtered_routes = Parser.filter_routes_with_a_method(routes)
-        assert filtered_routes == routes[:1]
+        assert list(filtered_routes) == routes[:1]
+
+    def test_files_facts_are_streamed(
+        self: "TestParsing", pyramid_app_dir: Path
+    ) -> None:
+        """Test facts are yielded before the files are all found, in their order."""
+        views_files = sorted((pyramid_app_dir / "views").glob("*.py")) * 2
+        found: list[Path] = []
+
+        def find() -> Iterator[Path]:
+            for views_file in views_files:
+                found.append(views_file)
+                yield views_file
+
+        files_facts = Parser.iter_files_facts(find(), readers=0)
+        views_file, facts = next(files_facts)
+        assert found == [views_file] == views_files[:1]
+        assert facts.views
+        assert [path for path, _ in files_facts] == views_files[1:]
+
+    def test_files_are_read_concurrently(
+        self: "TestParsing", pyramid_app_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the reader threads overlap the reads, up to the number of readers."""
+        readers = 2
+        views_files = sorted((pyramid_app_dir / "views").glob("*.py")) * 6
+        scan = Prefilter.scan
+        both_reading = threading.Barrier(readers, timeout=5)
+        lock = threading.Lock()
+        reading = []
+
+        def slow_scan(prefilter: Prefilter, path: Path) -> tuple[bytes | None, int]:
+            with lock:
+                reading.append(path)
+                assert len(reading) <= readers
+            both_reading.wait()
+            with lock:
+                reading.remove(path)
+            return scan(prefilter, path)
+
+        serial = list(Parser.iter_files_facts(views_files, readers=0))
+        monkeypatch.setattr(Prefilter, "scan", slow_scan)
+        assert list(Parser.iter_files_facts(views_files, readers=readers)) == serial
+
+
+class TestParallelParsing:
+    """Tests for parsing views files in a process pool."""
+
+    @pytest.fixture
+    def many_views_dir(self: "TestParallelParsing", pyramid_app_dir: Path) -> Path:
+        """Fixture for an application with many views files."""
+        views_dir = pyramid_app_dir / "views"
+        for i in range(12):
+            methods = ["GET", "POST", "PUT"][: i % 3 + 1]
+            decorators = "".join(
+                f'@view_config(route_name="route_{i % 5}", request_method="{m}")\n'
+                for m in methods
+            )
+            (views_dir / f"view_{i}.py").write_text(f"{decorators}def view(r): ...\n")
+        return pyramid_app_dir
+
+    def test_parallel_matches_serial(
+        self: "TestParallelParsing",
+        many_views_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test the process pool gives the same result as the serial path."""
+        serial = Parser.get_routes_methods(many_views_dir, "views", jobs=1)
+        monkeypatch.setattr("papyrus.parsing.MIN_PARALLEL_FILES", 0)
+        monkeypatch.setattr("papyrus.parsing.MIN_PARALLEL_BYTES", 0)
+        parallel = Parser.get_routes_methods(many_views_dir, "views", jobs=2)
+        assert parallel == serial
+        assert list(parallel) == list(serial)
+
+    def test_parallel_streaming(
+        self: "TestParallelParsing",
+        many_views_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test files arriving once the pool runs are parsed in small chunks."""
+        views_files = sorted((many_views_dir / "views").glob("*.py"))
+        serial = list(Parser.iter_files_facts(views_files))
+        monkeypatch.setattr("papyrus.parsing.MIN_PARALLEL_FILES", 2)
+        monkeypatch.setattr("papyrus.parsing.MIN_PARALLEL_BYTES", 0)
+        monkeypatch.setattr("papyrus.parsing.CHUNK_BYTES", 1)
+        assert list(Parser.iter_files_facts(views_files, jobs=2)) == serial
+
+    def test_small_apps_stay_serial(self: "TestParallelParsing") -> None:
+        """Test the pool is not used for a handful of small files."""
+        assert not Parser.should_parallelize(1, 100, jobs=8)
+        assert not Parser.should_parallelize(10**4, 10**9, jobs=1)
+        assert Parser.should_parallelize(10**4, 10**9, jobs=8)
+
+    def test_size_balanced_chunks(self: "TestParallelParsing") -> None:
+        """Test chunks are balanced by size and scheduled largest first."""
+        sizes = {Path(f"{size}.py"): size for size in (1, 2, 3, 4, 5, 9)}
+        chunks = size_balanced_chunks(sizes, 2)
+        totals = [sum(sizes[path] for path in chunk) for chunk in chunks]
+        assert totals == [12, 12]
+        assert chunks[0][0] == Path("9.py")
+
+    def test_size_balanced_chunks_drops_empty(self: "TestParallelParsing") -> None:
+        """Test no empty chunks are returned when there are few files."""
+        chunks = size_balanced_chunks({Path("a.py"): 1}, 4)
+        assert chunks == [[Path("a.py")]]
 
 
 class TestAstCrawler:
@@ -128,3 +244,110 @@ class TestAstCrawler:
         assert len(calls) == expected_calls, (
             f"Expected {expected_calls} calls to view_config"
         )
+
+    def test_iter_decorators_named_keeps_filters(
+        self: "TestAstCrawler", views_file: Path
+    ) -> None:
+        """Test the filters passed in are not mutated between calls."""
+        crawler = AstCrawler(views_file)
+        filters: list[AstFilter] = []
+        first = list(crawler.iter_decorators_named("view_config", filters))
+        second = list(crawler.iter_decorators_named("view_config", filters))
+        assert filters == []
+        assert first == second
+
+    def test_visit_multiple_extractors(
+        self: "TestAstCrawler", routes_file: Path, views_file: Path
+    ) -> None:
+        """Test extractors sharing one traversal find the same nodes as alone."""
+        source = routes_file.read_text() + views_file.read_text()
+        crawler = AstCrawler(source)
+        route_calls = CallExtractor([AstFilterMethodCall("add_route")])
+        view_calls = DecoratorExtractor("view_config")
+        all_calls = CallExtractor()
+        crawler.visit(route_calls, view_calls, all_calls)
+
+        assert route_calls.calls == list(
+            crawler.iter_calls([AstFilterMethodCall("add_route")])
+        )
+        assert view_calls.calls == list(crawler.iter_decorators_named("view_config"))
+        assert len(all_calls.calls) == len(list(crawler.iter_calls()))
+
+
+class TestScopedTraversal:
+    """Tests for traversing only part of the AST."""
+
+    SOURCE = """
+import typing
+
+@view_config(route_name="home", request_method="GET")
+async def home(request):
+    @view_config(route_name="nested", request_method="GET")
+    def nested(request): ...
+    return [compute(x) for x in request.params.values()]
+
+class Views:
+    @view_config(route_name="user", request_method="POST")
+    def user(self): ...
+
+if typing.TYPE_CHECKING:
+    @view_config(route_name="typed", request_method="GET")
+    def typed(request): ...
+
+def includeme(config):
+    config.add_route("home", "/")
+    with config.route_prefix_context("/api"):
+        config.add_route("user", "/user")
+    try:
+        config.add_route("typed", "/typed")
+    except ValueError:
+        config.add_route("fallback", "/fallback")
+"""
+
+    def test_definitions_scope_finds_decorators(
+        self: "TestScopedTraversal",
+    ) -> None:
+        """Test decorators of module, class and async definitions are found."""
+        calls = list(AstCrawler(self.SOURCE).iter_decorators_named("view_config"))
+        route_names = [call.keywords[0].value for call in calls]
+        assert [getattr(name, "value", None) for name in route_names] == [
+            "home",
+            "user",
+            "typed",
+        ]
+
+    def test_statements_scope_finds_add_route(self: "TestScopedTraversal") -> None:
+        """Test statement-level add_route calls are found in source order."""
+        facts = Parser.extract_facts(self.SOURCE)
+        assert [name for name, _ in facts.routes] == [
+            "home",
+            "user",
+            "typed",
+            "fallback",
+        ]
+
+    @pytest.mark.parametrize("scope", [Scope.DEFINITIONS, Scope.STATEMENTS])
+    def test_scoped_nodes_follow_walk_order(
+        self: "TestScopedTraversal", scope: Scope
+    ) -> None:
+        """Test scoped traversals yield a subsequence of ast.walk."""
+        tree = ast.parse(self.SOURCE)
+        walked = list(ast.walk(tree))
+        scoped = list(AstCrawler.iter_nodes(tree, scope))
+        positions = [walked.index(node) for node in scoped]
+        assert positions == sorted(positions)
+        assert len(scoped) < len(walked)
+
+    def test_definitions_scope_visits_fewer_nodes(
+        self: "TestScopedTraversal",
+    ) -> None:
+        """Test skipping function bodies cuts the visited nodes on view modules."""
+        body = "    return render(request, {'a': [f(x) for x in range(3)]})\n"
+        source = "".join(
+            f"@view_config(route_name='r{i}')\ndef view_{i}(request):\n{body * 5}"
+            for i in range(20)
+        )
+        tree = ast.parse(source)
+        walked = sum(1 for _ in ast.walk(tree))
+        scoped = sum(1 for _ in AstCrawler.iter_nodes(tree, Scope.DEFINITIONS))
+        assert scoped * 10 < walked
@@ -0,0 +1,79 @@
+"""Tests for the prefilter module."""
+
+from pathlib import Path
+
+import pytest
+
+from papyrus.parsing import Parser
+from papyrus.prefilter import MMAP_THRESHOLD, Prefilter
+
+
+class TestPrefilter:
+    """Tests for the Prefilter class."""
+
+    @pytest.mark.parametrize(
+        "padding",
+        [0, MMAP_THRESHOLD],
+        ids=["small_file", "mmap_file"],
+    )
+    def test_read_matching_file(
+        self: "TestPrefilter", tmp_path: Path, padding: int
+    ) -> None:
+        """Test files mentioning a needle are returned as bytes."""
+        python_file = tmp_path / "views.py"
+        source = b"#" * padding + b"\n@view_config(route_name='a')\ndef a(): ...\n"
+        python_file.write_bytes(source)
+        prefilter = Prefilter()
+        assert prefilter.read(python_file) == source
+        assert prefilter.skipped_files == 0
+
+    @pytest.mark.parametrize(
+        "padding",
+        [0, MMAP_THRESHOLD],
+        ids=["small_file", "mmap_file"],
+    )
+    def test_read_skips_file(
+        self: "TestPrefilter", tmp_path: Path, padding: int
+    ) -> None:
+        """Test files not mentioning any needle are skipped and counted."""
+        python_file = tmp_path / "helpers.py"
+        python_file.write_bytes(b"#" * padding + b"\ndef helper(): ...\n")
+        prefilter = Prefilter()
+        assert prefilter.read(python_file) is None
+        assert prefilter.skipped_files == 1
+        assert prefilter.skipped_bytes == python_file.stat().st_size
+
+    def test_read_empty_file(self: "TestPrefilter", tmp_path: Path) -> None:
+        """Test empty files are skipped."""
+        python_file = tmp_path / "__init__.py"
+        python_file.touch()
+        assert Prefilter().read(python_file) is None
+
+    def test_seconds_saved(self: "TestPrefilter") -> None:
+        """Test the time saved is estimated from the parse throughput."""
+        prefilter = Prefilter()
+        prefilter.timed(len, b"x" * 10)
+        prefilter.skipped_bytes = 20
+        assert prefilter.seconds_saved == pytest.approx(prefilter.parse_seconds * 2)
+
+    def test_merge(self: "TestPrefilter") -> None:
+        """Test merging adds up the counters."""
+        prefilter, other = Prefilter(), Prefilter()
+        other.skipped_files = 2
+        other.parsed_files = 3
+        prefilter.merge(other)
+        prefilter.merge(other)
+        assert (prefilter.skipped_files, prefilter.parsed_files) == (4, 6)
+
+    def test_skipped_files_are_not_parsed(
+        self: "TestPrefilter", pyramid_app_dir: Path
+    ) -> None:
+        """Test the parser gives the same routes when helper files are skipped."""
+        (pyramid_app_dir / "views" / "helpers.py").write_text("def helper(): ...")
+        (pyramid_app_dir / "views" / "broken.py").write_text("def broken(:")
+        results = Parser.get_routes_methods(pyramid_app_dir, "views")
+        assert results == {
+            "home": {"GET"},
+            "about": {"GET"},
+            "user": {"GET", "POST", "PUT", "DELETE"},
+        }
@@ -0,0 +1,145 @@
+"""Tests for the project module."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from papyrus.parsing import Parser
+from papyrus.project import Project
+from papyrus.pyramid import PyramidInfo
+from papyrus.writing import OpenAPI
+
+
+class TestProject:
+    """Tests for the Project class."""
+
+    @pytest.fixture
+    def pyramid_info(self: "TestProject") -> PyramidInfo:
+        """Fixture for the pyramid application information."""
+        return PyramidInfo(routes_file_name="routes.py", views_dir_name="views")
+
+    @pytest.fixture
+    def project(
+        self: "TestProject", pyramid_app_dir: Path, pyramid_info: PyramidInfo
+    ) -> Project:
+        """Fixture for a loaded project."""
+        project = Project(pyramid_app_dir, pyramid_info)
+        project.load()
+        return project
+
+    def assert_matches_full_run(
+        self: "TestProject", project: Project, openapi: OpenAPI
+    ) -> None:
+        """Assert the patched state equals a full extraction of the application."""
+        routes = Parser.get_routes(project.base_dir, project.pyramid_info)
+        assert project.routes() == routes
+        expected = OpenAPI.from_routes(Parser.filter_routes_with_a_method(routes))
+        assert openapi.to_yaml() == expected.to_yaml()
+
+    def test_load_matches_parser(
+        self: "TestProject", project: Project, pyramid_info: PyramidInfo
+    ) -> None:
+        """Test a loaded project has the same routes as the parser."""
+        assert project.routes() == Parser.get_routes(project.base_dir, pyramid_info)
+
+    def test_update_views_file(self: "TestProject", project: Project) -> None:
+        """Test changing a views file only affects the routes it mentions."""
+        openapi = project.openapi()
+        views_file = project.views_dir / "views.py"
+        views_file.write_text(
+            views_file.read_text().replace('request_method="DELETE"', "")
+        )
+        patterns = project.update([views_file])
+        assert patterns == {"/user/{id}"}
+        project.patch(openapi, patterns)
+        self.assert_matches_full_run(project, openapi)
+
+    def test_add_and_delete_views_file(self: "TestProject", project: Project) -> None:
+        """Test new views files are added and deleted ones removed."""
+        openapi = project.openapi()
+        new_file = project.views_dir / "extra.py"
+        new_file.write_text(
+            '@view_config(route_name="home", request_method="POST")\ndef f(r): ...'
+        )
+        patterns = project.update([new_file])
+        project.patch(openapi, patterns)
+        self.assert_matches_full_run(project, openapi)
+
+        (project.views_dir / "views.py").unlink()
+        patterns = project.update([project.views_dir / "views.py"])
+        assert patterns == {"/", "/about", "/user/{id}"}
+        project.patch(openapi, patterns)
+        assert list(openapi.paths) == ["/"]
+        self.assert_matches_full_run(project, openapi)
+
+    def test_update_routes_file(self: "TestProject", project: Project) -> None:
+        """Test changing the routes file rebuilds the changed patterns."""
+        openapi = project.openapi()
+        project.routes_file.write_text(
+            project.routes_file.read_text().replace('"/about"', '"/about-us"')
+        )
+        patterns = project.update([project.routes_file])
+        assert patterns == {"/about", "/about-us"}
+        project.patch(openapi, patterns)
+        self.assert_matches_full_run(project, openapi)
+
+    def test_update_directory(self: "TestProject", project: Project) -> None:
+        """Test created and deleted directories stand for the files inside them."""
+        openapi = project.openapi()
+        sub_dir = project.views_dir / "sub"
+        sub_dir.mkdir()
+        (sub_dir / "more.py").write_text(
+            '@view_config(route_name="about", request_method="PUT")\ndef f(r): ...'
+        )
+        project.patch(openapi, project.update([sub_dir]))
+        self.assert_matches_full_run(project, openapi)
+
+        shutil.rmtree(sub_dir)
+        project.patch(openapi, project.update([sub_dir]))
+        self.assert_matches_full_run(project, openapi)
+
+    def test_unrelated_change(self: "TestProject", project: Project) -> None:
+        """Test changes outside the routes file and views are ignored."""
+        other = project.base_dir / "models.py"
+        other.write_text("x = 1")
+        assert project.update([other]) == set()
+
+    def test_update_included_module(self: "TestProject", project: Project) -> None:
+        """Test a module included by the routes file is followed and updated."""
+        api_file = project.base_dir / "api.py"
+        api_file.write_text('config.add_route("user", "/profile/{id}")\n')
+        routes_file = project.routes_file
+        routes_file.write_text(
+            routes_file.read_text().rstrip()
+            + '\n    config.include(".api", route_prefix="v1")\n'
+        )
+        openapi = project.openapi()
+        project.patch(openapi, project.update([routes_file]))
+        assert "/v1/profile/{id}" in openapi.paths
+        api_file.write_text('config.add_route("user", "/account/{id}")\n')
+        patterns = project.update([api_file])
+        assert patterns == {"/v1/profile/{id}", "/v1/account/{id}"}
+        project.patch(openapi, patterns)
+        self.assert_matches_full_run(project, openapi)
+
+    def test_update_invalid_files(self: "TestProject", project: Project) -> None:
+        """Test files that do not parse keep their facts until they parse again."""
+        openapi = project.openapi()
+        routes = project.routes()
+        views_file = project.views_dir / "views.py"
+        routes_file = project.routes_file
+        sources = {path: path.read_text() for path in (views_file, routes_file)}
+        for path, source in sources.items():
+            path.write_text(f"{source}\ndef broken(:\n")
+        assert project.update([views_file, routes_file]) == set()
+        assert project.routes() == routes
+
+        views_file.write_text(
+            sources[views_file].replace('request_method="DELETE"', "")
+        )
+        routes_file.write_text(sources[routes_file])
+        patterns = project.update([views_file, routes_file])
+        assert patterns == {"/user/{id}"}
+        project.patch(openapi, patterns)
+        self.assert_matches_full_run(project, openapi)
@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 
 from papyrus.exceptions import InvalidUrlPatternError
-from papyrus.pyramid import PyramidFiles, extract_url_parameters
+from papyrus.pyramid import PyramidFiles, Route, extract_url_parameters
 
 
 class TestPyramidFiles:
@@ -56,3 +56,15 @@ class TestExtractUrlParameters:
         """Assert extract_url_parameters raises error for invalid pattern."""
         with pytest.raises(InvalidUrlPatternError, match=match):
             extract_url_parameters(invalid_pattern)
+
+
+class TestRoute:
+    """Tests for the Route class."""
+
+    def test_methods_are_interned(self: "TestRoute") -> None:
+        """Test routes with the same methods share one immutable set."""
+        first = Route(name="a", pattern="/a", methods={"GET", "POST"})
+        second = Route(name="b", pattern="/b", methods=frozenset({"POST", "GET"}))
+        assert isinstance(first.methods, frozenset)
+        assert first.methods is second.methods
+        assert not hasattr(first, "__dict__")
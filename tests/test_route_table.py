@@ -0,0 +1,143 @@
+"""Tests for route_table.py."""
+
+import pytest
+
+from papyrus.pyramid import Route
+from papyrus.route_table import (
+    ANY_SEGMENT,
+    RouteTable,
+    SegmentKind,
+    split_pattern,
+    split_segment,
+)
+
+
+def make_table(*patterns: str) -> RouteTable:
+    """Return a table with one GET route per pattern, named r0, r1..."""
+    return RouteTable(
+        Route(f"r{i}", pattern, {"GET"}) for i, pattern in enumerate(patterns)
+    )
+
+
+def names(routes: list[Route]) -> list[str]:
+    """Return the names of routes."""
+    return [route.name for route in routes]
+
+
+class TestSplit:
+    """Tests for the splitting of patterns into segments."""
+
+    @pytest.mark.parametrize(
+        ("segment", "expected"),
+        [
+            ("user", (SegmentKind.LITERAL, "user")),
+            ("{id}", (SegmentKind.PARAM, ANY_SEGMENT)),
+            ("{id:\\d{4}}", (SegmentKind.PARAM, "(?:\\d{4})")),
+            ("{name}.html", (SegmentKind.PARAM, f"{ANY_SEGMENT}\\.html")),
+            ("*subpath", (SegmentKind.STAR, "")),
+        ],
+    )
+    def test_split_segment(
+        self: "TestSplit", segment: str, expected: tuple[SegmentKind, str]
+    ) -> None:
+        """Test segments are classified and placeholders turned into regexes."""
+        assert split_segment(segment) == expected
+
+    def test_split_pattern(self: "TestSplit") -> None:
+        """Test the leading slash is ignored and a trailing one kept."""
+        assert split_pattern("/") == ()
+        assert split_pattern("/a/") == (
+            (SegmentKind.LITERAL, "a"),
+            (SegmentKind.LITERAL, ""),
+        )
+
+
+class TestRouteTable:
+    """Tests for the RouteTable class."""
+
+    def test_index_by_name(self: "TestRouteTable") -> None:
+        """Test adding a route with an existing name replaces it and moves it."""
+        table = make_table("/a", "/b")
+        table.add(Route("r0", "/c", {"POST"}))
+        assert names(list(table)) == ["r1", "r0"]
+        assert table.get("r0") == Route("r0", "/c", {"POST"})
+        assert table.by_pattern("/a") == []
+        assert "r1" in table
+        assert len(table) == 2  # noqa: PLR2004
+
+    def test_remove_prunes_trie(self: "TestRouteTable") -> None:
+        """Test removed routes are no longer found by any query."""
+        table = make_table("/a/b/c", "/a")
+        table.remove("r0")
+        assert names(table.with_prefix("/a")) == ["r1"]
+        assert table.remove("r0") is None
+
+    def test_duplicates_and_merge(self: "TestRouteTable") -> None:
+        """Test routes sharing a pattern are reported and merged."""
+        table = RouteTable(
+            [
+                Route("get_user", "/user/{id}", {"GET"}),
+                Route("edit_user", "/user/{id}", {"POST", "PUT"}),
+                Route("unused", "/user/{id}", set()),
+                Route("home", "/", {"GET"}),
+            ]
+        )
+        assert names(table.duplicates()["/user/{id}"]) == [
+            "get_user",
+            "edit_user",
+            "unused",
+        ]
+        assert table.merged() == [
+            Route("edit_user", "/user/{id}", {"GET", "POST", "PUT"}),
+            Route("home", "/", {"GET"}),
+        ]
+
+    def test_conflicts(self: "TestRouteTable") -> None:
+        """Test patterns only differing by parameter names conflict."""
+        table = make_table("/user/{id}", "/user/{user_id}", "/user/{id:\\d+}")
+        assert [names(group) for group in table.conflicts()] == [["r0", "r1"]]
+
+    @pytest.mark.parametrize(
+        ("patterns", "shadowed"),
+        [
+            (["/user/{id}", "/user/me"], [("r1", "r0")]),
+            (["/user/me", "/user/{id}"], []),
+            (["/user/{id:\\d+}", "/user/me", "/user/42"], [("r2", "r0")]),
+            (["/user/{id:\\d+}", "/user/{name}"], []),
+            (["/user/{name}", "/user/{id:\\d+}"], [("r1", "r0")]),
+            (
+                ["/static/*subpath", "/static/css/{file}", "/static"],
+                [
+                    ("r1", "r0"),
+                    ("r2", "r0"),
+                ],
+            ),
+            (["/{a}/{b}", "/x/{b}", "/x/y/z"], [("r1", "r0")]),
+            (["/a/b", "/a/b"], []),
+        ],
+    )
+    def test_shadowed(
+        self: "TestRouteTable", patterns: list[str], shadowed: list[tuple[str, str]]
+    ) -> None:
+        """Test routes matching a subset of the URLs of an earlier one are found."""
+        table = make_table(*patterns)
+        assert [
+            (route.name, shadowing.name) for route, shadowing in table.shadowed()
+        ] == shadowed
+
+    def test_with_prefix(self: "TestRouteTable") -> None:
+        """Test routes are found by the segments their pattern starts with."""
+        table = make_table("/api/users", "/api/users/{id}", "/apis", "/api")
+        assert names(table.with_prefix("/api")) == ["r0", "r1", "r3"]
+        assert names(table.with_prefix("/api/users/{user_id}")) == ["r1"]
+        assert table.with_prefix("/missing") == []
+
+    def test_many_routes(self: "TestRouteTable") -> None:
+        """Test queries stay linear with many routes sharing prefixes."""
+        routes = [
+            Route(f"r{i}", f"/api/v{i % 3}/resource_{i}/{{id}}", {"GET"})
+            for i in range(20_000)
+        ]
+        table = RouteTable([Route("catch_all", "/api/{version}/*rest", set()), *routes])
+        assert len(table.shadowed()) == len(routes)
+        assert len(table.with_prefix("/api/v1")) == len(routes[1::3])
@@ -0,0 +1,140 @@
+"""Tests for the scanning module."""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.generator import (
+    ROUTES_FILE_NAME,
+    VIEWS_DIR_NAME,
+    AppSpec,
+    generate_app,
+)
+from papyrus.parsing import Parser
+from papyrus.pyramid import PyramidInfo
+from papyrus.scanning import Engine, scan_facts
+
+RESOLVED_SOURCES = {
+    "routes": (
+        "def includeme(config):\n"
+        '    config.add_route("home", "/")  # the root\n'
+        "    config.add_route(\n"
+        "        'user', r'/user/{id}',\n"
+        "    ); config.include('.admin', route_prefix=\"/admin\")\n"
+        '    self.config.add_route("item", "/item/" "{id}")\n'
+        '    route = config.add_route("skipped", "/skipped")\n'
+        "    if debug:\n"
+        "        config.add_route('debug', '/debug')\n"
+    ),
+    "class views": (
+        "from pyramid.view import view_config\n"
+        "\n"
+        "class Views:\n"
+        '    @view_config(route_name="user", request_method="GET", renderer="json")\n'
+        "    def get(self): ...\n"
+        "\n"
+        "    @view_config(route_name='user', request_method='PUT')\n"
+        "    async def put(self):\n"
+        '        @view_config(route_name="inner", request_method="GET")\n'
+        "        def inner(): ...\n"
+    ),
+    "breadth first": (
+        "class A:\n"
+        '    @view_config(route_name="a", request_method="GET")\n'
+        "    def a(self): ...\n"
+        '@view_config(route_name="b", request_method="POST")\n'
+        "def b(request): ...\n"
+    ),
+    "strings and comments": (
+        '"""Views, like config.add_route("doc", "/doc") in\n'
+        "@view_config(route_name='doc', request_method='GET')\n"
+        '"""\n'
+        "# config.add_route('comment', '/comment')\n"
+        'PATTERN = f"{prefix}/{{id}}"  # view_config\n'
+        "config.add_route('real', '/real')\r\n"
+    ),
+    "escapes": (
+        '@view_config(route_name="caf\\u00e9", request_method="""GET""")\n'
+        "def cafe(request): ...\n"
+    ),
+}
+DEFERRED_SOURCES = {
+    "variable": "config.add_route(NAME, '/')\n",
+    "inline": "if debug: config.add_route('debug', '/debug')\n",
+    "parenthesized": "(config.add_route('home', '/'))\n",
+    "unpacked": "config.add_route(*route)\n",
+    "conditional view": (
+        "if debug:\n"
+        '    @view_config(route_name="debug", request_method="GET")\n'
+        "    def debug(request): ...\n"
+    ),
+    "qualified decorator": (
+        '@pyramid.view_config(route_name="home", request_method="GET")\n'
+        "def home(request): ...\n"
+    ),
+    "tabs": (
+        "class Views:\n"
+        '\t@view_config(route_name="home", request_method="GET")\n'
+        "\tdef home(self): ...\n"
+    ),
+    "nested quotes": 'URL = f"{urls["home"]}"\nconfig.add_route("home", "/")\n',
+    "syntax error": "config.add_route('home', '/'\n",
+}
+
+
+class TestScanning:
+    """Tests for the token scanner."""
+
+    @pytest.mark.parametrize(
+        "source", RESOLVED_SOURCES.values(), ids=list(RESOLVED_SOURCES)
+    )
+    def test_same_facts_as_ast(self: "TestScanning", source: str) -> None:
+        """Test the scanner resolves the file and finds what ast finds."""
+        facts = scan_facts(source)
+        assert facts is not None
+        assert facts == Parser.extract_facts(source)
+        assert scan_facts(source.encode()) == facts
+
+    def test_breadth_first_views(self: "TestScanning") -> None:
+        """Test views follow the AST order: module level first, then classes."""
+        facts = scan_facts(RESOLVED_SOURCES["breadth first"])
+        assert facts is not None
+        assert facts.views == (("b", "POST"), ("a", "GET"))
+
+    @pytest.mark.parametrize(
+        "source", DEFERRED_SOURCES.values(), ids=list(DEFERRED_SOURCES)
+    )
+    def test_unresolved_files_are_deferred(self: "TestScanning", source: str) -> None:
+        """Test the scanner gives up on calls it cannot resolve with confidence."""
+        assert scan_facts(source) is None
+
+    def test_fast_engine_falls_back(self: "TestScanning") -> None:
+        """Test the fast engine parses the files the scanner gives up on."""
+        source = DEFERRED_SOURCES["inline"]
+        assert Parser.extract_facts_fast(source) == Parser.extract_facts(source)
+        assert Parser.extractor(Engine.FAST) == Parser.extract_facts_fast
+        assert Parser.extractor(Engine.AST) == Parser.extract_facts
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            AppSpec(routes=60, view_files=6, noise_files=3),
+            AppSpec(routes=60, view_files=6, depth=0, decorators_per_view=6, seed=1),
+        ],
+    )
+    def test_generated_apps(
+        self: "TestScanning", tmp_path: Path, spec: AppSpec
+    ) -> None:
+        """Test both engines find the same routes in generated applications."""
+        app = generate_app(tmp_path, spec)
+        pyramid_info = PyramidInfo(
+            views_dir_name=VIEWS_DIR_NAME, routes_file_name=ROUTES_FILE_NAME
+        )
+        routes = {
+            engine: Parser.get_routes(app.base_dir, pyramid_info, engine=engine)
+            for engine in Engine
+        }
+        assert routes[Engine.FAST] == routes[Engine.AST]
+        for path in app.base_dir.rglob("*.py"):
+            source = path.read_bytes()
+            assert Parser.extract_facts_fast(source) == Parser.extract_facts(source)
@@ -0,0 +1,199 @@
+"""Tests for the serve module."""
+
+import http.client
+import json
+import threading
+from collections.abc import Iterator
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+import yaml
+
+from papyrus.project import Project
+from papyrus.pyramid import PyramidInfo
+from papyrus.serve import (
+    DocumentServer,
+    DocumentState,
+    etag_matches,
+    refresh_forever,
+)
+from papyrus.writing import OutputFormat
+
+
+@pytest.fixture
+def state(pyramid_app_dir: Path) -> DocumentState:
+    """Fixture for the document state of a loaded project."""
+    project = Project(
+        pyramid_app_dir,
+        PyramidInfo(routes_file_name="routes.py", views_dir_name="views"),
+    )
+    project.load()
+    return DocumentState(project)
+
+
+@pytest.fixture
+def server(state: DocumentState) -> Iterator[DocumentServer]:
+    """Fixture for a server on a free port, running in a thread."""
+    with DocumentServer(("127.0.0.1", 0), state) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def request(
+    server: DocumentServer,
+    path: str,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+) -> tuple[http.client.HTTPResponse, bytes]:
+    """Send a request to server and return its response and body."""
+    host, port = server.server_address[:2]
+    connection = http.client.HTTPConnection(str(host), port, timeout=5)
+    try:
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc"', True),
+        ("*", True),
+        ('"xyz"', False),
+    ],
+)
+def test_etag_matches(if_none_match: str | None, *, expected: bool) -> None:
+    """Test If-None-Match headers are compared with the entity tag."""
+    assert etag_matches(if_none_match, '"abc"') is expected
+
+
+class TestDocumentState:
+    """Tests for the DocumentState class."""
+
+    def test_body_is_cached(self: "TestDocumentState", state: DocumentState) -> None:
+        """Test a body is serialized once and reused."""
+        body = state.body(OutputFormat.JSON)
+        assert state.body(OutputFormat.JSON) is body
+        assert json.loads(body.content) == state.openapi.to_dict()
+
+    def test_refresh(self: "TestDocumentState", state: DocumentState) -> None:
+        """Test a refresh changing routes replaces the cached bodies."""
+        body = state.body(OutputFormat.YAML)
+        routes_file = state.project.routes_file
+        routes_file.write_text(
+            routes_file.read_text().replace('"/about"', '"/about-us"')
+        )
+        assert state.refresh([routes_file]) == {"/about", "/about-us"}
+        new_body = state.body(OutputFormat.YAML)
+        assert new_body.etag != body.etag
+        assert "/about-us" in yaml.safe_load(new_body.content)["paths"]
+
+    def test_refresh_unrelated(
+        self: "TestDocumentState", state: DocumentState, tmp_path: Path
+    ) -> None:
+        """Test a refresh changing no routes keeps the cached bodies."""
+        body = state.body(OutputFormat.YAML)
+        assert not state.refresh([tmp_path / "README.md"])
+        assert state.body(OutputFormat.YAML) is body
+
+    def test_refresh_invalid_file(
+        self: "TestDocumentState", state: DocumentState
+    ) -> None:
+        """Test a refresh after a file stopped parsing keeps the document."""
+        body = state.body(OutputFormat.YAML)
+        views_file = state.project.views_dir / "views.py"
+        views_file.write_text(views_file.read_text() + "\ndef broken(:\n")
+        assert not state.refresh([views_file])
+        assert state.body(OutputFormat.YAML) is body
+
+    def test_refresh_after_failed_patch(
+        self: "TestDocumentState", state: DocumentState
+    ) -> None:
+        """Test a failed patch keeps the body and is completed by the next one."""
+        body = state.body(OutputFormat.YAML)
+        routes_file = state.project.routes_file
+        source = routes_file.read_text()
+        routes_file.write_text(source.replace('"/about"', '"/about/{id"'))
+        with pytest.raises(ValueError, match="Missing closing brace"):
+            state.refresh([routes_file])
+        assert state.body(OutputFormat.YAML) is body
+        routes_file.write_text(source.replace('"/about"', '"/about-us"'))
+        state.refresh([routes_file])
+        assert set(yaml.safe_load(state.body(OutputFormat.YAML).content)["paths"]) == {
+            "/",
+            "/about-us",
+            "/user/{id}",
+        }
+
+    def test_refresh_forever_survives_errors(
+        self: "TestDocumentState",
+        state: DocumentState,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test a failed refresh does not stop the next ones."""
+        batches = [{Path("first.py")}, {Path("second.py")}]
+        refreshed: list[set[Path]] = []
+
+        def refresh(changed_paths: set[Path]) -> set[str]:
+            refreshed.append(changed_paths)
+            if len(refreshed) == 1:
+                msg = "refresh failed"
+                raise RuntimeError(msg)
+            return set()
+
+        monkeypatch.setattr("papyrus.serve.iter_changes", lambda *_args: iter(batches))
+        monkeypatch.setattr(state, "refresh", refresh)
+        refresh_forever(state, threading.Event())
+        assert refreshed == batches
+
+
+class TestDocumentServer:
+    """Tests for the DocumentServer class."""
+
+    @pytest.mark.parametrize(
+        ("path", "content_type"),
+        [("/openapi.yaml", "application/yaml"), ("/openapi.json", "application/json")],
+    )
+    def test_get(
+        self: "TestDocumentServer",
+        server: DocumentServer,
+        path: str,
+        content_type: str,
+    ) -> None:
+        """Test both formats are served with an entity tag."""
+        response, content = request(server, path)
+        assert response.status == HTTPStatus.OK
+        assert response.headers["Content-Type"] == content_type
+        assert response.headers["ETag"]
+        assert set(yaml.safe_load(content)["paths"]) == {"/", "/about", "/user/{id}"}
+
+    def test_not_modified(self: "TestDocumentServer", server: DocumentServer) -> None:
+        """Test a request with a matching entity tag gets no body."""
+        response, _ = request(server, "/openapi.json")
+        etag = response.headers["ETag"]
+        response, content = request(
+            server, "/openapi.json", headers={"If-None-Match": etag}
+        )
+        assert response.status == HTTPStatus.NOT_MODIFIED
+        assert not content
+
+    def test_head(self: "TestDocumentServer", server: DocumentServer) -> None:
+        """Test HEAD sends the length of the document without it."""
+        response, content = request(server, "/openapi.yaml", method="HEAD")
+        assert response.status == HTTPStatus.OK
+        assert int(response.headers["Content-Length"]) > 0
+        assert not content
+
+    def test_not_found(self: "TestDocumentServer", server: DocumentServer) -> None:
+        """Test other paths are not found."""
+        response, _ = request(server, "/openapi.xml")
+        assert response.status == HTTPStatus.NOT_FOUND
@@ -0,0 +1,136 @@
+"""Tests for the sharding module."""
+
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote
+
+import pytest
+import yaml
+
+from papyrus.components import share_components
+from papyrus.pyramid import Route
+from papyrus.sharding import (
+    MANIFEST_NAME,
+    ShardWriter,
+    common_segments,
+    json_pointer,
+    shard_name,
+)
+from papyrus.writing import OpenAPI, OutputFormat
+
+ROUTES = [
+    Route(name="home", pattern="/", methods={"GET"}),
+    Route(name="users", pattern="/users", methods={"GET", "POST"}),
+    Route(name="user", pattern="/users/{id}", methods={"GET", "DELETE"}),
+    Route(name="page", pattern="/{lang}/page/{id}", methods={"GET"}),
+]
+
+
+def dereference(value: Any, base_file: Path) -> Any:  # noqa: ANN401
+    """Return value with every $ref replaced by what it refers to."""
+    if isinstance(value, dict):
+        if "$ref" in value:
+            file_name, _, fragment = value["$ref"].partition("#")
+            target_file = base_file.parent / file_name if file_name else base_file
+            target = yaml.safe_load(target_file.read_text())
+            for key in unquote(fragment).split("/")[1:]:
+                target = target[key.replace("~1", "/").replace("~0", "~")]
+            return dereference(target, target_file)
+        return {key: dereference(item, base_file) for key, item in value.items()}
+    if isinstance(value, list):
+        return [dereference(item, base_file) for item in value]
+    return value
+
+
+class TestShardWriter:
+    """Tests for the ShardWriter class."""
+
+    @pytest.fixture
+    def writer(self: "TestShardWriter", tmp_path: Path) -> ShardWriter:
+        """Fixture for a writer of a root document next to its shards directory."""
+        return ShardWriter(tmp_path / "openapi.yaml", tmp_path / "paths")
+
+    @pytest.mark.parametrize(
+        ("pattern", "name"),
+        [
+            ("/", "index"),
+            ("/users/{id}", "users"),
+            ("/Users", "users"),
+            ("/{lang}/page", "lang"),
+            ("/.well-known/x", "well-known"),
+        ],
+    )
+    def test_shard_name(self: "TestShardWriter", pattern: str, name: str) -> None:
+        """Test patterns are grouped by their first segment, as a safe file name."""
+        assert shard_name(pattern) == name
+
+    def test_common_segments(self: "TestShardWriter") -> None:
+        """Test the segments every path starts with are left out of the names."""
+        patterns = ["/api/v1/users/{id}", "/api/v1/users", "/api/v2/items"]
+        assert common_segments(patterns) == 1
+        assert common_segments(["/api/v1/users"]) == 2  # noqa: PLR2004
+        assert common_segments([*patterns, "/"]) == 0
+        assert [shard_name(pattern, 1) for pattern in patterns] == ["v1", "v1", "v2"]
+        assert shard_name(patterns[0], 1, 2) == "v1_users"
+
+    def test_json_pointer(self: "TestShardWriter") -> None:
+        """Test the keys of the pointer are escaped, then quoted for a URI."""
+        assert json_pointer("/users/{id}") == "/~1users~1%7Bid%7D"
+
+    @pytest.mark.parametrize("output_format", list(OutputFormat))
+    @pytest.mark.parametrize("components", [False, True])
+    def test_write(
+        self: "TestShardWriter",
+        tmp_path: Path,
+        output_format: OutputFormat,
+        components: bool,
+    ) -> None:
+        """Test the root document and its shards hold the whole document."""
+        openapi = OpenAPI.from_routes(ROUTES)
+        document = share_components(openapi.to_dict()) if components else None
+        output = tmp_path / f"openapi.{output_format}"
+        writer = ShardWriter(output, tmp_path / "paths", output_format)
+        shards = {f"{name}.{output_format}" for name in ("index", "users", "lang")}
+        # The shards and the root document.
+        assert writer.write(openapi, document) == len(shards) + 1
+        assert {path.name for path in (tmp_path / "paths").iterdir()} == {
+            *shards,
+            MANIFEST_NAME,
+        }
+        root = yaml.safe_load(output.read_text())
+        assert root["paths"]["/users/{id}"] == {
+            "$ref": f"paths/users.{output_format}#/~1users~1%7Bid%7D"
+        }
+        assert dereference(root, output) == dereference(
+            document or openapi.to_dict(), output
+        )
+
+    def test_unchanged_files_are_not_written(
+        self: "TestShardWriter", writer: ShardWriter
+    ) -> None:
+        """Test only the shards whose content changed are written again."""
+        writer.write(OpenAPI.from_routes(ROUTES))
+        files = [writer.output, *writer.shards_dir.glob("*.yaml")]
+        mtimes = {path: path.stat().st_mtime_ns for path in files}
+        assert writer.write(OpenAPI.from_routes(ROUTES)) == 0
+        routes = [
+            *ROUTES[:-1],
+            Route(name="page", pattern="/{lang}/page/{id}", methods={"PUT"}),
+        ]
+        assert writer.write(OpenAPI.from_routes(routes)) == 1
+        assert [
+            path.name
+            for path, mtime in mtimes.items()
+            if path.stat().st_mtime_ns != mtime
+        ] == ["lang.yaml"]
+
+    def test_stale_shards_are_removed(
+        self: "TestShardWriter", writer: ShardWriter
+    ) -> None:
+        """Test the shards of prefixes no longer in the document are deleted."""
+        writer.write(OpenAPI.from_routes(ROUTES))
+        writer.write(OpenAPI.from_routes(ROUTES[:3]))
+        assert not (writer.shards_dir / "lang.yaml").exists()
+        assert (writer.shards_dir / "users.yaml").exists()
+        root = yaml.safe_load(writer.output.read_text())
+        assert set(root["paths"]) == {"/", "/users", "/users/{id}"}
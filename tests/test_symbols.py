@@ -0,0 +1,215 @@
+"""Tests for the symbols module."""
+
+import ast
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from papyrus.cache import ExtractionCache
+from papyrus.parsing import Parser
+from papyrus.project import Project
+from papyrus.pyramid import ModuleSymbols, PyramidInfo, Route, Symbol
+from papyrus.scanning import Engine
+from papyrus.symbols import SymbolIndex, module_symbols, read_symbols
+from papyrus.watch import watched_directories
+from tests.conftest import CountingCalls, write
+
+PYRAMID_INFO = PyramidInfo(routes_file_name="routes.py", views_dir_name="views")
+EXPECTED_ROUTES = [
+    Route("user", "/user/{id}", {"GET"}),
+    Route("home", "/", {"GET"}),
+    Route("item", "/items", {"POST"}),
+]
+
+
+@pytest.fixture
+def app_dir(tmp_path: Path) -> Path:
+    """Fixture for an application naming its routes and methods with constants."""
+    write(tmp_path / "myapp" / "__init__.py", "")
+    write(
+        tmp_path / "myapp" / "names.py",
+        """
+        USER_ROUTE = "user"
+        USER_PATTERN: str = "/user/{id}"
+        HOME = "home"
+        ITEM_PATTERN = "/items"
+        GET = "GET"
+        """,
+    )
+    write(
+        tmp_path / "myapp" / "constants" / "__init__.py",
+        "from .http import POST as CREATE\n",
+    )
+    write(tmp_path / "myapp" / "constants" / "http.py", 'POST = "POST"\n')
+    write(
+        tmp_path / "myapp" / "routes.py",
+        """
+        import myapp.names
+        from myapp.names import USER_PATTERN, USER_ROUTE
+        from . import names
+
+        ITEM = "item"
+        ITEMS = ITEM
+
+        def includeme(config):
+            config.add_route(USER_ROUTE, USER_PATTERN)
+            config.add_route(names.HOME, "/")
+            config.add_route(ITEMS, myapp.names.ITEM_PATTERN)
+            config.add_route(UNKNOWN, "/unknown")
+        """,
+    )
+    write(
+        tmp_path / "myapp" / "views" / "views.py",
+        """
+        from pyramid.view import view_config
+
+        from myapp import constants
+        from myapp.names import GET, USER_ROUTE
+
+        @view_config(route_name=USER_ROUTE, request_method=GET)
+        def user(request): ...
+
+        @view_config(route_name="home", request_method="GET")
+        def home(request): ...
+
+        @view_config(route_name="item", request_method=constants.CREATE)
+        def create_item(request): ...
+        """,
+    )
+    return tmp_path
+
+
+class TestSymbolIndex:
+    """Tests for the SymbolIndex class."""
+
+    def test_module_symbols(self: "TestSymbolIndex") -> None:
+        """Test only the last string or name bound to a module-level name counts."""
+        source = textwrap.dedent(
+            """
+            import os.path
+            import json as j
+            from .names import A as B
+            X = "x"
+            Y = Z = X
+            N = 1
+            X += "y"
+            W = "w"
+            W = "v"
+
+            def f():
+                LOCAL = "local"
+            """
+        )
+        assert module_symbols(ast.parse(source)) == ModuleSymbols(
+            constants=(("Y", Symbol("X")), ("Z", Symbol("X")), ("W", "v")),
+            imports=(("os", "os", ""), ("j", "json", ""), ("B", ".names", "A")),
+        )
+
+    @pytest.mark.parametrize(
+        ("name", "value"),
+        [
+            ("USER_ROUTE", "user"),
+            ("names.HOME", "home"),
+            ("myapp.names.ITEM_PATTERN", "/items"),
+            ("ITEMS", "item"),
+            ("constants.CREATE", "POST"),
+            ("UNKNOWN", None),
+            ("ITEM.upper", None),
+            ("names.MISSING", None),
+        ],
+    )
+    def test_value(
+        self: "TestSymbolIndex", app_dir: Path, name: str, value: str | None
+    ) -> None:
+        """Test names are followed through assignments, imports and packages."""
+        routes_file = app_dir / "myapp" / "routes.py"
+        write(
+            routes_file,
+            routes_file.read_text() + "from myapp import constants\n",
+        )
+        index = SymbolIndex(app_dir)
+        assert index.value(Symbol(name), routes_file) == value
+
+    def test_circular_definitions(self: "TestSymbolIndex", tmp_path: Path) -> None:
+        """Test names defined in terms of each other are not resolved."""
+        module = write(tmp_path / "cycle.py", "A = B\nB = A\nC = C\n")
+        index = SymbolIndex(tmp_path)
+        assert index.value(Symbol("A"), module) is None
+        assert index.value(Symbol("C"), module) is None
+
+    def test_modules_are_read_once(self: "TestSymbolIndex", app_dir: Path) -> None:
+        """Test each module is read once however many names are looked up in it."""
+        get_symbols = CountingCalls(read_symbols)
+        index = SymbolIndex(app_dir, get_symbols)
+        views_file = app_dir / "myapp" / "views" / "views.py"
+        for name in ("USER_ROUTE", "GET", "USER_ROUTE", "constants.CREATE"):
+            assert index.value(Symbol(name), views_file)
+        assert sorted(get_symbols.paths) == sorted(
+            app_dir / "myapp" / name
+            for name in (
+                "views/views.py",
+                "names.py",
+                "__init__.py",
+                "constants/__init__.py",
+                "constants/http.py",
+            )
+        )
+
+    def test_invalidate(self: "TestSymbolIndex", app_dir: Path) -> None:
+        """Test changing an imported module changes the names using it."""
+        index = SymbolIndex(app_dir)
+        views_file = app_dir / "myapp" / "views" / "views.py"
+        names_file = app_dir / "myapp" / "names.py"
+        assert index.value(Symbol("GET"), views_file) == "GET"
+        assert not index.invalidate([app_dir / "myapp" / "other.py"])
+        write(names_file, names_file.read_text().replace('GET = "GET"', 'GET = "PUT"'))
+        assert index.invalidate([names_file])
+        assert index.value(Symbol("GET"), views_file) == "PUT"
+
+
+class TestConstantRoutes:
+    """Tests for routes and views given as constants."""
+
+    @pytest.mark.parametrize("engine", list(Engine))
+    def test_get_routes(
+        self: "TestConstantRoutes", app_dir: Path, engine: Engine
+    ) -> None:
+        """Test constants are resolved, and unknown names skipped."""
+        routes = Parser.get_routes(app_dir, PYRAMID_INFO, engine=engine)
+        assert routes == EXPECTED_ROUTES
+
+    def test_cached_symbols(self: "TestConstantRoutes", app_dir: Path) -> None:
+        """Test the symbols of every module are served from a reloaded cache."""
+        cache = ExtractionCache.load(app_dir / "cache")
+        assert Parser.get_routes(app_dir, PYRAMID_INFO, cache) == EXPECTED_ROUTES
+        cache.save()
+
+        reloaded = ExtractionCache.load(app_dir / "cache")
+        assert Parser.get_routes(app_dir, PYRAMID_INFO, reloaded) == EXPECTED_ROUTES
+        assert reloaded.misses == 0
+
+    def test_project_update(self: "TestConstantRoutes", app_dir: Path) -> None:
+        """Test changing a constant updates the routes and views using it."""
+        project = Project(app_dir, PYRAMID_INFO)
+        project.load()
+        assert project.routes() == EXPECTED_ROUTES
+        names_file = app_dir / "myapp" / "names.py"
+        write(
+            names_file,
+            names_file.read_text()
+            .replace('"/user/{id}"', '"/users/{id}"')
+            .replace('GET = "GET"', 'GET = "PUT"'),
+        )
+        assert project.update([names_file]) == {"/user/{id}", "/users/{id}"}
+        assert project.routes() == Parser.get_routes(app_dir, PYRAMID_INFO)
+        assert project.routes()[0] == Route("user", "/users/{id}", {"PUT"})
+
+    def test_watched_directories(self: "TestConstantRoutes", app_dir: Path) -> None:
+        """Test the directories of the modules defining constants are watched."""
+        project = Project(app_dir, PYRAMID_INFO)
+        project.load()
+        assert watched_directories(project) == {
+            app_dir / "myapp",
+            app_dir / "myapp" / "constants",
+        }
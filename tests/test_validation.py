@@ -0,0 +1,35 @@
+"""Tests for validation.py."""
+
+from typing import Any
+
+import pytest
+
+from papyrus.pyramid import Route
+from papyrus.validation import validate_document, validate_in_background
+from papyrus.writing import OpenAPI
+
+
+@pytest.fixture
+def document() -> dict[str, Any]:
+    """Return a valid unstructured document."""
+    routes = [Route("user", "/user/{id}", {"GET", "POST"})]
+    return OpenAPI.from_routes(routes).to_dict()
+
+
+class TestValidation:
+    """Tests for the validation of unstructured documents."""
+
+    def test_valid_document(self: "TestValidation", document: dict[str, Any]) -> None:
+        """Test a generated document is valid without a YAML round-trip."""
+        assert validate_document(document)
+
+    def test_invalid_document(self: "TestValidation", document: dict[str, Any]) -> None:
+        """Test an invalid document is reported as such."""
+        del document["info"]
+        assert not validate_document(document)
+
+    def test_background(self: "TestValidation", document: dict[str, Any]) -> None:
+        """Test validation in a worker thread resolves to the same results."""
+        assert validate_in_background(document).result()
+        del document["info"]
+        assert not validate_in_background(document).result()
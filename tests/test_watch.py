@@ -0,0 +1,160 @@
+"""Tests for the watch module."""
+
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+import yaml
+
+from papyrus.project import Project
+from papyrus.pyramid import PyramidInfo
+from papyrus.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    Watcher,
+    watch,
+    watched_directories,
+)
+
+
+def make_inotify_watcher(directories: list[Path], trees: list[Path]) -> Watcher:
+    """Create an inotify watcher, skipping the test where inotify is missing."""
+    try:
+        return InotifyWatcher(directories, trees)
+    except OSError as e:
+        pytest.skip(f"inotify is not available: {e}")
+
+
+def make_polling_watcher(directories: list[Path], trees: list[Path]) -> Watcher:
+    """Create a fast polling watcher."""
+    return PollingWatcher(directories, trees, interval=0.01)
+
+
+@pytest.mark.parametrize(
+    "make_watcher",
+    [make_inotify_watcher, make_polling_watcher],
+    ids=["inotify", "polling"],
+)
+class TestWatcher:
+    """Tests for the Watcher implementations."""
+
+    def read_until(self: "TestWatcher", watcher: Watcher, path: Path) -> set[Path]:
+        """Read changes until path shows up, or give up after a few seconds."""
+        changes: set[Path] = set()
+        deadline = time.monotonic() + 5
+        while path not in changes and time.monotonic() < deadline:
+            changes |= watcher.read_changes(0.5)
+        return changes
+
+    def test_detects_modified_file(
+        self: "TestWatcher",
+        tmp_path: Path,
+        make_watcher: Callable[[list[Path], list[Path]], Watcher],
+    ) -> None:
+        """Test modifying a watched file is reported."""
+        python_file = tmp_path / "routes.py"
+        python_file.write_text("a = 1")
+        watcher = make_watcher([tmp_path], [])
+        try:
+            python_file.write_text("a = 22")
+            assert python_file in self.read_until(watcher, python_file)
+        finally:
+            watcher.close()
+
+    def test_detects_files_in_new_subdirectories(
+        self: "TestWatcher",
+        tmp_path: Path,
+        make_watcher: Callable[[list[Path], list[Path]], Watcher],
+    ) -> None:
+        """Test files created in new subdirectories of a tree are reported."""
+        watcher = make_watcher([], [tmp_path])
+        try:
+            sub_dir = tmp_path / "sub"
+            sub_dir.mkdir()
+            watcher.read_changes(0.2)
+            python_file = sub_dir / "views.py"
+            python_file.write_text("a = 1")
+            assert python_file in self.read_until(watcher, python_file)
+        finally:
+            watcher.close()
+
+    def test_add_directories(
+        self: "TestWatcher",
+        tmp_path: Path,
+        make_watcher: Callable[[list[Path], list[Path]], Watcher],
+    ) -> None:
+        """Test files in directories added later are reported."""
+        python_file = tmp_path / "api" / "routes.py"
+        python_file.parent.mkdir()
+        python_file.write_text("a = 1")
+        watcher = make_watcher([], [])
+        try:
+            watcher.add_directories([python_file.parent])
+            python_file.write_text("a = 22")
+            assert python_file in self.read_until(watcher, python_file)
+        finally:
+            watcher.close()
+
+    def test_timeout_without_changes(
+        self: "TestWatcher",
+        tmp_path: Path,
+        make_watcher: Callable[[list[Path], list[Path]], Watcher],
+    ) -> None:
+        """Test an empty set is returned when nothing changes."""
+        watcher = make_watcher([tmp_path], [])
+        try:
+            assert watcher.read_changes(0.05) == set()
+        finally:
+            watcher.close()
+
+
+def test_watched_directories(pyramid_app_dir: Path) -> None:
+    """Test the directories of modules included by an update are watched."""
+    project = Project(
+        pyramid_app_dir,
+        PyramidInfo(routes_file_name="routes.py", views_dir_name="views"),
+    )
+    project.load()
+    assert watched_directories(project) == {pyramid_app_dir}
+    api_file = pyramid_app_dir / "api" / "routes.py"
+    api_file.parent.mkdir()
+    api_file.write_text('config.add_route("users", "/users")\n')
+    routes_file = project.routes_file
+    routes_file.write_text(
+        routes_file.read_text().rstrip() + '\n    config.include(".api.routes")\n'
+    )
+    project.update([routes_file])
+    assert watched_directories(project) == {pyramid_app_dir, api_file.parent}
+
+
+def test_watch_survives_bad_edits(
+    pyramid_app_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a batch that fails leaves the output alone until a good one."""
+    project = Project(
+        pyramid_app_dir,
+        PyramidInfo(routes_file_name="routes.py", views_dir_name="views"),
+    )
+    project.load()
+    openapi = project.openapi()
+    output = pyramid_app_dir / "openapi.yaml"
+    output.write_text(openapi.to_yaml())
+    before = output.read_text()
+    routes_file = project.routes_file
+    source = routes_file.read_text()
+
+    def edit(*_args: object) -> Iterator[set[Path]]:
+        for pattern in ('"/about/{id"', '"/about-us"'):
+            routes_file.write_text(source.replace('"/about"', pattern))
+            yield {routes_file}
+            if pattern == '"/about/{id"':
+                assert output.read_text() == before
+
+    monkeypatch.setattr("papyrus.watch.iter_changes", edit)
+    watch(project, openapi, output)
+    assert set(yaml.safe_load(output.read_text())["paths"]) == {
+        "/",
+        "/about-us",
+        "/user/{id}",
+    }
@@ -1,9 +1,26 @@
 """Tests for the writing module."""
 
+import io
+import json
+import os
+import stat
+from collections.abc import Iterator
+from pathlib import Path
+
 import pytest
+import yaml
 
 from papyrus.pyramid import Route
-from papyrus.writing import OpenAPI, Operation, Parameter, PathItem
+from papyrus.writing import (
+    OpenAPI,
+    Operation,
+    OutputFormat,
+    Parameter,
+    PathItem,
+    converter,
+    open_atomic,
+    write_atomic,
+)
 
 
 class TestOperation:
@@ -12,26 +29,41 @@ class TestOperation:
     @pytest.mark.parametrize(
         ("route", "expected_parameters"),
         [
-            (Route(name="test", pattern="/test", methods={"GET"}), []),
+            (Route(name="test", pattern="/test", methods={"GET"}), ()),
             (
                 Route(name="test", pattern="/test/{id}", methods={"GET"}),
-                [
+                (
                     Parameter(
                         name="id", _in="path", required=True, schema={"type": "string"}
-                    )
-                ],
+                    ),
+                ),
             ),
         ],
         ids=["no_parameters", "one_parameter"],
     )
     def test_from_route(
-        self: "TestOperation", route: Route, expected_parameters: list[Parameter]
+        self: "TestOperation",
+        route: Route,
+        expected_parameters: tuple[Parameter, ...],
     ) -> None:
         """Test the from_route method."""
         operation = Operation.from_route(route, "GET")
         assert isinstance(operation, Operation)
         assert operation.parameters == expected_parameters
 
+    def test_shared_objects(self: "TestOperation") -> None:
+        """Test operations share their parameters and responses."""
+        first = Operation.from_route(
+            Route(name="a", pattern="/a/{id}", methods={"GET"}), "GET"
+        )
+        second = Operation.from_route(
+            Route(name="b", pattern="/b/{id}", methods={"POST"}), "POST"
+        )
+        assert first is not None
+        assert second is not None
+        assert first.parameters[0] is second.parameters[0]
+        assert first.responses is second.responses
+
     def test_from_route_method_missing(self: "TestOperation") -> None:
         """Test the from_route method with no method."""
         operation = Operation.from_route(
@@ -78,6 +110,17 @@ class TestOpenAPI:
         expected_paths = 4
         assert len(openapi.paths) == expected_paths
 
+    def test_from_routes_sharing_a_pattern(self: "TestOpenAPI") -> None:
+        """Test routes sharing a pattern are merged instead of overwritten."""
+        routes = [
+            Route(name="get_user", pattern="/user/{id}", methods={"GET"}),
+            Route(name="edit_user", pattern="/user/{id}", methods={"POST"}),
+        ]
+        path_item = OpenAPI.from_routes(routes).paths["/user/{id}"]
+        assert path_item.get is not None
+        assert path_item.post is not None
+        assert path_item.summary == "edit_user"
+
     def test_to_yaml(self: "TestOpenAPI") -> None:
         """Test the to_yaml method."""
         routes = [
@@ -110,3 +153,91 @@ paths:
 """
         openapi = OpenAPI.from_routes(routes)
         assert openapi.to_yaml() == expected_yaml
+
+    @pytest.fixture
+    def openapi(self: "TestOpenAPI") -> OpenAPI:
+        """Fixture for a document with several paths, one with a long name."""
+        long_name = "route " * 30
+        return OpenAPI.from_routes(
+            [
+                Route(name="b", pattern="/b/{id}", methods={"GET", "DELETE"}),
+                Route(name="a", pattern="/a", methods={"POST"}),
+                Route(name=long_name, pattern=f"/{'x' * 100}", methods={"PUT"}),
+            ]
+        )
+
+    def test_to_json(self: "TestOpenAPI", openapi: OpenAPI) -> None:
+        """Test the JSON output holds the same document as the YAML output."""
+        assert json.loads(openapi.to_json()) == yaml.safe_load(openapi.to_yaml())
+        assert json.loads(openapi.to_json()) == converter().unstructure(openapi)
+
+    @pytest.mark.parametrize("output_format", list(OutputFormat))
+    def test_write_matches_render(
+        self: "TestOpenAPI", openapi: OpenAPI, output_format: OutputFormat
+    ) -> None:
+        """Test the streaming writer outputs exactly the rendered document."""
+        stream = io.StringIO()
+        openapi.write(stream, output_format)
+        assert stream.getvalue() == openapi.render(output_format)
+
+    @pytest.mark.parametrize("output_format", list(OutputFormat))
+    def test_write_document(
+        self: "TestOpenAPI", openapi: OpenAPI, output_format: OutputFormat
+    ) -> None:
+        """Test writing an already unstructured document gives the same output."""
+        stream = io.StringIO()
+        openapi.write(stream, output_format, openapi.to_dict())
+        assert stream.getvalue() == openapi.render(output_format)
+
+    @pytest.mark.parametrize("output_format", list(OutputFormat))
+    def test_write_without_paths(
+        self: "TestOpenAPI", output_format: OutputFormat
+    ) -> None:
+        """Test the streaming writer handles a document without paths."""
+        openapi = OpenAPI.from_routes([])
+        stream = io.StringIO()
+        openapi.write(stream, output_format)
+        assert stream.getvalue() == openapi.render(output_format)
+
+
+@pytest.fixture
+def umask() -> Iterator[int]:
+    """Fixture setting the usual umask for the duration of a test."""
+    old_umask = os.umask(0o022)
+    yield 0o022
+    os.umask(old_umask)
+
+
+class TestWriteAtomic:
+    """Tests for the atomic writers."""
+
+    def test_new_file_mode(self: "TestWriteAtomic", tmp_path: Path, umask: int) -> None:
+        """Test a new file gets the mode open gives it, not a private one."""
+        path = tmp_path / "openapi.yaml"
+        write_atomic(path, "openapi: 3.1.0\n")
+        assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+        assert path.read_text() == "openapi: 3.1.0\n"
+
+    def test_replaced_file_mode(self: "TestWriteAtomic", tmp_path: Path) -> None:
+        """Test a replaced file keeps its mode."""
+        path = tmp_path / "openapi.yaml"
+        path.write_text("old")
+        path.chmod(0o640)
+        write_atomic(path, "new")
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640  # noqa: PLR2004
+        assert path.read_text() == "new"
+
+    def test_error_keeps_file(self: "TestWriteAtomic", tmp_path: Path) -> None:
+        """Test a failed write leaves the file and no temporary file behind."""
+        path = tmp_path / "openapi.yaml"
+        path.write_text("old")
+
+        def write_and_fail() -> None:
+            with open_atomic(path) as f:
+                f.write("new")
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            write_and_fail()
+        assert [p.name for p in tmp_path.iterdir()] == ["openapi.yaml"]
+        assert path.read_text() == "old"